@@ -0,0 +1,472 @@
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_fcr import valores_a_dataframe, nombre_archivo
+
+# --- BACKENDS DE ALMACENAMIENTO (Google Sheets o local) ---
+# La app solo usa esta interfaz: agregar resultados, leer resultados y leer
+# tablas FCR. Así se puede correr una gincana grande sobre un almacén local,
+# reflejarla a Sheets en segundo plano o hacer pruebas de carga sin red.
+# gspread y pandas se importan al usarse, no al cargar el módulo (arranque en frío).
+
+HOJA_RESULTADOS = "Resultados Brutos"
+COLUMNAS_RANKING = 4  # Fecha/Hora, ID Agente, WPM, Precisión (%): lo único que lee el ranking
+RANGOS_POR_LOTE = 100  # Rangos por batch_get al leer las filas de un agente
+# La API de Sheets rechaza pedidos de más de 10 MB: las tablas grandes se escriben por bloques
+BYTES_POR_ESCRITURA = 4_000_000
+FILAS_POR_ESCRITURA = 5_000
+
+
+def en_bloques(filas, max_bytes=BYTES_POR_ESCRITURA, max_filas=FILAS_POR_ESCRITURA):
+    """Parte `filas` en bloques consecutivos de hasta `max_filas` filas y unos `max_bytes` de JSON.
+
+    Una fila que sola supera `max_bytes` va en un bloque propio.
+    """
+    bloque, tamano = [], 0
+    for fila in filas:
+        peso = len(json.dumps(fila, ensure_ascii=False, default=str).encode('utf-8'))
+        if bloque and (len(bloque) >= max_filas or tamano + peso > max_bytes):
+            yield bloque
+            bloque, tamano = [], 0
+        bloque.append(fila)
+        tamano += peso
+    if bloque:
+        yield bloque
+
+
+def letra_columna(numero):
+    """Número de columna (1 = A) a su letra en la notación A1 ('J', 'AA', ...)."""
+    letras = ""
+    while numero > 0:
+        numero, resto = divmod(numero - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+class HojaNoEncontrada(Exception):
+    """La pestaña o tabla pedida no existe en el backend."""
+
+
+class BackendResultados:
+    """Interfaz común de los backends."""
+
+    nombre = "base"
+
+    def agregar_resultados(self, filas):
+        """Agrega filas (con el orden de COLUMNAS_RESULTADOS) en una sola operación."""
+        raise NotImplementedError
+
+    def leer_resultados(self, desde=0, columnas=10, sin_formato=False):
+        """Devuelve las filas de resultados a partir de la fila de datos `desde` (sin cabecera).
+
+        `columnas` es cuántas columnas de COLUMNAS_RESULTADOS se necesitan como mínimo.
+        Con `sin_formato`, los números llegan como números y las fechas que la hoja
+        haya convertido, como número de serie (independiente de la configuración regional).
+        """
+        raise NotImplementedError
+
+    def leer_resultados_agente(self, agente, columnas=10):
+        """Solo las filas de resultados de `agente`, de la más antigua a la más nueva."""
+        return [
+            fila for fila in self.leer_resultados(0, columnas=columnas)
+            if len(fila) > 1 and str(fila[1]) == str(agente)
+        ]
+
+    def leer_ranking(self, desde=0):
+        """Como leer_resultados, solo con las columnas del ranking y WPM/precisión numéricos."""
+        return [fila[:COLUMNAS_RANKING] for fila in self.leer_resultados(desde, columnas=COLUMNAS_RANKING)]
+
+    def leer_tablas_fcr(self, nombres_hojas):
+        """Devuelve {nombre: DataFrame o excepción} para las tablas FCR pedidas."""
+        raise NotImplementedError
+
+    def fecha_modificacion_fcr(self):
+        """Marca que cambia cuando cambian las tablas FCR (None si no se puede saber)."""
+        return None
+
+    def escribir_tabla(self, nombre, valores):
+        """Reemplaza la tabla `nombre` (cabecera + filas) con escrituras masivas por bloques."""
+        raise NotImplementedError
+
+    def agregar_a_tabla(self, nombre, filas, cabecera):
+        """Agrega `filas` al final de la tabla `nombre` por bloques; si no existe, la crea con `cabecera`."""
+        raise NotImplementedError
+
+    def leer_tabla(self, nombre, columnas=None):
+        """Valores (cabecera + filas, números sin formato) de la tabla `nombre`. Lanza HojaNoEncontrada.
+
+        Con `columnas` solo se leen las primeras `columnas` columnas.
+        """
+        raise NotImplementedError
+
+    def listar_tablas(self):
+        """Nombres de las tablas (pestañas) existentes."""
+        raise NotImplementedError
+
+    def eliminar_primeras_filas(self, cantidad):
+        """Borra las `cantidad` filas de resultados más antiguas (las primeras de la hoja)."""
+        raise NotImplementedError
+
+
+class BackendSheets(BackendResultados):
+    """Google Sheets: 'Resultados Brutos' y las pestañas 'Ranking FCR Semanal - *'.
+
+    `obtener_cliente()` devuelve el ClienteSheets compartido del proceso, que
+    guarda las hojas y pestañas abiertas (ver cliente_sheets.py).
+    """
+
+    nombre = "sheets"
+
+    def __init__(self, obtener_cliente, gsheet_id):
+        self._obtener_cliente = obtener_cliente
+        self.gsheet_id = gsheet_id
+
+    def _cliente(self):
+        cliente = self._obtener_cliente() if self.gsheet_id else None
+        if not cliente:
+            raise ConnectionError("No se pudo conectar a Google Sheets.")
+        return cliente
+
+    def _hoja(self):
+        return self._cliente().abrir_por_clave(self.gsheet_id)
+
+    def _en_pestana(self, nombre, operar):
+        """Ejecuta `operar(ws)` con la pestaña de la caché del cliente.
+
+        Si la API la rechaza (400/404: se borró o se volvió a crear y el objeto
+        guardado quedó viejo), la olvida, la busca de nuevo y reintenta una vez.
+        Si ya no existe, la nueva búsqueda lanza WorksheetNotFound.
+        """
+        import gspread
+
+        cliente, hoja = self._cliente(), self._hoja()
+        try:
+            return operar(cliente.pestana(hoja, nombre))
+        except gspread.exceptions.APIError as e:
+            if getattr(getattr(e, 'response', None), 'status_code', None) not in (400, 404):
+                raise
+            cliente.olvidar_pestana(hoja, nombre)
+            return operar(cliente.pestana(hoja, nombre))
+
+    def agregar_resultados(self, filas):
+        # RAW como el append_row original: IDs con ceros a la izquierda, texto con '=' y fechas se guardan tal cual
+        self._en_pestana(HOJA_RESULTADOS, lambda ws: self._cliente().planificador.escribir(
+            lambda: ws.append_rows(filas, value_input_option="RAW"), operacion='append_rows'
+        ))
+
+    def leer_resultados(self, desde=0, columnas=10, sin_formato=False):
+        from gspread.utils import ValueRenderOption, DateTimeOption
+
+        # La fila 1 es la cabecera: las filas de datos empiezan en la 2
+        rango = f"A{desde + 2}:{letra_columna(columnas)}"
+        opciones = {
+            'value_render_option': ValueRenderOption.unformatted,
+            'date_time_render_option': DateTimeOption.serial_number,
+        } if sin_formato else {}
+        return self._en_pestana(HOJA_RESULTADOS, lambda ws: self._cliente().planificador.leer(
+            ('resultados', self.gsheet_id, rango, sin_formato), lambda: ws.get(rango, **opciones),
+            operacion='get_resultados',
+        ))
+
+    def leer_resultados_agente(self, agente, columnas=10):
+        """Lee la columna de IDs y después, en un batch_get, solo los tramos de filas del agente."""
+        from gspread.utils import ValueRenderOption
+
+        agente = str(agente)
+        planificador = self._cliente().planificador
+        ids = self._en_pestana(HOJA_RESULTADOS, lambda ws: planificador.leer(
+            ('ids', self.gsheet_id), lambda: ws.get("B2:B", value_render_option=ValueRenderOption.unformatted),
+            operacion='get_ids',
+        ))
+        numeros = [i + 2 for i, fila in enumerate(ids) if fila and str(fila[0]) == agente]
+        if not numeros:
+            return []
+        tramos = []  # Filas consecutivas en un solo rango
+        for numero in numeros:
+            if tramos and tramos[-1][1] == numero - 1:
+                tramos[-1][1] = numero
+            else:
+                tramos.append([numero, numero])
+        ultima = letra_columna(columnas)
+        rangos = [f"A{inicio}:{ultima}{fin}" for inicio, fin in tramos]
+        filas = []
+        for i in range(0, len(rangos), RANGOS_POR_LOTE):
+            lote = rangos[i:i + RANGOS_POR_LOTE]
+            respuesta = self._en_pestana(HOJA_RESULTADOS, lambda ws: planificador.leer(
+                ('agente', self.gsheet_id) + tuple(lote), lambda: ws.batch_get(lote), operacion='batch_get_agente'
+            ))
+            filas.extend(fila for rango in respuesta for fila in rango)
+        # La hoja pudo cambiar entre las dos lecturas: se vuelve a filtrar por ID
+        return [fila for fila in filas if len(fila) > 1 and str(fila[1]) == agente]
+
+    def leer_ranking(self, desde=0):
+        """Rango A:D sin formato: los números llegan como números y el texto del agente no se descarga.
+
+        Las fechas se piden como texto formateado (si no, llegan como número de serie).
+        """
+        from gspread.utils import ValueRenderOption, DateTimeOption
+
+        rango = f"A{desde + 2}:{letra_columna(COLUMNAS_RANKING)}"
+        return self._en_pestana(HOJA_RESULTADOS, lambda ws: self._cliente().planificador.leer(
+            ('ranking', self.gsheet_id, rango),
+            lambda: ws.get(
+                rango,
+                value_render_option=ValueRenderOption.unformatted,
+                date_time_render_option=DateTimeOption.formatted_string,
+            ),
+            operacion='get_ranking',
+        ))
+
+    def leer_tablas_fcr(self, nombres_hojas):
+        """Una sola apertura y un solo values_batch_get para todas las pestañas.
+
+        Si el lote falla (p. ej. falta una pestaña), cae a lecturas individuales en
+        paralelo para aislar el error por pestaña.
+        """
+        import gspread
+
+        sheet = self._hoja()
+        planificador = self._cliente().planificador
+        try:
+            pedidos = [f"'{nombre}'" for nombre in nombres_hojas]
+            respuesta = planificador.leer(
+                ('valores', self.gsheet_id) + tuple(pedidos), lambda: sheet.values_batch_get(pedidos),
+                operacion='values_batch_get',
+            )
+            rangos = respuesta.get('valueRanges', [])
+            return {
+                nombre: valores_a_dataframe(rango.get('values', []))
+                for nombre, rango in zip(nombres_hojas, rangos)
+            }
+        except gspread.exceptions.APIError:
+            pass
+
+        def leer_una(nombre):
+            try:
+                valores = self._en_pestana(nombre, lambda ws: planificador.leer(
+                    ('valores', self.gsheet_id, nombre), ws.get_all_values, operacion='get_all_values'
+                ))
+                return valores_a_dataframe(valores)
+            except gspread.WorksheetNotFound:
+                return HojaNoEncontrada(nombre)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(4, len(nombres_hojas))) as pool:
+            return dict(zip(nombres_hojas, pool.map(leer_una, nombres_hojas)))
+
+    def fecha_modificacion_fcr(self):
+        sheet = self._hoja()
+        # Metadatos de Drive: otra cuota, solo se agrupan las consultas simultáneas
+        return self._cliente().planificador.leer(
+            ('modificacion', self.gsheet_id), sheet.get_lastUpdateTime, con_cuota=False,
+            operacion='get_lastUpdateTime',
+        )
+
+    def _escribir_tabla(self, operacion, funcion):
+        # Tablas de administración: no son prioritarias frente al guardado de resultados
+        return self._cliente().planificador.escribir(funcion, prioritaria=False, operacion=operacion)
+
+    def escribir_tabla(self, nombre, valores):
+        import gspread
+
+        sheet = self._hoja()
+        columnas = max((len(fila) for fila in valores), default=1)
+        escribir = self._escribir_tabla
+        filas = max(len(valores), 1)
+
+        def escribir_por_bloques(ws):
+            fila_inicio = 1
+            for bloque in en_bloques(valores):
+                rango = f"A{fila_inicio}"
+                escribir('update', lambda: ws.update(bloque, rango, value_input_option="RAW"))
+                fila_inicio += len(bloque)
+
+        def reemplazar(ws):
+            escribir('clear', ws.clear)
+            escribir('resize', lambda: ws.resize(rows=filas, cols=columnas))
+            escribir_por_bloques(ws)
+
+        try:
+            self._en_pestana(nombre, reemplazar)
+        except gspread.WorksheetNotFound:
+            ws = escribir('add_worksheet', lambda: sheet.add_worksheet(title=nombre, rows=filas, cols=columnas))
+            escribir_por_bloques(ws)
+
+    def agregar_a_tabla(self, nombre, filas, cabecera):
+        import gspread
+
+        escribir = self._escribir_tabla
+        # Los bloques enviados se descartan: si _en_pestana reintenta, no se repiten
+        pendientes = list(en_bloques(filas))
+
+        def agregar(ws):
+            while pendientes:
+                bloque = pendientes[0]
+                escribir('append_rows', lambda: ws.append_rows(bloque, value_input_option="RAW"))
+                pendientes.pop(0)
+
+        try:
+            self._en_pestana(nombre, agregar)
+        except gspread.WorksheetNotFound:
+            sheet = self._hoja()
+            ws = escribir('add_worksheet', lambda: sheet.add_worksheet(title=nombre, rows=1, cols=len(cabecera)))
+            escribir('update', lambda: ws.update([cabecera], "A1", value_input_option="RAW"))
+            agregar(ws)
+
+    def leer_tabla(self, nombre, columnas=None):
+        import gspread
+        from gspread.utils import ValueRenderOption, DateTimeOption
+
+        rango = (f"A:{letra_columna(columnas)}",) if columnas else ()
+        try:
+            return self._en_pestana(nombre, lambda ws: self._cliente().planificador.leer(
+                ('tabla', self.gsheet_id, nombre, columnas),
+                lambda: ws.get(
+                    *rango,
+                    value_render_option=ValueRenderOption.unformatted,
+                    date_time_render_option=DateTimeOption.formatted_string,
+                ),
+                operacion='get_tabla',
+            ))
+        except gspread.WorksheetNotFound:
+            raise HojaNoEncontrada(nombre)
+
+    def listar_tablas(self):
+        sheet = self._hoja()
+        pestanas = self._cliente().planificador.leer(
+            ('pestanas', self.gsheet_id), sheet.worksheets, operacion='worksheets'
+        )
+        return [ws.title for ws in pestanas]
+
+    def eliminar_primeras_filas(self, cantidad):
+        if cantidad <= 0:
+            return
+        # Las filas nuevas se agregan al final: borrar desde la fila 2 no toca las que llegan mientras tanto
+        self._en_pestana(HOJA_RESULTADOS, lambda ws: self._cliente().planificador.escribir(
+            lambda: ws.delete_rows(2, cantidad + 1), prioritaria=False, operacion='delete_rows'
+        ))
+
+
+class BackendLocal(BackendResultados):
+    """Almacén local: resultados en SQLite y tablas FCR como archivos Parquet/CSV.
+
+    Las tablas FCR se buscan en `directorio_fcr` con el mismo nombre de archivo
+    que usa la caché FCR (p. ej. 'ranking_fcr_semanal_pm.parquet' o '.csv').
+    """
+
+    nombre = "local"
+
+    def __init__(self, ruta_db, directorio_fcr):
+        self.ruta_db = ruta_db
+        self.directorio_fcr = directorio_fcr
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta_db, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resultados (id INTEGER PRIMARY KEY AUTOINCREMENT, fila TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tablas (nombre TEXT PRIMARY KEY, valores TEXT NOT NULL)"
+        )
+
+    def agregar_resultados(self, filas):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO resultados (fila) VALUES (?)",
+                [(json.dumps(fila, ensure_ascii=False),) for fila in filas],
+            )
+            self._conn.execute("COMMIT")
+
+    def leer_resultados(self, desde=0, columnas=None, sin_formato=False):
+        with self._lock:
+            registros = self._conn.execute(
+                "SELECT fila FROM resultados ORDER BY id LIMIT -1 OFFSET ?", (desde,)
+            ).fetchall()
+        return [json.loads(fila) for (fila,) in registros]
+
+    def leer_resultados_agente(self, agente, columnas=None):
+        with self._lock:
+            registros = self._conn.execute(
+                "SELECT fila FROM resultados WHERE CAST(json_extract(fila, '$[1]') AS TEXT) = ? ORDER BY id",
+                (str(agente),),
+            ).fetchall()
+        return [json.loads(fila) for (fila,) in registros]
+
+    def _ruta_fcr(self, nombre):
+        base = os.path.join(self.directorio_fcr, nombre_archivo(nombre))
+        for ruta in (base, base[:-len('.parquet')] + '.csv'):
+            if os.path.exists(ruta):
+                return ruta
+        return None
+
+    def leer_tablas_fcr(self, nombres_hojas):
+        import pandas as pd
+
+        tablas = {}
+        for nombre in nombres_hojas:
+            ruta = self._ruta_fcr(nombre)
+            if ruta is None:
+                tablas[nombre] = HojaNoEncontrada(nombre)
+            elif ruta.endswith('.csv'):
+                tablas[nombre] = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+            else:
+                tablas[nombre] = pd.read_parquet(ruta)
+        return tablas
+
+    def escribir_tabla(self, nombre, valores):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tablas (nombre, valores) VALUES (?, ?)",
+                (nombre, json.dumps(valores, ensure_ascii=False)),
+            )
+
+    def agregar_a_tabla(self, nombre, filas, cabecera):
+        with self._lock:
+            registro = self._conn.execute("SELECT valores FROM tablas WHERE nombre = ?", (nombre,)).fetchone()
+            valores = json.loads(registro[0]) if registro else [list(cabecera)]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tablas (nombre, valores) VALUES (?, ?)",
+                (nombre, json.dumps(valores + list(filas), ensure_ascii=False)),
+            )
+
+    def leer_tabla(self, nombre, columnas=None):
+        with self._lock:
+            registro = self._conn.execute("SELECT valores FROM tablas WHERE nombre = ?", (nombre,)).fetchone()
+        if registro is None:
+            raise HojaNoEncontrada(nombre)
+        valores = json.loads(registro[0])
+        return [fila[:columnas] for fila in valores] if columnas else valores
+
+    def listar_tablas(self):
+        with self._lock:
+            return [nombre for (nombre,) in self._conn.execute("SELECT nombre FROM tablas ORDER BY nombre")]
+
+    def eliminar_primeras_filas(self, cantidad):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM resultados WHERE id IN (SELECT id FROM resultados ORDER BY id LIMIT ?)", (cantidad,)
+            )
+
+    def fecha_modificacion_fcr(self):
+        if not os.path.isdir(self.directorio_fcr):
+            return None
+        fechas = [entrada.stat().st_mtime for entrada in os.scandir(self.directorio_fcr) if entrada.is_file()]
+        return str(max(fechas)) if fechas else None
+
+
+def crear_backend(config, obtener_cliente=None):
+    """Crea el backend indicado por `config['backend']` ('sheets' por defecto o 'local')."""
+    tipo = config.get("backend", "sheets")
+    if tipo == "local":
+        return BackendLocal(
+            config.get("backend_local_ruta", "resultados_local.db"),
+            config.get("backend_local_fcr_dir", "datos_fcr"),
+        )
+    if tipo == "sheets":
+        return BackendSheets(obtener_cliente, config.get("gsheet_id"))
+    raise ValueError(f"Backend desconocido: '{tipo}'. Usa 'sheets' o 'local'.")
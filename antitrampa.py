@@ -0,0 +1,90 @@
+from telemetria import TECLA_BORRAR, TECLA_SUPRIMIR, TECLA_PEGAR
+
+# --- DETECCIÓN EN LÍNEA DE PEGADO / AUTOMATIZACIÓN ---
+# Procesa la telemetría evento por evento en O(1) y con memoria constante
+# (contadores y media/varianza de Welford). No bloquea al agente: solo deja
+# alertas que se guardan con el resultado para que un administrador las revise.
+
+INTERVALO_IMPOSIBLE_MS = 15  # Nadie teclea sostenidamente a >4000 pulsaciones por minuto
+MIN_INTERVALOS_IMPOSIBLES = 8
+PAUSA_MS = 2000  # Pausas largas no cuentan para la regularidad del ritmo
+MIN_EVENTOS_RITMO = 60
+COEF_VARIACION_MINIMO = 0.12  # Humanos: típicamente 0.3-0.6
+SALTO_MAXIMO_POR_TICK = 30  # Caracteres nuevos en ~1 s (≈360 WPM)
+TOLERANCIA_SIN_TECLAS = 60  # Caracteres de más frente a las teclas recibidas (lotes en vuelo)
+MIN_TEXTO_SIN_TELEMETRIA = 50
+
+ALERTA_PEGADO = "pegado"
+ALERTA_INTERVALOS_IMPOSIBLES = "intervalos_imposibles"
+ALERTA_RITMO_UNIFORME = "ritmo_uniforme"
+ALERTA_SALTO_DE_TEXTO = "salto_de_texto"
+ALERTA_SIN_TELEMETRIA = "sin_telemetria"
+ALERTA_TELEMETRIA_INCOMPLETA = "telemetria_incompleta"
+
+
+class DetectorAutomatizacion:
+    """Detector incremental sobre la telemetría y los tamaños del texto en cada tick."""
+
+    def __init__(self):
+        self.eventos = 0
+        self.pegados = 0
+        self.intervalos_imposibles = 0
+        self.caracteres_netos = 0  # Teclas imprimibles menos borrados
+        self.saltos = 0
+        self.largo_anterior = 0
+        self.telemetria_incompleta = False  # Con eventos perdidos no se compara el texto con las teclas
+        # Welford: media y suma de cuadrados de los intervalos entre teclas
+        self._n = 0
+        self._media = 0.0
+        self._m2 = 0.0
+
+    def procesar(self, delta_ms, codigo):
+        """Aplica un evento de teclado en O(1)."""
+        self.eventos += 1
+        if codigo == TECLA_PEGAR:
+            self.pegados += 1
+            return
+        if codigo in (TECLA_BORRAR, TECLA_SUPRIMIR):
+            self.caracteres_netos -= 1
+        else:
+            self.caracteres_netos += 1
+
+        if self.eventos == 1:
+            return  # El primer delta es el tiempo hasta la primera tecla
+        if delta_ms < INTERVALO_IMPOSIBLE_MS:
+            self.intervalos_imposibles += 1
+        if delta_ms < PAUSA_MS:
+            self._n += 1
+            diferencia = delta_ms - self._media
+            self._media += diferencia / self._n
+            self._m2 += diferencia * (delta_ms - self._media)
+
+    def observar_texto(self, largo_texto):
+        """Se llama en cada tick con el largo actual del texto escrito."""
+        if largo_texto - self.largo_anterior > SALTO_MAXIMO_POR_TICK:
+            self.saltos += 1
+        self.largo_anterior = largo_texto
+
+    def coeficiente_variacion(self):
+        if self._n < 2 or self._media <= 0:
+            return None
+        return (self._m2 / (self._n - 1)) ** 0.5 / self._media
+
+    def alertas(self):
+        """Lista de alertas activas."""
+        alertas = []
+        if self.pegados:
+            alertas.append(ALERTA_PEGADO)
+        if self.intervalos_imposibles >= MIN_INTERVALOS_IMPOSIBLES:
+            alertas.append(ALERTA_INTERVALOS_IMPOSIBLES)
+        coeficiente = self.coeficiente_variacion()
+        if self._n >= MIN_EVENTOS_RITMO and coeficiente is not None and coeficiente < COEF_VARIACION_MINIMO:
+            alertas.append(ALERTA_RITMO_UNIFORME)
+        faltan_teclas = self.largo_anterior - self.caracteres_netos > TOLERANCIA_SIN_TECLAS
+        if self.saltos or (self.eventos and faltan_teclas and not self.telemetria_incompleta):
+            alertas.append(ALERTA_SALTO_DE_TEXTO)
+        if self.telemetria_incompleta:
+            alertas.append(ALERTA_TELEMETRIA_INCOMPLETA)
+        if not self.eventos and self.largo_anterior >= MIN_TEXTO_SIN_TELEMETRIA:
+            alertas.append(ALERTA_SIN_TELEMETRIA)
+        return alertas
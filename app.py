@@ -1,40 +1,30 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import time
-import re
-import gspread
-from google.oauth2 import service_account 
-
-# --- CONFIGURACIÓN ESTÁTICA (Para evitar cuota de Google Sheets) ---
-
-DURACION_SEGUNDOS = 60 # Tiempo fijo para la prueba de tecleo
-TEXTO_PRUEBA_GINCANA = (
-    "La atención al cliente en un Contact Center requiere precisión y velocidad. "
-    "La métrica clave es el FCR, First Contact Resolution, que mide la capacidad "
-    "de resolver el problema del cliente en la primera interacción. Un alto FCR "
-    "está directamente relacionado con la satisfacción del cliente (CSAT) y la "
-    "eficiencia operativa. El manejo adecuado de la información y la capacidad "
-    "de teclear con fluidez son habilidades fundamentales para el éxito."
-)
-
-PREGUNTAS_COMPRENSION = [
-    {
-        "pregunta": "¿Cuál es la métrica clave mencionada en el texto?",
-        "opciones": ["A. CSAT", "B. FCR", "C. WPM"],
-        "respuesta_correcta": "B. FCR"
-    },
-    {
-        "pregunta": "¿Con qué está directamente relacionado un alto FCR?",
-        "opciones": ["A. Ahorro de tiempo", "B. Satisfacción del Cliente (CSAT)", "C. Cantidad de llamadas"],
-        "respuesta_correcta": "B. Satisfacción del Cliente (CSAT)"
-    },
-    {
-        "pregunta": "¿Qué habilidades se mencionan como fundamentales?",
-        "opciones": ["A. Hablar inglés", "B. Vender productos", "C. Manejo de información y fluidez al teclear"],
-        "respuesta_correcta": "C. Manejo de información y fluidez al teclear"
-    }
-]
+import json
+import logging
+import os
+import uuid
+import streamlit.components.v1 as components
+from cola_resultados import ColaResultados, COLUMNAS_RESULTADOS, EN_COLA, GUARDADO, ERROR
+from bandeja_local import BandejaSalida
+from cache_ranking import CacheInstantanea
+from indice_ranking import IndiceRanking, a_numero
+from cache_fcr import CacheFCR, consolidar_fcr
+from almacenamiento import crear_backend, HojaNoEncontrada
+from puntuacion import puntuar_pasaje, MarcadorIncremental
+from banco_pasajes import cargar_banco
+from telemetria import Telemetria
+from progresion import Progresion, curva_wpm
+from antitrampa import DetectorAutomatizacion
+import cliente_sheets
+from metricas import REGISTRO, cronometrado, iniciar_servidor, iniciar_archivo
+from eventos import crear_hub
+from estado_sesion import crear_almacen_estado, instantanea, restaurar
+from archivado import crear_archivo, leer_base_ranking
+
+# pandas, gspread y google-auth se importan donde se usan: el agente que hace el
+# test no los necesita hasta los resultados y así el arranque en frío es más rápido.
 
 # --- CSS PERSONALIZADO (CLEAN & PROFESIONAL con BARRA LATERAL CLARA) ---
 st.markdown("""
@@ -100,100 +90,129 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# --- CONFIGURACIÓN OPCIONAL DESDE SECRETS ---
+
+def leer_config(clave, defecto=None):
+    """Lee una clave opcional de st.secrets; devuelve `defecto` si no existe o no hay secrets."""
+    try:
+        return st.secrets.get(clave, defecto)
+    except Exception:
+        return defecto
+
+
+# --- DURACIONES DEL TEST (Configurables para pruebas de carga) ---
+
+DURACION_SEGUNDOS = int(leer_config("duracion_tecleo_segundos", 60)) # Tiempo fijo para la prueba de tecleo
+CUENTA_REGRESIVA_SEGUNDOS = int(leer_config("cuenta_regresiva_segundos", 5))
+
+
 # --- CONEXIÓN A GOOGLE SHEETS (Solo para GUARDAR RESULTADOS) ---
 
-@st.cache_resource
 def get_gsheet_client():
-    """Conecta con Google Sheets usando los secretos de Streamlit."""
+    """Cliente de Sheets compartido del proceso (cliente_sheets.py), con la cuenta de servicio de los Secrets."""
     try:
-        creds_info = st.secrets.gcp_service_account 
-        creds = service_account.Credentials.from_service_account_info(
-            dict(creds_info), 
-            scopes=['https://www.googleapis.com/auth/spreadsheets']
+        return cliente_sheets.obtener_cliente(
+            cliente_sheets.info_cuenta_desde_config(config_app()),
+            lecturas_por_minuto=int(leer_config("cuota_lecturas_por_minuto", 60)),
+            escrituras_por_minuto=int(leer_config("cuota_escrituras_por_minuto", 60)),
         )
-        client = gspread.authorize(creds)
-        return client
     except Exception:
-        return None
+        return None # Sin caché del fallo: el siguiente rerun vuelve a intentarlo
 
-gsheet_client = get_gsheet_client()
+def config_app():
+    """Secrets como diccionario (vacío si no hay secrets configurados)."""
+    try:
+        return dict(st.secrets)
+    except Exception:
+        return {}
 
-# --- Funciones de Cálculo y Guardado ---
+@st.cache_resource
+def get_backend():
+    """Backend de resultados y tablas FCR ('sheets' por defecto o 'local', según Secrets)."""
+    return crear_backend(config_app(), get_gsheet_client)
 
-def calcular_metrics(texto_original, texto_escrito, tiempo_tecleo_seg, tiempo_lectura_seg):
-    """Calcula WPM, precisión, RPM y errores."""
-    
-    original_limpio = re.sub(r'\s+', ' ', texto_original.strip())
-    escrito_limpio = re.sub(r'\s+', ' ', texto_escrito.strip())
-    
-    total_palabras_original = len(original_limpio.split())
-    
-    caracteres_correctos = 0
-    caracteres_escritos = len(escrito_limpio)
-    
-    for i in range(min(len(original_limpio), caracteres_escritos)):
-        if original_limpio[i] == escrito_limpio[i]:
-            caracteres_correctos += 1
-            
-    errores_caracter = max(0, caracteres_escritos - caracteres_correctos) 
-    
-    # WPM (Neto: (Caracteres correctos - errores) / 5)
-    if tiempo_tecleo_seg > 0:
-        palabras_netas_tecleo = max(0, (caracteres_correctos - errores_caracter) / 5)
-        wpm = (palabras_netas_tecleo / (tiempo_tecleo_seg / 60))
-        wpm = max(0, round(wpm, 2))
-    else:
-        wpm = 0.00
+# --- Funciones de Cálculo y Guardado ---
 
-    # Precisión
-    if len(original_limpio) > 0 and caracteres_escritos > 0:
-        precision_porcentaje = (caracteres_correctos / len(original_limpio)) * 100
-        precision_porcentaje = max(0, min(100, precision_porcentaje))
-    else:
-        precision_porcentaje = 0.00
-        
-    # RPM (Lectura por Minuto)
-    if tiempo_lectura_seg > 0:
-        rpm = (total_palabras_original / (tiempo_lectura_seg / 60))
-        rpm = round(rpm, 2)
-    else:
-        rpm = 0.00
+@st.cache_resource
+def get_cola_resultados():
+    """Bandeja local + reconciliador hacia el backend, compartidos por todas las sesiones del proceso."""
+    indice = get_indice_ranking()
+    cola = ColaResultados(
+        BandejaSalida(leer_config("bandeja_ruta", "bandeja_resultados.db")),
+        get_backend().agregar_resultados, # Una sola escritura por lote (append_rows en Sheets)
+        tamano_lote=int(leer_config("cola_tamano_lote", 20)),
+        intervalo_seg=float(leer_config("cola_intervalo_seg", 5)),
+        al_sincronizar=indice.registrar_filas, # El ranking se actualiza sin releer la hoja
+    )
+    REGISTRO.registrar_medidor('gincana_cola_pendientes', cola.pendientes)
+    return cola
 
-    return wpm, round(precision_porcentaje, 2), errores_caracter, rpm
+@st.cache_resource
+def get_cola_espejo():
+    """Con backend 'local' y espejo_sheets = true, refleja los resultados a Sheets en segundo plano."""
+    if get_backend().nombre != "local" or not leer_config("espejo_sheets", False):
+        return None
+    espejo = crear_backend({**config_app(), "backend": "sheets"}, get_gsheet_client)
+    return ColaResultados(
+        BandejaSalida(leer_config("bandeja_espejo_ruta", "bandeja_espejo.db")),
+        espejo.agregar_resultados,
+        tamano_lote=int(leer_config("cola_tamano_lote", 20)),
+        intervalo_seg=float(leer_config("cola_intervalo_seg", 5)),
+    )
 
 def save_typing_results(results_dict):
-    """Guarda los resultados de la prueba en la hoja 'Resultados Brutos'."""
-    client = get_gsheet_client()
-    if not client: 
-        st.error("No se pudo guardar: Cliente de Sheets no disponible.")
-        return
-
+    """Guarda los resultados en la bandeja local; se sincronizan con el backend en segundo plano."""
     try:
-        sheet = client.open_by_key(st.secrets["gsheet_id"])
-        results_ws = sheet.worksheet("Resultados Brutos") 
-        
-        row_data = [
-            results_dict['Fecha/Hora'],
-            results_dict['ID Agente'],
-            results_dict['WPM'],
-            results_dict['Precisión (%)'],
-            results_dict['Errores'],
-            results_dict['Duracion Tecleo (s)'],
-            results_dict['Duracion Lectura (s)'],
-            results_dict['RPM'],
-            results_dict['Respuestas Correctas'], 
-            results_dict['Texto Escrito']
-        ]
-        
-        results_ws.append_row(row_data)
-        st.session_state.guardado_exitoso = True
-        
+        st.session_state.ticket_guardado = get_cola_resultados().encolar(results_dict)
+        cola_espejo = get_cola_espejo()
+        if cola_espejo:
+            cola_espejo.encolar(results_dict)
+        if modo_concurso():
+            publicar_resultado(results_dict)
     except Exception as e:
-        st.error(f"❌ ¡ERROR al guardar los resultados! Revisa que la hoja de cálculo exista y el formato de las cabeceras (10 columnas): {e}")
-        st.session_state.guardado_exitoso = False
+        st.error(f"❌ ¡ERROR al guardar los resultados en la bandeja local! Revisa tus Secrets (bandeja_ruta): {e}")
+        st.session_state.ticket_guardado = None
+
+def mensaje_guardado(estado, detalle=""):
+    if estado == GUARDADO:
+        st.success("✅ ¡Tu resultado se ha guardado exitosamente!")
+    elif estado == EN_COLA:
+        st.info("💾 Tu resultado está guardado localmente y se sincronizará en unos segundos. Puedes seguir navegando.")
+    else:
+        st.error(f"❌ ¡ERROR al guardar los resultados! Revisa que la hoja de cálculo exista y el formato de las cabeceras ({len(COLUMNAS_RESULTADOS)} columnas): {detalle}")
+
+@st.fragment(run_every=2)
+def vigilar_guardado(ticket):
+    """Consulta la cola mientras el resultado siga en ella; con el estado final deja de consultar."""
+    estado, detalle = get_cola_resultados().estado(ticket)
+    if estado == EN_COLA:
+        mensaje_guardado(estado)
+        return
+    if estado == GUARDADO:
+        st.session_state.guardado_exitoso = True
+    else:
+        st.session_state.error_guardado = detalle
+    st.rerun() # La app completa muestra el mensaje final, ya sin el fragmento
+
+def mostrar_estado_guardado():
+    """Muestra si el resultado sigue en cola o ya quedó guardado en el backend."""
+    ticket = st.session_state.get('ticket_guardado')
+    if not ticket:
+        st.error("❌ Hubo un error al guardar. Revisa el error anterior.")
+    elif st.session_state.get('guardado_exitoso'):
+        mensaje_guardado(GUARDADO)
+    elif st.session_state.get('error_guardado') is not None:
+        mensaje_guardado(ERROR, st.session_state.error_guardado)
+    else:
+        vigilar_guardado(ticket)
+
+def es_admin():
+    """True si la sesión desbloqueó el modo administrador desde la barra lateral."""
+    return st.session_state.get('es_admin', False)
 
 def reiniciar_test():
     """Resetea todas las variables de estado para un nuevo test."""
+    descartar_checkpoint()
     st.session_state.agente_id = ""
     st.session_state.current_phase = "ID_INPUT"
     st.session_state.start_time = None
@@ -203,12 +222,207 @@ def reiniciar_test():
     st.session_state.saving = False
     st.session_state.texto_escrito = ""
     st.session_state.guardado_exitoso = False
-    st.session_state.comprehension_answers = [None] * len(PREGUNTAS_COMPRENSION)
+    st.session_state.ticket_guardado = None
+    st.session_state.error_guardado = None
+    st.session_state.comprehension_answers = []
     st.session_state.results = None
+    st.session_state.intento_id = None
+    st.session_state.pasaje_anterior = st.session_state.get('pasaje_id') # El próximo intento usa otro texto
+    st.session_state.pasaje_id = None
+    st.session_state.marcador = None
+    st.session_state.telemetria = Telemetria()
+    st.session_state.progresion = Progresion()
+    st.session_state.detector = DetectorAutomatizacion()
     if 'progress_value' in st.session_state: del st.session_state['progress_value'] # Limpia la distracción
     st.rerun() # Fuerza el reinicio de la aplicación
 
 
+# --- ESTADO DEL TEST FUERA DEL PROCESO (Checkpoints para retomar intentos) ---
+
+@st.cache_resource
+def get_almacen_estado():
+    """Almacén de checkpoints de los intentos según Secrets (estado_sesion_backend); None si no se usa."""
+    return crear_almacen_estado(config_app())
+
+def guardar_checkpoint():
+    """Guarda la instantánea del intento en curso; si el almacén falla, el test sigue sin checkpoint."""
+    intento = st.session_state.get('intento_id')
+    if not intento:
+        return
+    try:
+        almacen = get_almacen_estado()
+        if almacen:
+            almacen.guardar(intento, instantanea(st.session_state))
+    except Exception:
+        pass
+
+def descartar_checkpoint():
+    """Borra el checkpoint del intento en curso y lo quita de la URL."""
+    intento = st.session_state.get('intento_id')
+    try:
+        almacen = get_almacen_estado()
+        if almacen and intento:
+            almacen.borrar(intento)
+    except Exception:
+        pass
+    if "intento" in st.query_params:
+        del st.query_params["intento"]
+
+def cambiar_fase(fase):
+    """Transición de la máquina de estados: cambia la fase y guarda el checkpoint del intento."""
+    st.session_state.current_phase = fase
+    guardar_checkpoint()
+
+def retomar_intento():
+    """Restaura el intento de ?intento=<id> desde el almacén (otra réplica o un reinicio). True si se retomó."""
+    intento = st.query_params.get("intento")
+    if not intento:
+        return False
+    try:
+        almacen = get_almacen_estado()
+        datos = almacen.cargar(intento) if almacen else None
+    except Exception:
+        datos = None
+    if not datos:
+        return False
+    restaurar(st.session_state, datos)
+    return True
+
+
+# --- BANCO DE PASAJES (Uno al azar por intento) ---
+
+@st.cache_resource
+def get_banco_pasajes():
+    """Banco de pasajes preparado una vez por proceso (banco_pasajes_ruta o textos.PASAJES)."""
+    return cargar_banco(leer_config("banco_pasajes_ruta"))
+
+def pasaje_actual():
+    """Pasaje del intento en curso."""
+    return get_banco_pasajes().obtener(st.session_state.get('pasaje_id'))
+
+
+# --- CAPTURA DE TECLAS EN EL NAVEGADOR (Lotes comprimidos, no un rerun por tecla) ---
+
+captura_teclas = components.declare_component(
+    "captura_teclas",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "componentes", "captura_teclas"),
+)
+SELECTOR_AREA_TECLEO = 'textarea[aria-label^="Comienza a escribir"]'
+
+
+# --- CRONÓMETROS EN EL NAVEGADOR (Sin reruns por segundo en el servidor) ---
+
+ESTILOS_CRONOMETRO = {
+    "info": ("rgba(28, 131, 225, 0.1)", "#7CC4FA"),
+    "warning": ("rgba(255, 193, 7, 0.12)", "#FFD666"),
+}
+
+def mostrar_cronometro(segundos, plantilla, regresivo=True, mensaje_final="", estilo="info", tamano="1em"):
+    """Dibuja un cronómetro que avanza en el navegador. '{s}' en la plantilla se reemplaza por los segundos."""
+    fondo, color = ESTILOS_CRONOMETRO[estilo]
+    components.html(f"""
+    <div id="crono" style="font-family: 'Roboto', sans-serif; font-size: {tamano}; color: {color};
+         background-color: {fondo}; padding: 12px 16px; border-radius: 8px;"></div>
+    <script>
+        const inicio = Date.now();
+        const base = {max(0.0, segundos):.3f};
+        const regresivo = {json.dumps(regresivo)};
+        const plantilla = {json.dumps(plantilla)};
+        const mensajeFinal = {json.dumps(mensaje_final)};
+        const crono = document.getElementById("crono");
+        function pintar() {{
+            const transcurrido = (Date.now() - inicio) / 1000;
+            const valor = regresivo ? Math.ceil(base - transcurrido) : Math.floor(base + transcurrido);
+            if (regresivo && valor <= 0 && mensajeFinal) {{
+                crono.innerHTML = mensajeFinal;
+                return;
+            }}
+            crono.innerHTML = plantilla.replace("{{s}}", Math.max(0, valor));
+        }}
+        pintar();
+        setInterval(pintar, 250);
+    </script>
+    """, height=70 if tamano == "1em" else 90)
+
+@st.fragment(run_every=0.5)
+@cronometrado('gincana_rerun_segundos', fase='COUNTDOWN (fragmento)')
+def vigilar_cuenta_regresiva():
+    """Fragmento aislado: solo re-ejecuta la app completa cuando termina la cuenta regresiva."""
+    if st.session_state.current_phase != "COUNTDOWN":
+        return
+    if time.time() - st.session_state.countdown_start >= st.session_state.countdown_target:
+        # Finaliza la cuenta, inicia el cronómetro de lectura y pasa a la fase activa
+        st.session_state.start_time = time.time() # INICIO DEL CRONÓMETRO DE LECTURA
+        cambiar_fase("READING_ACTIVE")
+        st.rerun()
+
+@st.fragment(run_every=1)
+@cronometrado('gincana_rerun_segundos', fase='TYPING (fragmento)')
+def zona_de_tecleo():
+    """Fragmento aislado de la fase de tecleo: distracción, área de texto, marcador en vivo y fin del tiempo."""
+    if st.session_state.current_phase != "TYPING":
+        return
+    tiempo_restante = DURACION_SEGUNDOS - (time.time() - st.session_state.start_time)
+
+    # --- DISTRACCIÓN (BARRA DE PROGRESO "GUSANITO") ---
+    if 'progress_value' not in st.session_state:
+        st.session_state.progress_value = 0.05
+    
+    # Modifica el valor en cada ciclo para que parezca que "se mueve" y nunca llega a 100% o 0%
+    st.session_state.progress_value = (st.session_state.progress_value + 0.01) % 0.9 + 0.05
+    st.progress(st.session_state.progress_value, text="**🚨 Atención:** Proceso interno en ejecución... ¡Concéntrate! 🚨")
+    st.markdown("---")
+    # ----------------------------------------------------
+
+    indicadores_en_vivo = st.empty() # Se completa cuando ya se leyó el texto de este tick
+
+    texto_escrito = st.text_area("Comienza a escribir aquí... (No se permite Copiar/Pegar) 👇", 
+                                 height=200, 
+                                 key="typing_area", 
+                                 value=st.session_state.texto_escrito,
+                                 disabled=tiempo_restante <= 0)
+    
+    st.session_state.texto_escrito = texto_escrito # Mantiene el valor actualizado para la visualización
+
+    # Telemetría: el componente reenvía lo que no se le confirmó (acuse); lo repetido se ignora
+    lote = captura_teclas(
+        selector=SELECTOR_AREA_TECLEO,
+        restante_ms=int(max(0, tiempo_restante) * 1000), # El navegador envía lo pendiente antes del fin
+        acuse=st.session_state.telemetria.acuse(),
+        key=f"captura_teclas_{st.session_state.intento_id}",
+        default=None
+    )
+    if lote:
+        telemetria = st.session_state.telemetria
+        for delta, codigo in telemetria.agregar_lote(lote['origen'], lote['desde'], lote['lote']):
+            st.session_state.detector.procesar(delta, codigo)
+        if telemetria.incompleta:
+            st.session_state.detector.telemetria_incompleta = True
+    st.session_state.detector.observar_texto(len(texto_escrito))
+
+    # WPM y precisión en vivo: el marcador solo procesa lo escrito desde el tick anterior
+    pasaje = pasaje_actual()
+    marcador = st.session_state.get('marcador')
+    if marcador is None or marcador.original != pasaje.normalizado:
+        marcador = st.session_state.marcador = MarcadorIncremental.desde_pasaje(pasaje)
+    marcador.actualizar(texto_escrito)
+    transcurrido = min(time.time() - st.session_state.start_time, DURACION_SEGUNDOS)
+    wpm, precision, _, _ = marcador.metricas(transcurrido)
+    # Una instantánea por segundo para la curva de WPM (solo se guarda lo que cambió)
+    st.session_state.progresion.registrar(transcurrido * 1000, texto_escrito)
+    with indicadores_en_vivo.container():
+        col_wpm, col_precision = st.columns(2)
+        col_wpm.metric("⚡ WPM en vivo", f"{wpm:.0f}")
+        col_precision.metric("🎯 Precisión en vivo", f"{precision:.1f}%")
+
+    # Fin del tiempo: única re-ejecución completa de la app en esta fase
+    if tiempo_restante <= 0:
+        st.session_state.typing_time = DURACION_SEGUNDOS 
+        st.session_state.progresion.registrar(DURACION_SEGUNDOS * 1000, texto_escrito, forzar=True)
+        cambiar_fase("COMPREHENSION")
+        st.rerun()
+
+
 # --- MÓDULOS DE NAVEGACIÓN (FLUJO PRINCIPAL) ---
 
 def show_typing_game():
@@ -220,21 +434,11 @@ def show_typing_game():
     # FASE 0: CUENTA REGRESIVA
     # ----------------------------------------
     if st.session_state.current_phase == "COUNTDOWN":
-        placeholder = st.empty()
-        
-        tiempo_transcurrido = time.time() - st.session_state.countdown_start
-        tiempo_restante = st.session_state.countdown_target - int(tiempo_transcurrido)
+        tiempo_restante = st.session_state.countdown_target - (time.time() - st.session_state.countdown_start)
         
-        if tiempo_restante > 0:
-            placeholder.markdown(f"## 🛑 Prepárate para Leer... **{tiempo_restante}**", unsafe_allow_html=True)
-            time.sleep(1)
-            st.rerun()
-        else:
-            # Finaliza la cuenta, inicia el cronómetro de lectura y pasa a la fase activa
-            st.session_state.current_phase = "READING_ACTIVE"
-            st.session_state.start_time = time.time() # INICIO DEL CRONÓMETRO DE LECTURA
-            st.session_state.update_count = 0 # Contador para el refresco del cronómetro
-            st.rerun()
+        # El número lo pinta el navegador; el servidor solo vigila el fin de la cuenta
+        mostrar_cronometro(tiempo_restante, "🛑 Prepárate para Leer... <b>{s}</b>", regresivo=True, tamano="2em")
+        vigilar_cuenta_regresiva()
 
 
     # ----------------------------------------
@@ -244,14 +448,21 @@ def show_typing_game():
         st.session_state.agente_id = st.text_input("Ingresa tu ID de Agente:", key="agente_id_input")
         
         st.subheader("📚 Paso 1: Información Importante")
-        st.info("ℹ️ **Antes de comenzar:** Esta prueba tiene 3 partes. Primero, leerás un texto. El tiempo de lectura (**RPM**) influye en tu resultado. Luego, tendrás 60 segundos para teclear y, finalmente, responderás 3 preguntas de comprensión.")
+        st.info(f"ℹ️ **Antes de comenzar:** Esta prueba tiene 3 partes. Primero, leerás un texto. El tiempo de lectura (**RPM**) influye en tu resultado. Luego, tendrás {DURACION_SEGUNDOS} segundos para teclear y, finalmente, responderás 3 preguntas de comprensión.")
 
         if st.button("▶️ Comenzar el Test (Iniciar Cuenta Regresiva)"): 
             if st.session_state.agente_id:
                 # SALTA DIRECTO A COUNTDOWN
-                st.session_state.current_phase = "COUNTDOWN" 
                 st.session_state.countdown_start = time.time()
-                st.session_state.countdown_target = 5 
+                st.session_state.intento_id = uuid.uuid4().hex
+                st.session_state.pasaje_id = get_banco_pasajes().elegir(excluir=st.session_state.get('pasaje_anterior')).id
+                st.session_state.telemetria = Telemetria()
+                st.session_state.progresion = Progresion()
+                st.session_state.detector = DetectorAutomatizacion()
+                st.session_state.countdown_target = CUENTA_REGRESIVA_SEGUNDOS
+                cambiar_fase("COUNTDOWN")
+                if get_almacen_estado():
+                    st.query_params["intento"] = st.session_state.intento_id # Recargar la página retoma el intento
                 st.rerun()
             else:
                 st.warning("Por favor, ingresa tu ID de Agente para iniciar.")
@@ -264,20 +475,11 @@ def show_typing_game():
         st.info("📢 **IMPORTANTE:** Cuando termines de leer y creas haber entendido el texto, presiona el botón para detener el cronómetro y pasar a la prueba de tecleo.")
         
         # Muestra el texto legible
-        st.markdown(f'<div class="typing-text">{TEXTO_PRUEBA_GINCANA}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="typing-text">{pasaje_actual().texto}</div>', unsafe_allow_html=True)
 
-        tiempo_placeholder = st.empty()
-        
-        # CRONÓMETRO DE LECTURA DE BAJA FRECUENCIA (Para no bloquear el botón)
+        # CRONÓMETRO DE LECTURA EN EL NAVEGADOR (No genera reruns ni bloquea el botón)
         tiempo_transcurrido = time.time() - st.session_state.start_time
-        tiempo_placeholder.info(f"⏰ Tiempo de lectura transcurrido: **{int(tiempo_transcurrido)}** segundos.")
-        
-        # Pequeño bucle que solo se ejecuta unas pocas veces para dar feedback inicial sin ser intrusivo
-        if st.session_state.update_count < 15: # Refresca por ~7.5 segundos (15 * 0.5s)
-            st.session_state.update_count += 1
-            time.sleep(0.5)
-            st.rerun()
-
+        mostrar_cronometro(tiempo_transcurrido, "⏰ Tiempo de lectura transcurrido: <b>{s}</b> segundos.", regresivo=False)
 
         if st.button("Terminé de leer y Continuar a la Prueba de Tecleo ➡️"):
             # Captura el tiempo final al presionar
@@ -286,8 +488,8 @@ def show_typing_game():
             else:
                  st.session_state.reading_time = 0 
                  
-            st.session_state.current_phase = "TYPING"
             st.session_state.start_time = time.time() # Reinicia el cronómetro para el tecleo
+            cambiar_fase("TYPING")
             st.snow()
             st.rerun()
 
@@ -301,85 +503,36 @@ def show_typing_game():
         tiempo_restante = DURACION_SEGUNDOS - tiempo_transcurrido
         
         st.subheader(f"📝 Paso 2: ¡Teclea ahora, {st.session_state.agente_id}!")
-        timer_placeholder = st.empty()
-        
-        # --- DISTRACCIÓN (BARRA DE PROGRESO "GUSANITO") ---
-        if 'progress_value' not in st.session_state:
-            st.session_state.progress_value = 0.05
         
-        # Modifica el valor en cada ciclo para que parezca que "se mueve" y nunca llega a 100% o 0%
-        st.session_state.progress_value = (st.session_state.progress_value + 0.01) % 0.9 + 0.05
-        st.progress(st.session_state.progress_value, text="**🚨 Atención:** Proceso interno en ejecución... ¡Concéntrate! 🚨")
-        st.markdown("---")
-        # ----------------------------------------------------
-        
-        if tiempo_restante > 0:
-            timer_placeholder.warning(f"⏳ Tiempo restante: **{int(tiempo_restante)}** segundos.")
-        else:
-            timer_placeholder.error("🚨 ¡TIEMPO AGOTADO! Tu tecleo ha terminado. Presiona Continuar.")
+        # Cuenta regresiva en el navegador; el fin real del tiempo lo decide el servidor
+        mostrar_cronometro(
+            tiempo_restante,
+            "⏳ Tiempo restante: <b>{s}</b> segundos.",
+            regresivo=True,
+            mensaje_final="🚨 ¡TIEMPO AGOTADO! Tu tecleo ha terminado.",
+            estilo="warning"
+        )
 
-        st.markdown(f'<div class="typing-text">{TEXTO_PRUEBA_GINCANA}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="typing-text">{pasaje_actual().texto}</div>', unsafe_allow_html=True)
         
-        # --- RESTRICCIÓN DE PEGADO CON JAVASCRIPT ---
-        js_code = """
-        <script>
-            function disablePasteAndContextMenu() {
-                // Selecciona el área de texto por su data-testid
-                const textarea = document.querySelector('[data-testid="stTextarea"] textarea');
-                if (textarea) {
-                    // Deshabilitar la acción de Pegar (Ctrl+V / Cmd+V), Copiar, Cortar
-                    textarea.onkeydown = (event) => {
-                        const isCtrlOrCmd = event.ctrlKey || event.metaKey;
-                        const key = event.key.toLowerCase();
-                        
-                        // Bloquea Pegar (v), Copiar (c), y Cortar (x)
-                        if (isCtrlOrCmd && (key === 'v' || key === 'c' || key === 'x')) {
-                            event.preventDefault();
-                        }
-                    };
-                    // Deshabilitar el menú contextual (clic derecho)
-                    textarea.oncontextmenu = (event) => {
-                        event.preventDefault();
-                    };
-                }
-            }
-            // Ejecutar la función después de un pequeño retraso para asegurar que el DOM cargue
-            setTimeout(disablePasteAndContextMenu, 1000);
-        </script>
-        """
-        st.markdown(js_code, unsafe_allow_html=True)
-        # ---------------------------------------------
-
-        texto_escrito = st.text_area("Comienza a escribir aquí... (No se permite Copiar/Pegar) 👇", 
-                                     height=200, 
-                                     key="typing_area", 
-                                     value=st.session_state.texto_escrito,
-                                     disabled=tiempo_restante <= 0)
-        
-        st.session_state.texto_escrito = texto_escrito # Mantiene el valor actualizado para la visualización
-
-        # Bucle de refresco del cronómetro de tecleo y distracción
-        if tiempo_restante > 0 and tiempo_restante <= DURACION_SEGUNDOS:
-            time.sleep(1)
-            st.rerun() 
+        # La restricción de pegado/copiado vive en el componente de captura de teclas
+        # (los <script> dentro de st.markdown no se ejecutan)
 
-        if tiempo_restante <= 0 and 'typing_finished' not in st.session_state:
-            st.session_state.typing_time = DURACION_SEGUNDOS 
-            st.session_state.typing_finished = True
-            st.rerun()
+        zona_de_tecleo()
             
         # El botón de finalización ahora es más claro
-        if st.session_state.get('typing_finished', False) or st.button("✅ Terminé de Teclear y Continuar (Para usuarios rápidos)"): 
+        if st.button("✅ Terminé de Teclear y Continuar (Para usuarios rápidos)"): 
             
             # SOLUCIÓN: CAPTURAR EL VALOR FINAL DEL TEXT AREA POR SU KEY ANTES DE LA TRANSICIÓN
             if 'typing_area' in st.session_state:
                  st.session_state.texto_escrito = st.session_state.typing_area
+            st.session_state.detector.observar_texto(len(st.session_state.texto_escrito))
             
-            if not st.session_state.get('typing_finished', False):
-                st.session_state.typing_time = time.time() - st.session_state.start_time
-                
-            st.session_state.current_phase = "COMPREHENSION"
-            if 'typing_finished' in st.session_state: del st.session_state['typing_finished'] 
+            st.session_state.typing_time = min(time.time() - st.session_state.start_time, DURACION_SEGUNDOS)
+            st.session_state.progresion.registrar(
+                st.session_state.typing_time * 1000, st.session_state.texto_escrito, forzar=True
+            )
+            cambiar_fase("COMPREHENSION")
             st.rerun()
 
 
@@ -390,10 +543,11 @@ def show_typing_game():
         st.subheader("🧠 Paso 3: Preguntas de Comprensión")
         st.info("Responde las siguientes preguntas basadas *únicamente* en el texto que leíste al inicio.")
 
-        if 'comprehension_answers' not in st.session_state:
-            st.session_state.comprehension_answers = [None] * len(PREGUNTAS_COMPRENSION)
+        preguntas = pasaje_actual().preguntas
+        if len(st.session_state.get('comprehension_answers') or []) != len(preguntas):
+            st.session_state.comprehension_answers = [None] * len(preguntas)
 
-        for i, item in enumerate(PREGUNTAS_COMPRENSION):
+        for i, item in enumerate(preguntas):
             selected_answer = st.radio(
                 f"**Pregunta {i+1}:** {item['pregunta']}",
                 item['opciones'],
@@ -402,7 +556,7 @@ def show_typing_game():
             st.session_state.comprehension_answers[i] = selected_answer
 
         if st.button("Finalizar Test y Ver Resultados ➡️"):
-            st.session_state.current_phase = "RESULTS"
+            cambiar_fase("RESULTS")
             st.balloons()
             st.rerun()
 
@@ -410,16 +564,20 @@ def show_typing_game():
     # FASE 5: RESULTADOS Y GUARDADO
     # ----------------------------------------
     elif st.session_state.current_phase == "RESULTS":
-        
-        wpm, precision, errores, rpm = calcular_metrics(
-            TEXTO_PRUEBA_GINCANA, 
+        import pandas as pd
+
+        pasaje = pasaje_actual()
+        (wpm, precision, errores, rpm), alineacion = puntuar_pasaje(
+            pasaje, 
             st.session_state.texto_escrito, 
             st.session_state.typing_time,
             st.session_state.reading_time
         )
         
+        telemetria = st.session_state.telemetria.metricas()
+
         respuestas_correctas = 0
-        for i, item in enumerate(PREGUNTAS_COMPRENSION):
+        for i, item in enumerate(pasaje.preguntas):
             if st.session_state.comprehension_answers[i] == item["respuesta_correcta"]:
                 respuestas_correctas += 1
 
@@ -433,7 +591,13 @@ def show_typing_game():
             'Duracion Lectura (s)': round(st.session_state.reading_time, 2),
             'RPM': rpm,
             'Respuestas Correctas': respuestas_correctas,
-            'Texto Escrito': st.session_state.texto_escrito
+            'Texto Escrito': st.session_state.texto_escrito,
+            'Borrados': telemetria['borrados'],
+            'Telemetria': st.session_state.telemetria.codificar(),
+            'Alertas': ",".join(st.session_state.detector.alertas()),
+            'ID Texto': pasaje.id,
+            'Progresion': st.session_state.progresion.codificar(),
+            'ID Intento': st.session_state.intento_id, # Solo para la clave de idempotencia de la cola
         }
         
         st.subheader("📊 Tus Resultados Finales")
@@ -442,22 +606,55 @@ def show_typing_game():
         col1.metric("Velocidad (WPM)", f"{st.session_state.results['WPM']:.2f}")
         col2.metric("Lectura (RPM)", f"{st.session_state.results['RPM']:.2f}")
         col3.metric("Precisión", f"{st.session_state.results['Precisión (%)']:.2f}%")
-        col4.metric("Comprensión", f"{st.session_state.results['Respuestas Correctas']}/{len(PREGUNTAS_COMPRENSION)}")
+        col4.metric("Comprensión", f"{st.session_state.results['Respuestas Correctas']}/{len(pasaje.preguntas)}")
         
         st.markdown("---")
         
-        st.info("⚠️ Las métricas de 'borrado' no están disponibles en Streamlit nativo. Se utiliza WPM Neto y Errores de Carácter.")
+        if es_admin() and st.session_state.results['Alertas']:
+            st.warning(f"🕵️ Alertas de integridad: {st.session_state.results['Alertas']}")
+
+        st.subheader("⌨️ Tu Forma de Teclear")
+        if telemetria['teclas'] > 0:
+            col_b, col_r, col_l = st.columns(3)
+            col_b.metric("Borrados", telemetria['borrados'])
+            col_r.metric("Ráfaga Máxima (WPM en 5 s)", f"{telemetria['rafaga_wpm']:.0f}")
+            col_l.metric("Latencia Media entre Teclas", f"{telemetria['latencia_media_ms']:.0f} ms")
+            st.bar_chart(pd.Series(telemetria['histograma'], name="Pulsaciones"))
+        else:
+            st.info("⚠️ No se recibieron datos de teclado de tu navegador. Se utiliza WPM Neto y Errores de Carácter.")
+
+        curva = curva_wpm(st.session_state.progresion, MarcadorIncremental.desde_pasaje(pasaje))
+        if len(curva) > 1:
+            st.subheader("📈 Tu Velocidad Segundo a Segundo")
+            st.line_chart(
+                pd.DataFrame(
+                    [(segundo, acumulado, tramo) for segundo, acumulado, tramo, _ in curva],
+                    columns=['Segundo', 'WPM acumulado', 'WPM del momento (5 s)'],
+                ).set_index('Segundo')
+            )
+
+        with st.expander("🔍 Detalle de errores"):
+            col_s, col_o, col_i = st.columns(3)
+            col_s.metric("Sustituciones", alineacion.sustituciones)
+            col_o.metric("Omisiones", alineacion.omisiones)
+            col_i.metric("Caracteres de más", alineacion.inserciones)
+            if alineacion.errores_por_palabra:
+                st.dataframe(
+                    pd.DataFrame(alineacion.errores_por_palabra, columns=['Palabra', 'Errores']),
+                    hide_index=True
+                )
+            else:
+                st.success("¡Sin errores en las palabras que alcanzaste a teclear!")
 
         if not st.session_state.saving:
-            if st.button("💾 Guardar Resultados en Google Sheets"):
+            if st.button("💾 Guardar Resultados"):
                 st.session_state.saving = True
                 save_typing_results(st.session_state.results)
+                guardar_checkpoint() # Al retomar no se vuelve a ofrecer el guardado
                 st.rerun()
 
-        if st.session_state.guardado_exitoso:
-            st.success("✅ ¡Tu resultado se ha guardado exitosamente!")
-        elif st.session_state.saving and not st.session_state.guardado_exitoso:
-            st.error("❌ Hubo un error al guardar. Revisa el error anterior.")
+        if st.session_state.saving:
+            mostrar_estado_guardado()
 
         # Botón de nueva prueba en la sección de resultados
         if st.button("🔁 Iniciar Nueva Prueba (desde Resultados)"):
@@ -465,49 +662,202 @@ def show_typing_game():
             st.rerun()
 
 
+# --- LECTURA DE TABLAS FCR (Caché local sobre el backend) ---
+
+OBJETIVO_LATENCIA_FCR_MS = 1500 # Objetivo de carga de los 4 turnos para el TOP 10 global
+
+@st.cache_resource
+def get_cache_fcr():
+    """Copia local en Parquet de las pestañas FCR; solo se descarga si la hoja cambió."""
+    backend = get_backend()
+    cache = CacheFCR(
+        leer_config("cache_fcr_dir", ".cache_fcr"),
+        backend.leer_tablas_fcr, # Una apertura y un batch_get para todas las pestañas
+        backend.fecha_modificacion_fcr,
+        intervalo_chequeo_seg=float(leer_config("cache_fcr_chequeo_seg", 60)),
+    )
+    REGISTRO.registrar_medidor(
+        'gincana_cache_tasa_aciertos',
+        lambda: cache.lecturas_locales / max(1, cache.lecturas_locales + cache.descargas),
+        cache='fcr',
+    )
+    return cache
+
+
 # --- MÓDULOS DE RANKING ---
 
+@st.cache_resource
+def get_indice_ranking():
+    """Índice incremental del ranking de velocidad, compartido por todas las sesiones."""
+    return IndiceRanking()
+
+def sincronizar_ranking_velocidad():
+    """Lee solo las filas nuevas (y solo las columnas del ranking) desde la última leída y actualiza el índice.
+
+    Lo archivado entra por 'Resumen Agentes' (ver archivado.py), no por la hoja.
+    """
+    backend = get_backend()
+    indice = get_indice_ranking()
+    indice.sincronizar(backend.leer_ranking, leer_base=lambda: leer_base_ranking(backend))
+    return indice
+
+@st.cache_resource
+def get_archivo():
+    """Particiones mensuales de los resultados archivados (Parquet local o pestañas 'Archivo AAAA-MM')."""
+    return crear_archivo(config_app(), get_backend())
+
+COLUMNAS_HISTORIAL = COLUMNAS_RESULTADOS[:COLUMNAS_RESULTADOS.index('Respuestas Correctas') + 1]
+
+def historial_agente(agente):
+    """Intentos del agente en el archivo y en 'Resultados Brutos', del más antiguo al más nuevo."""
+    import pandas as pd
+
+    archivadas = get_archivo().consultar(agente, COLUMNAS_HISTORIAL)
+    recientes = [
+        fila[:len(COLUMNAS_HISTORIAL)]
+        for fila in get_backend().leer_resultados_agente(agente, columnas=len(COLUMNAS_HISTORIAL))
+    ]
+    filas = [list(fila) + [''] * (len(COLUMNAS_HISTORIAL) - len(fila)) for fila in archivadas + recientes]
+    return pd.DataFrame(filas, columns=COLUMNAS_HISTORIAL)
+
+# --- MODO CONCURSO (ranking en vivo) ---
+
+def modo_concurso():
+    return bool(leer_config("modo_concurso", False))
+
+@st.cache_resource
+def get_hub_eventos():
+    """Hub de eventos del concurso (en memoria, o Redis con concurso_redis_url). Cada evento actualiza el índice."""
+    hub = crear_hub(config_app())
+    indice = get_indice_ranking()
+    hub.suscribir(lambda evento: indice.registrar(
+        evento['ID Agente'], a_numero(evento['WPM']), a_numero(evento['Precisión (%)']), evento['Fecha/Hora']
+    ))
+    return hub
+
+def publicar_resultado(results_dict):
+    """Publica un resultado recién terminado; el guardado no depende de que el hub responda."""
+    evento = {columna: results_dict.get(columna) for columna in ('Fecha/Hora', 'ID Agente', 'WPM', 'Precisión (%)')}
+    try:
+        get_hub_eventos().publicar(evento)
+    except Exception:
+        pass # El resultado igual llega al ranking cuando la cola lo sincroniza
+
+SEGUNDOS_DESTACADO = 10 # Cuánto se marca como nueva una fila que acaba de cambiar
+
+@st.fragment(run_every=float(leer_config("concurso_refresco_seg", 0.5)))
+def tablero_en_vivo(max_filas):
+    """Ranking del concurso: solo aplica los eventos nuevos del hub y no lee Sheets."""
+    import pandas as pd
+
+    hub = get_hub_eventos()
+    indice = get_indice_ranking()
+    version = st.session_state.get('tablero_version')
+    filas = st.session_state.get('tablero_filas')
+    destacados = st.session_state.setdefault('tablero_destacados', {}) # ID Agente -> monotonic del cambio
+
+    eventos, version_actual = hub.eventos_desde(version) if version is not None else (None, hub.version)
+    if filas is None or eventos is None:
+        filas = indice.top(max_filas) # Primera vista o eventos perdidos: se toma el TOP completo
+    elif eventos:
+        ahora = time.monotonic()
+        en_tabla = {fila['ID Agente'] for fila in filas}
+        minimo = filas[-1]['WPM'] if len(filas) >= max_filas else float('-inf')
+        for evento in eventos:
+            destacados[str(evento['ID Agente'])] = ahora
+        # Solo se recalcula si algún evento toca una fila visible o entra al TOP
+        if any(str(e['ID Agente']) in en_tabla or (a_numero(e['WPM']) or 0) >= minimo for e in eventos):
+            filas = indice.top(max_filas)
+    st.session_state.tablero_version = version_actual
+    st.session_state.tablero_filas = filas
+
+    if not filas:
+        st.info("Aún no hay resultados de la gincana para mostrar.")
+        return
+    limite = time.monotonic() - SEGUNDOS_DESTACADO
+    for agente in [a for a, cambio in destacados.items() if cambio <= limite]:
+        del destacados[agente]
+    tabla = pd.DataFrame(filas)
+    tabla.insert(0, '', ['🔥' if destacados.get(fila['ID Agente'], limite) > limite else '' for fila in filas])
+    st.caption(f"🔴 En vivo · {datetime.now().strftime('%H:%M:%S')} · {len(indice)} agentes")
+    st.dataframe(tabla, hide_index=True)
+
+@st.cache_resource
+def get_cache_ranking():
+    """Controla cada cuánto se buscan filas nuevas para el ranking (TTL configurable)."""
+    cache = CacheInstantanea(sincronizar_ranking_velocidad, ttl_seg=float(leer_config("ranking_ttl_seg", 30)))
+    REGISTRO.registrar_medidor(
+        'gincana_cache_tasa_aciertos', lambda: cache.estadisticas()['tasa_aciertos'], cache='ranking'
+    )
+    return cache
+
 def show_typing_ranking():
     """Módulo: Ranking de la Prueba de Velocidad."""
+    import pandas as pd
+
     st.header("🏆 Ranking de Velocidad (WPM)")
     st.markdown("---")
     
-    client = get_gsheet_client()
-    if not client:
+    cache = get_cache_ranking()
+    try:
+        indice = cache.obtener()
+    except ConnectionError:
         st.error("No se pudo conectar a Google Sheets para el ranking.")
         return
+    except Exception as e:
+        st.error(f"❌ Error al generar el ranking: {e}. ¿Están las columnas correctas en 'Resultados Brutos'?")
+        return
 
-    try:
-        sheet = client.open_by_key(st.secrets["gsheet_id"]) 
-        results_ws = sheet.worksheet("Resultados Brutos")
-        
-        data = results_ws.get_all_records()
-        df = pd.DataFrame(data)
-
-        if df.empty:
-            st.info("Aún no hay resultados de la gincana para mostrar.")
-            return
+    if es_admin():
+        stats = cache.estadisticas()
+        edad = "sin datos" if stats['edad_seg'] is None else f"{stats['edad_seg']:.0f}s"
+        st.caption(
+            f"🗄️ Caché del ranking: edad {edad} · TTL {cache.ttl_seg:.0f}s · "
+            f"aciertos {stats['aciertos']} · fallos {stats['fallos']} · tasa {stats['tasa_aciertos']:.0%} · "
+            f"filas indexadas {indice.filas_leidas} · agentes {len(indice)}"
+        )
 
-        df['WPM'] = pd.to_numeric(df['WPM'], errors='coerce')
-        idx = df.groupby(['ID Agente'])['WPM'].transform(max) == df['WPM']
-        ranking_consolidado = df[idx].sort_values(by='WPM', ascending=False)
-        
-        st.subheader("Mejores Resultados Históricos")
-        st.dataframe(ranking_consolidado[['ID Agente', 'WPM', 'Precisión (%)', 'Fecha/Hora']], hide_index=True)
+    if len(indice) == 0 and not modo_concurso(): # En modo concurso el tablero espera los primeros resultados
+        st.info("Aún no hay resultados de la gincana para mostrar.")
+        return
+    
+    st.subheader("Mejores Resultados Históricos")
+    max_filas = int(leer_config("ranking_max_filas", 100))
+    if modo_concurso():
+        tablero_en_vivo(max_filas)
+    else:
+        st.dataframe(pd.DataFrame(indice.top(max_filas)), hide_index=True)
 
-        st.markdown("---")
-        st.subheader("TOP 3")
-        
-        top3 = ranking_consolidado.head(3).reset_index(drop=True)
-        if not top3.empty:
-            st.metric("🥇 Primer Lugar", f"{top3.loc[0, 'ID Agente']}", f"{top3.loc[0, 'WPM']} WPM")
-        if len(top3) > 1:
-            st.metric("🥈 Segundo Lugar", f"{top3.loc[1, 'ID Agente']}", f"{top3.loc[1, 'WPM']} WPM")
-        if len(top3) > 2:
-            st.metric("🥉 Tercer Lugar", f"{top3.loc[2, 'ID Agente']}", f"{top3.loc[2, 'WPM']} WPM")
+    agente_buscado = st.text_input("🔎 Consulta tu posición (ID Agente):", key="ranking_busqueda")
+    if agente_buscado:
+        posicion = indice.posicion(agente_buscado)
+        if posicion is None:
+            st.warning(f"No hay resultados registrados para '{agente_buscado}'.")
+        else:
+            st.info(f"**{agente_buscado}** está en la posición **#{posicion}** de {len(indice)} (percentil {indice.percentil(agente_buscado):.1f}).")
+
+    if es_admin():
+        with st.expander("🗄️ Historial de un agente (incluye el archivo)"):
+            agente_historial = st.text_input("ID Agente:", key="historial_agente")
+            if agente_historial:
+                try:
+                    historial = historial_agente(agente_historial)
+                except Exception as e:
+                    st.error(f"❌ No se pudo leer el historial: {e}")
+                else:
+                    st.caption(f"{len(historial)} intentos")
+                    st.dataframe(historial, hide_index=True)
 
-    except Exception as e:
-        st.error(f"❌ Error al generar el ranking: {e}. ¿Están las columnas correctas en 'Resultados Brutos'?")
+    st.markdown("---")
+    st.subheader("TOP 3")
+    
+    top3 = indice.top(3)
+    if len(top3) > 0:
+        st.metric("🥇 Primer Lugar", f"{top3[0]['ID Agente']}", f"{top3[0]['WPM']} WPM")
+    if len(top3) > 1:
+        st.metric("🥈 Segundo Lugar", f"{top3[1]['ID Agente']}", f"{top3[1]['WPM']} WPM")
+    if len(top3) > 2:
+        st.metric("🥉 Tercer Lugar", f"{top3[2]['ID Agente']}", f"{top3[2]['WPM']} WPM")
 
 
 def show_fcr_ranking(worksheet_name):
@@ -515,24 +865,15 @@ def show_fcr_ranking(worksheet_name):
     st.header(f"📈 Ranking FCR Semanal: {worksheet_name.replace('Ranking FCR Semanal - ', '')}")
     st.markdown("---")
     
-    client = get_gsheet_client()
-    if not client:
-        st.error("❌ No se pudo conectar a Google Sheets. Revisa tu configuración de Secrets.")
-        return
-
     try:
-        sheet = client.open_by_key(st.secrets["gsheet_id"]) 
-        results_ws = sheet.worksheet(worksheet_name)
-        
-        data = results_ws.get_all_records()
-        df = pd.DataFrame(data)
+        df = get_cache_fcr().obtener([worksheet_name])[worksheet_name]
+        if isinstance(df, Exception):
+            raise df
 
         if df.empty:
             st.info(f"📊 Aún no hay datos en la pestaña '{worksheet_name}'.")
             return
 
-        df['% +'] = df['% +'].astype(str).str.replace('%', '').str.replace(',', '.').astype(float)
-        
         df = df.sort_values(by='Ranking', ascending=True).reset_index(drop=True)
 
         st.subheader("🏆 TOP 3 Semanal")
@@ -570,7 +911,9 @@ def show_fcr_ranking(worksheet_name):
             hide_index=True
         )
 
-    except gspread.WorksheetNotFound:
+    except ConnectionError:
+        st.error("❌ No se pudo conectar a Google Sheets. Revisa tu configuración de Secrets.")
+    except HojaNoEncontrada:
         st.error(f"❌ La hoja de cálculo NO tiene una pestaña llamada '{worksheet_name}'.")
     except Exception as e:
         st.error(f"❌ Error al generar el Ranking FCR. ¿Están las columnas correctas?: {e}")
@@ -578,15 +921,9 @@ def show_fcr_ranking(worksheet_name):
 
 def show_fcr_global_ranking():
     """Consolida datos de todos los turnos, calcula el TOP 10 global y muestra las métricas."""
-    
     st.header("👑 TOP 10 Global FCR/CSAT") 
     st.markdown("---")
     
-    client = get_gsheet_client()
-    if not client:
-        st.error("❌ No se pudo conectar a Google Sheets para el ranking global.")
-        return
-
     fcr_sheets = {
         "PM": "Ranking FCR Semanal - PM",
         "AM": "Ranking FCR Semanal - AM",
@@ -594,43 +931,47 @@ def show_fcr_global_ranking():
         "NT2": "Ranking FCR Semanal - NT2",
     }
     
-    all_data = []
+    inicio = time.perf_counter()
+    try:
+        tablas = get_cache_fcr().obtener(list(fcr_sheets.values()))
+    except ConnectionError:
+        st.error("❌ No se pudo conectar a Google Sheets para el ranking global.")
+        return
+    except Exception as e:
+        st.error(f"❌ Error al abrir la hoja de cálculo para el ranking global: {e}")
+        return
+    latencia_ms = (time.perf_counter() - inicio) * 1000
+
+    tablas_por_turno = {}
     
     for turno_key, sheet_name in fcr_sheets.items():
-        try:
-            sheet = client.open_by_key(st.secrets["gsheet_id"])
-            results_ws = sheet.worksheet(sheet_name)
-            
-            df_turno = pd.DataFrame(results_ws.get_all_records())
-            
-            if 'Total P+N' in df_turno.columns:
-                df_turno['Total P+N'] = pd.to_numeric(df_turno['Total P+N'], errors='coerce').fillna(0)
-            
-            if '% +' in df_turno.columns:
-                df_turno['% +'] = df_turno['% +'].astype(str).str.replace('%', '').str.replace(',', '.').astype(float)
-                
-            df_turno['Turno'] = turno_key
-            all_data.append(df_turno)
-            
-        except gspread.WorksheetNotFound:
+        resultado = tablas[sheet_name]
+        if isinstance(resultado, HojaNoEncontrada):
             st.warning(f"⚠️ Omisión: No se encontró la hoja '{sheet_name}'.")
-        except Exception as e:
-            st.error(f"❌ Error al procesar datos del turno {turno_key}: {e}")
+            continue
+        if isinstance(resultado, Exception):
+            st.error(f"❌ Error al procesar datos del turno {turno_key}: {resultado}")
+            continue
+
+        tablas_por_turno[turno_key] = resultado
+
+    if es_admin():
+        icono = "✅" if latencia_ms <= OBJETIVO_LATENCIA_FCR_MS else "🐢"
+        cache = get_cache_fcr()
+        st.caption(
+            f"{icono} Carga de {len(fcr_sheets)} turnos: {latencia_ms:.0f} ms (objetivo ≤ {OBJETIVO_LATENCIA_FCR_MS} ms) · "
+            f"caché FCR: {cache.lecturas_locales} lecturas locales, {cache.descargas} descargas"
+        )
             
-    if not all_data:
+    if not tablas_por_turno:
         st.info("No se pudo cargar la data de ningún turno.")
         return
 
-    df_consolidado = pd.concat(all_data, ignore_index=True)
-    df_consolidado = df_consolidado.reset_index(drop=True) 
-    df_consolidado = df_consolidado.dropna(subset=['Empleado', 'Total P+N', '% +'])
-    
-    df_consolidado = df_consolidado.loc[df_consolidado.groupby('Empleado')['Total P+N'].idxmax()]
-    
-    df_consolidado = df_consolidado.sort_values(
-        by=['Total P+N', '% +'], 
-        ascending=[False, False]
-    ).reset_index(drop=True)
+    try:
+        df_consolidado = consolidar_fcr(tablas_por_turno)
+    except Exception as e:
+        st.error(f"❌ Error al consolidar los turnos: {e}")
+        return
 
     df_top10 = df_consolidado.head(10).copy()
     
@@ -699,19 +1040,86 @@ def show_fcr_global_ranking():
     )
 
 
+@st.cache_resource
+def iniciar_exportacion_metricas():
+    """Exporta las métricas en formato Prometheus por HTTP y/o a un archivo, según Secrets (una vez por proceso)."""
+    REGISTRO.describir('gincana_rerun_segundos', 'histogram', 'Duración de cada rerun por fase del test o vista')
+    REGISTRO.describir('gincana_cache_tasa_aciertos', 'gauge', 'Fracción de lecturas servidas desde la caché')
+    REGISTRO.describir('gincana_cola_pendientes', 'gauge', 'Resultados en la bandeja local aún no enviados')
+    # El exportador es opcional: si falla (p. ej. otro proceso ya usa el puerto) la app sigue sin él.
+    # Se devuelve igual para que cache_resource no lo reintente en cada rerun.
+    puerto = leer_config("metricas_puerto")
+    if puerto:
+        try:
+            iniciar_servidor(int(puerto), host=leer_config("metricas_host", "127.0.0.1"))
+        except OSError as e:
+            logging.getLogger(__name__).warning("No se pudo servir las métricas en el puerto %s: %s", puerto, e)
+    ruta = leer_config("metricas_archivo")
+    if ruta:
+        iniciar_archivo(ruta, intervalo_seg=float(leer_config("metricas_intervalo_seg", 15)))
+    return True
+
+@st.fragment(run_every=5)
+def panel_metricas():
+    """Números en vivo del registro de métricas (solo administradores)."""
+    st.caption(f"👥 Sesiones activas: {REGISTRO.sesiones_activas()}")
+
+    def ms(segundos):
+        return None if segundos is None else round(segundos * 1000, 1)
+
+    reruns = [
+        {'Fase': dict(etiquetas).get('fase'), 'Reruns': cuenta, 'Media ms': ms(media), 'p95 ms': ms(p95)}
+        for etiquetas, (cuenta, media, _, p95) in sorted(REGISTRO.histogramas('gincana_rerun_segundos').items())
+    ]
+    if reruns:
+        st.dataframe(reruns, hide_index=True)
+
+    errores = {}
+    for etiquetas, valor in REGISTRO.contadores('gincana_sheets_errores_total').items():
+        operacion = dict(etiquetas).get('operacion')
+        errores[operacion] = errores.get(operacion, 0) + valor
+    llamadas = [
+        {'Operación': dict(etiquetas).get('operacion'), 'Llamadas': cuenta, 'Media ms': ms(media),
+         'p95 ms': ms(p95), 'Errores': errores.get(dict(etiquetas).get('operacion'), 0)}
+        for etiquetas, (cuenta, media, _, p95) in sorted(REGISTRO.histogramas('gincana_sheets_segundos').items())
+    ]
+    if llamadas:
+        st.dataframe(llamadas, hide_index=True)
+
+    tasas = [
+        f"{dict(etiquetas).get('cache')} {tasa:.0%}"
+        for etiquetas, tasa in sorted(REGISTRO.medidores('gincana_cache_tasa_aciertos').items()) if tasa is not None
+    ]
+    if tasas:
+        st.caption(f"🗄️ Aciertos de caché: {' · '.join(tasas)}")
+
+def mostrar_estado_conexion(contenedor):
+    """Completa el mensaje de conexión reservado en la cabecera."""
+    if leer_config("backend", "sheets") == "local":
+        contenedor.info("💽 Backend local activo: los resultados y rankings se leen del almacén local.")
+    elif get_gsheet_client():
+        contenedor.success("✅ Conexión a Google Sheets exitosa (Solo para guardar resultados y rankings).")
+    else:
+        contenedor.error("❌ Fallo en la conexión a Google Sheets. Los resultados no se podrán guardar ni los rankings se cargarán. Revisa tus Secrets (gsheet_id y credenciales).")
+
+
 # --- FUNCIÓN PRINCIPAL DE LA APP ---
 
 st.set_page_config(page_title="Plataforma de Productividad", layout="wide")
 st.title("🎯 Plataforma de Productividad del Contact Center")
 
-# Chequeo de conexión y mensaje inicial
-if gsheet_client:
-    st.success("✅ Conexión a Google Sheets exitosa (Solo para guardar resultados y rankings).")
-else:
-    st.error("❌ Fallo en la conexión a Google Sheets. Los resultados no se podrán guardar ni los rankings se cargarán. Revisa tus Secrets (gsheet_id y credenciales).")
+# El mensaje de conexión se reserva aquí y se completa al final del script, para
+# que la autenticación con Google no retrase el primer pintado de la página
+banner_conexion = st.empty()
 
 # Inicialización de estado global (Máquina de estados)
-if 'current_phase' not in st.session_state: reiniciar_test() 
+if 'current_phase' not in st.session_state and not retomar_intento(): reiniciar_test() 
+
+# Métricas: exportación (una vez por proceso) y latido de la sesión para contar las activas
+iniciar_exportacion_metricas()
+if 'id_sesion' not in st.session_state:
+    st.session_state.id_sesion = uuid.uuid4().hex
+REGISTRO.latido_sesion(st.session_state.id_sesion)
 
 # --- BARRA DE NAVEGACIÓN LATERAL ---
 
@@ -733,12 +1141,36 @@ st.sidebar.markdown("---")
 if st.sidebar.button("🚨 Reiniciar Test (En cualquier momento)"):
     reiniciar_test()
 
+# Modo administrador (indicadores internos: caché, cola, etc.)
+if leer_config("admin_password"):
+    with st.sidebar.expander("🔐 Administración"):
+        clave_admin = st.text_input("Clave de administrador", type="password", key="clave_admin")
+        st.session_state.es_admin = clave_admin == leer_config("admin_password")
+        if es_admin():
+            for cliente in cliente_sheets.clientes_activos():
+                stats = cliente.estadisticas()
+                st.caption(
+                    f"🔌 Cliente Sheets: {stats['llamadas']} aperturas a la API · "
+                    f"{stats['llamadas_ahorradas']} llamadas ahorradas "
+                    f"(hojas {stats['aperturas_ahorradas']}, "
+                    f"pestañas {stats['pestanas_ahorradas']})"
+                )
+                cuota = cliente.planificador.holgura()
+                st.caption(
+                    f"⏱️ Cuota libre: lecturas {cuota['holgura_lecturas']:.0%} · escrituras {cuota['holgura_escrituras']:.0%} · "
+                    f"lecturas agrupadas {cuota['lecturas_agrupadas']} · esperas {cuota['esperas']} "
+                    f"({cuota['segundos_esperados']:.1f}s) · rechazadas {cuota['rechazadas']}"
+                )
+            panel_metricas()
+
 
 if current_module == "game":
-    show_typing_game()
+    with REGISTRO.cronometrar('gincana_rerun_segundos', fase=st.session_state.current_phase):
+        show_typing_game()
     
 elif current_module == "typing_ranking":
-    show_typing_ranking()
+    with REGISTRO.cronometrar('gincana_rerun_segundos', fase='Ranking de velocidad'):
+        show_typing_ranking()
 
 elif current_module == "fcr_ranking":
     st.sidebar.markdown("---")
@@ -751,7 +1183,12 @@ elif current_module == "fcr_ranking":
     }
     turno_selection = st.sidebar.radio("Ver Ranking del Turno:", list(fcr_sheets.keys()), index=0)
     worksheet_name = fcr_sheets[turno_selection]
-    show_fcr_ranking(worksheet_name)
+    with REGISTRO.cronometrar('gincana_rerun_segundos', fase='Ranking FCR semanal'):
+        show_fcr_ranking(worksheet_name)
     
 elif current_module == "fcr_global_ranking":
-    show_fcr_global_ranking()
+    with REGISTRO.cronometrar('gincana_rerun_segundos', fase='TOP 10 FCR global'):
+        show_fcr_global_ranking()
+
+# Chequeo de conexión y mensaje inicial (al final: el módulo ya está pintado)
+mostrar_estado_conexion(banner_conexion)
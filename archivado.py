@@ -0,0 +1,319 @@
+"""Archiva los resultados antiguos de 'Resultados Brutos' en particiones mensuales.
+
+Mueve el bloque inicial de filas anteriores a los últimos --conservar-meses meses
+a particiones mensuales comprimidas (archivos Parquet locales o pestañas
+'Archivo AAAA-MM'), recalcula la tabla 'Resumen Agentes' (mejor WPM, intentos y
+última fecha por agente) y recién entonces borra esas filas de la hoja. El
+ranking parte del resumen y solo lee de la hoja las filas recientes.
+
+Si el proceso se corta a mitad de camino no se pierde nada: las particiones
+descartan filas repetidas (Fecha/Hora + ID Agente) y la próxima corrida vuelve a
+archivar las filas que no se llegaron a borrar.
+
+Uso:
+    python archivado.py [--secrets .streamlit/secrets.toml] [--conservar-meses 2]
+                        [--destino parquet|hojas] [--directorio archivo] [--simular]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from almacenamiento import HojaNoEncontrada
+from cola_resultados import COLUMNAS_RESULTADOS
+from indice_ranking import a_numero
+
+HOJA_RESUMEN = "Resumen Agentes"
+COLUMNAS_RESUMEN = ['ID Agente', 'Mejor WPM', 'Precisión (%)', 'Fecha Mejor', 'Intentos', 'Ultima Fecha']
+PREFIJO_HOJA_ARCHIVO = "Archivo "
+COLUMNAS_NUMERICAS = {
+    'WPM', 'Precisión (%)', 'Errores', 'Duracion Tecleo (s)', 'Duracion Lectura (s)', 'RPM',
+    'Respuestas Correctas', 'Borrados',
+}
+
+_PATRON_MES = re.compile(r"^(\d{4})-(\d{2})")
+FORMATOS_FECHA = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%Y/%m/%d %H:%M:%S")
+EPOCA_SHEETS = datetime(1899, 12, 30)  # Día 0 de los números de serie de fecha de Sheets
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"  # El de la app al guardar 'Fecha/Hora'
+
+
+def fecha_iso(valor):
+    """'Fecha/Hora' como 'AAAA-MM-DD HH:MM:SS'; None si no se reconoce.
+
+    Acepta el texto que guarda la app, el número de serie de Sheets (filas que la
+    hoja convirtió en fecha) y fechas con formato regional (14/03/2025 10:22:05).
+    """
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return (EPOCA_SHEETS + timedelta(days=valor)).strftime(FORMATO_FECHA)
+    texto = str(valor or '').strip()
+    if _PATRON_MES.match(texto):
+        return texto
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).strftime(FORMATO_FECHA)
+        except ValueError:
+            continue
+    return None
+
+
+def mes_de(fecha):
+    """'2025-03-14 10:22:05' (o cualquier formato de fecha_iso) -> '2025-03'; None si no se reconoce."""
+    iso = fecha_iso(fecha)
+    return iso[:7] if iso else None
+
+
+def primer_mes_conservado(hoy, conservar_meses):
+    """Mes ('AAAA-MM') desde el que las filas se quedan en la hoja."""
+    total = hoy.year * 12 + hoy.month - 1 - max(conservar_meses - 1, 0)
+    return f"{total // 12:04d}-{total % 12 + 1:02d}"
+
+
+def completar(fila):
+    """Fila con exactamente las columnas de 'Resultados Brutos' y 'Fecha/Hora' como texto ISO si se reconoce."""
+    fila = list(fila) + [''] * (len(COLUMNAS_RESULTADOS) - len(fila))
+    fila = fila[:len(COLUMNAS_RESULTADOS)]
+    fila[0] = fecha_iso(fila[0]) or fila[0]
+    return fila
+
+
+def filas_a_archivar(filas, corte):
+    """Cantidad de filas del bloque inicial anteriores al mes `corte`.
+
+    Solo se archiva un prefijo contiguo: la hoja se recorta por arriba, así que
+    una fila reciente (o con fecha ilegible) detiene el bloque.
+    """
+    cantidad = 0
+    for fila in filas:
+        mes = mes_de(fila[0]) if fila else None
+        if mes is None or mes >= corte:
+            break
+        cantidad += 1
+    return cantidad
+
+
+def por_mes(filas):
+    """{mes: [filas]} conservando el orden."""
+    meses = {}
+    for fila in filas:
+        meses.setdefault(mes_de(fila[0]), []).append(fila)
+    return meses
+
+
+def resumir(filas):
+    """Filas de 'Resumen Agentes' a partir de filas (Fecha/Hora, ID Agente, WPM, Precisión, ...)."""
+    agentes = {}  # ID Agente -> [mejor wpm, precisión, fecha mejor, intentos, última fecha]
+    for fila in filas:
+        if len(fila) < 3 or not fila[1]:
+            continue
+        agente, fecha, wpm = str(fila[1]), fecha_iso(fila[0]), a_numero(fila[2])
+        precision = a_numero(fila[3]) if len(fila) > 3 else None
+        actual = agentes.get(agente)
+        if actual is None:
+            actual = agentes[agente] = [None, None, '', 0, '']
+        actual[3] += 1
+        if fecha:  # Una fecha ilegible no cuenta como la última
+            actual[4] = max(actual[4], fecha)
+        fecha = fecha or str(fila[0])
+        if wpm is not None and (actual[0] is None or wpm > actual[0]):
+            actual[0], actual[1], actual[2] = wpm, precision, fecha
+    resumen = [[agente] + datos for agente, datos in agentes.items() if datos[0] is not None]
+    resumen.sort(key=lambda fila: (-fila[1], fila[3]))
+    return resumen
+
+
+def filas_base_ranking(valores):
+    """Tabla 'Resumen Agentes' (con cabecera) -> filas (Fecha/Hora, ID Agente, WPM, Precisión) del índice."""
+    if not valores:
+        return []
+    columnas = {nombre: i for i, nombre in enumerate(valores[0])}
+    i_agente, i_wpm = columnas['ID Agente'], columnas['Mejor WPM']
+    i_precision, i_fecha = columnas['Precisión (%)'], columnas['Fecha Mejor']
+    return [
+        [fila[i_fecha], fila[i_agente], fila[i_wpm], fila[i_precision]]
+        for fila in valores[1:] if len(fila) > max(i_agente, i_wpm, i_precision, i_fecha)
+    ]
+
+
+def leer_base_ranking(backend):
+    """Filas base del ranking desde el resumen; vacío si todavía no se archivó nada."""
+    try:
+        return filas_base_ranking(backend.leer_tabla(HOJA_RESUMEN))
+    except HojaNoEncontrada:
+        return []
+
+
+def normalizar_fila(fila):
+    """Valores crudos para el archivo: números como float, el resto como texto."""
+    return [
+        a_numero(valor) if columna in COLUMNAS_NUMERICAS else ('' if valor is None else str(valor))
+        for columna, valor in zip(COLUMNAS_RESULTADOS, completar(fila))
+    ]
+
+
+def sin_repetidas(filas):
+    """Descarta filas con la misma Fecha/Hora e ID Agente (queda la última)."""
+    unicas = {(str(fila[0]), str(fila[1])): fila for fila in filas}
+    return sorted(unicas.values(), key=lambda fila: str(fila[0]))
+
+
+class ArchivoParquet:
+    """Particiones 'resultados_AAAA-MM.parquet' (zstd) en un directorio local."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def _ruta(self, mes):
+        return os.path.join(self.directorio, f"resultados_{mes}.parquet")
+
+    def meses(self):
+        if not os.path.isdir(self.directorio):
+            return []
+        return sorted(
+            nombre[len("resultados_"):-len(".parquet")] for nombre in os.listdir(self.directorio)
+            if nombre.startswith("resultados_") and nombre.endswith(".parquet")
+        )
+
+    def _leer(self, mes, columnas=None, filtros=None):
+        import pandas as pd
+
+        ruta = self._ruta(mes)
+        if not os.path.exists(ruta):
+            return []
+        df = pd.read_parquet(ruta, columns=columnas, filters=filtros)
+        return df.astype(object).where(df.notna(), None).values.tolist()
+
+    def agregar(self, mes, filas):
+        import pandas as pd
+
+        os.makedirs(self.directorio, exist_ok=True)
+        filas = sin_repetidas(self._leer(mes) + [normalizar_fila(fila) for fila in filas])
+        df = pd.DataFrame(filas, columns=COLUMNAS_RESULTADOS)
+        for columna in COLUMNAS_NUMERICAS:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce')
+        temporal = self._ruta(mes) + ".tmp"
+        df.to_parquet(temporal, compression="zstd", index=False)
+        os.replace(temporal, self._ruta(mes))
+
+    def filas_ranking(self):
+        columnas = COLUMNAS_RESULTADOS[:4]
+        return [fila for mes in self.meses() for fila in self._leer(mes, columnas)]
+
+    def consultar(self, agente, columnas=None):
+        """Filas archivadas del agente (solo las columnas pedidas), de la más antigua a la más nueva."""
+        filtros = [('ID Agente', '==', str(agente))]
+        return [fila for mes in self.meses() for fila in self._leer(mes, columnas, filtros)]
+
+
+class ArchivoHojas:
+    """Particiones como pestañas 'Archivo AAAA-MM' del mismo backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def meses(self):
+        return sorted(
+            nombre[len(PREFIJO_HOJA_ARCHIVO):] for nombre in self.backend.listar_tablas()
+            if nombre.startswith(PREFIJO_HOJA_ARCHIVO) and mes_de(nombre[len(PREFIJO_HOJA_ARCHIVO):])
+        )
+
+    def _leer(self, mes):
+        try:
+            return [completar(fila) for fila in self.backend.leer_tabla(PREFIJO_HOJA_ARCHIVO + mes)[1:]]
+        except HojaNoEncontrada:
+            return []
+
+    def _claves(self, mes):
+        """(Fecha/Hora, ID Agente) de las filas ya archivadas en el mes (solo lee esas dos columnas)."""
+        try:
+            filas = self.backend.leer_tabla(PREFIJO_HOJA_ARCHIVO + mes, columnas=2)[1:]
+        except HojaNoEncontrada:
+            return set()
+        return {(str(fila[0]), str(fila[1])) for fila in map(completar, filas)}
+
+    def agregar(self, mes, filas):
+        # Solo se agregan al final las filas nuevas: la pestaña del mes no se reescribe
+        claves = self._claves(mes)
+        nuevas = [
+            fila for fila in sin_repetidas([normalizar_fila(fila) for fila in filas])
+            if (fila[0], fila[1]) not in claves
+        ]
+        if nuevas:
+            self.backend.agregar_a_tabla(PREFIJO_HOJA_ARCHIVO + mes, nuevas, COLUMNAS_RESULTADOS)
+
+    def filas_ranking(self):
+        return [fila[:4] for mes in self.meses() for fila in self._leer(mes)]
+
+    def consultar(self, agente, columnas=None):
+        indices = [COLUMNAS_RESULTADOS.index(c) for c in columnas] if columnas else range(len(COLUMNAS_RESULTADOS))
+        return [
+            [fila[i] for i in indices]
+            for mes in self.meses() for fila in self._leer(mes) if str(fila[1]) == str(agente)
+        ]
+
+
+def crear_archivo(config, backend):
+    """Archivo según `archivo_destino` ('parquet' por defecto o 'hojas')."""
+    destino = config.get("archivo_destino", "parquet")
+    if destino == "parquet":
+        return ArchivoParquet(config.get("archivo_dir", "archivo"))
+    if destino == "hojas":
+        return ArchivoHojas(backend)
+    raise ValueError(f"Destino de archivo desconocido: '{destino}'. Usa 'parquet' o 'hojas'.")
+
+
+def archivar(backend, archivo, corte, simular=False):
+    """Archiva las filas anteriores a `corte` ('AAAA-MM'). Devuelve (archivadas, agentes del resumen)."""
+    # Sin formato: las fechas que la hoja convirtió llegan como número de serie, no con formato regional
+    filas = [
+        completar(fila)
+        for fila in backend.leer_resultados(0, columnas=len(COLUMNAS_RESULTADOS), sin_formato=True)
+    ]
+    cantidad = filas_a_archivar(filas, corte)
+    if cantidad < len(filas) and mes_de(filas[cantidad][0]) is None:
+        print(f"⚠️ La fila {cantidad + 2} de 'Resultados Brutos' tiene una fecha que no se reconoce "
+              f"({filas[cantidad][0]!r}): el archivado se detiene ahí.", file=sys.stderr)
+    viejas, recientes = filas[:cantidad], filas[cantidad:]
+    if simular:
+        return cantidad, len(resumir(archivo.filas_ranking() + viejas + recientes))
+
+    # 1) Particiones, 2) resumen, 3) recién entonces se recorta la hoja
+    for mes, filas_mes in por_mes(viejas).items():
+        archivo.agregar(mes, filas_mes)
+    resumen = resumir(archivo.filas_ranking() + recientes)
+    backend.escribir_tabla(HOJA_RESUMEN, [COLUMNAS_RESUMEN] + resumen)
+    backend.eliminar_primeras_filas(cantidad)
+    return cantidad, len(resumen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--secrets", default=os.path.join(".streamlit", "secrets.toml"))
+    parser.add_argument("--conservar-meses", type=int, default=2, help="Meses (incluido el actual) que quedan en la hoja")
+    parser.add_argument("--destino", choices=("parquet", "hojas"), help="Por defecto, 'archivo_destino' de los Secrets")
+    parser.add_argument("--directorio", help="Directorio de las particiones Parquet (por defecto, 'archivo_dir')")
+    parser.add_argument("--simular", action="store_true", help="Informa qué se archivaría sin escribir ni borrar")
+    args = parser.parse_args()
+
+    from almacenamiento import crear_backend
+    from recalcular_resultados import cargar_config, cliente_desde_config
+
+    config = cargar_config(args.secrets)
+    if args.destino:
+        config["archivo_destino"] = args.destino
+    if args.directorio:
+        config["archivo_dir"] = args.directorio
+    backend = crear_backend(config, lambda: cliente_desde_config(config))
+    archivo = crear_archivo(config, backend)
+
+    corte = primer_mes_conservado(date.today(), args.conservar_meses)
+    inicio = time.perf_counter()
+    archivadas, agentes = archivar(backend, archivo, corte, simular=args.simular)
+    accion = "Se archivarían" if args.simular else "Archivadas"
+    print(f"{accion} {archivadas} filas anteriores a {corte} · {agentes} agentes en '{HOJA_RESUMEN}' "
+          f"· {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import json
+import random
+from collections import namedtuple
+
+from puntuacion import normalizar_texto, patron_texto
+from textos import PASAJES, ID_PASAJE_ORIGINAL
+
+# --- BANCO DE PASAJES (Cargado una vez por proceso) ---
+# Cada pasaje se prepara al cargar: texto normalizado, total de palabras,
+# máscaras de igualdad por carácter (Peq) e índice de palabra por posición.
+# Puntuar un intento ya no vuelve a normalizar ni a partir el texto original.
+
+Pasaje = namedtuple('Pasaje', ['id', 'texto', 'normalizado', 'total_palabras', 'patron', 'preguntas'])
+
+
+def preparar_pasaje(id_pasaje, texto, preguntas):
+    normalizado = normalizar_texto(texto)
+    return Pasaje(
+        id_pasaje,
+        texto,
+        normalizado,
+        len(normalizado.split()),
+        patron_texto.__wrapped__(normalizado),  # Sin pasar por el lru_cache: el pasaje ya lo guarda
+        tuple(preguntas),
+    )
+
+
+class BancoPasajes:
+    """Pasajes preparados, con elección al azar y búsqueda por ID en O(1)."""
+
+    def __init__(self, pasajes, id_por_defecto=ID_PASAJE_ORIGINAL):
+        self._pasajes = [preparar_pasaje(p["id"], p["texto"], p["preguntas"]) for p in pasajes]
+        if not self._pasajes:
+            raise ValueError("El banco de pasajes está vacío.")
+        self._por_id = {pasaje.id: pasaje for pasaje in self._pasajes}
+        if len(self._por_id) != len(self._pasajes):
+            raise ValueError("Hay IDs de pasaje repetidos en el banco.")
+        self.por_defecto = self._por_id.get(id_por_defecto, self._pasajes[0])
+
+    def __len__(self):
+        return len(self._pasajes)
+
+    def elegir(self, excluir=None, azar=random):
+        """Pasaje al azar; si hay más de uno, distinto de `excluir` (el del intento anterior)."""
+        if len(self._pasajes) == 1:
+            return self._pasajes[0]
+        total = len(self._pasajes)
+        indice = azar.randrange(total)
+        if self._pasajes[indice].id == excluir:
+            # Un segundo sorteo entre los demás: sigue siendo O(1) y uniforme sobre el resto
+            indice = (indice + 1 + azar.randrange(total - 1)) % total
+        return self._pasajes[indice]
+
+    def obtener(self, id_pasaje):
+        """Pasaje por ID; el original si no hay ID (resultados antiguos) o no existe en el banco."""
+        return self._por_id.get(id_pasaje or ID_PASAJE_ORIGINAL, self.por_defecto)
+
+
+def cargar_banco(ruta=None):
+    """Banco desde un JSON ([{"id", "texto", "preguntas"}, ...]) o, sin ruta, desde textos.PASAJES."""
+    if not ruta:
+        return BancoPasajes(PASAJES)
+    with open(ruta, encoding='utf-8') as f:
+        return BancoPasajes(json.load(f))
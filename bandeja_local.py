@@ -0,0 +1,86 @@
+import json
+import sqlite3
+import threading
+import time
+
+# --- BANDEJA DE SALIDA LOCAL (SQLite en modo WAL) ---
+# Cada resultado se escribe aquí primero (un commit local) y luego se
+# sincroniza con Google Sheets. Sobrevive a caídas de Google y a reinicios.
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS bandeja (
+    clave TEXT PRIMARY KEY,
+    fila TEXT NOT NULL,
+    creado REAL NOT NULL,
+    sincronizado REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bandeja_pendientes ON bandeja (sincronizado, creado);
+"""
+
+
+class BandejaSalida:
+    """Bandeja de salida durable con claves de idempotencia."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")  # Un fsync del WAL por commit
+        self._conn.executescript(ESQUEMA)
+
+    def agregar(self, clave, fila):
+        """Guarda la fila si la clave no existe. Devuelve True si era nueva."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO bandeja (clave, fila, creado) VALUES (?, ?, ?)",
+                (clave, json.dumps(fila, ensure_ascii=False), time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def resumen_pendientes(self):
+        """Devuelve (cantidad, creado del más antiguo) de las filas por sincronizar."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), MIN(creado) FROM bandeja WHERE sincronizado IS NULL AND error IS NULL"
+            ).fetchone()
+
+    def pendientes(self, limite):
+        """Devuelve hasta `limite` filas sin sincronizar, de la más antigua a la más nueva."""
+        with self._lock:
+            registros = self._conn.execute(
+                "SELECT clave, fila FROM bandeja WHERE sincronizado IS NULL AND error IS NULL "
+                "ORDER BY creado LIMIT ?",
+                (limite,),
+            ).fetchall()
+        return [(clave, json.loads(fila)) for clave, fila in registros]
+
+    def marcar_sincronizados(self, claves):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE bandeja SET sincronizado = ?, error = NULL WHERE clave = ?",
+                [(time.time(), clave) for clave in claves],
+            )
+
+    def marcar_error(self, claves, detalle):
+        """Aparta las filas con un error no recuperable para que no bloqueen la cola."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE bandeja SET error = ? WHERE clave = ?",
+                [(detalle, clave) for clave in claves],
+            )
+
+    def reabrir_errores(self):
+        """Vuelve a poner en cola las filas apartadas por error (p. ej. al reiniciar)."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE bandeja SET error = NULL WHERE sincronizado IS NULL AND error IS NOT NULL"
+            ).rowcount
+
+    def estado(self, clave):
+        """Devuelve (sincronizado, error) de la clave, o None si no existe."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT sincronizado, error FROM bandeja WHERE clave = ?", (clave,)
+            ).fetchone()
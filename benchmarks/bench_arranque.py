@@ -0,0 +1,133 @@
+"""Benchmark de arranque en frío: tiempo de importación y tiempo hasta el primer render.
+
+Cada medición corre en un proceso nuevo (sin módulos en caché). Se reporta:
+- el tiempo de importar cada dependencia pesada y cada módulo del proyecto;
+- qué dependencias pesadas arrastra importar los módulos que usa app.py;
+- el tiempo de la primera ejecución de app.py con streamlit.testing (AppTest),
+  que equivale al primer render de la pantalla de inicio del test.
+
+Uso: python benchmarks/bench_arranque.py [--repeticiones N]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEPENDENCIAS_PESADAS = ['pandas', 'gspread', 'google.oauth2.service_account', 'pyarrow']
+
+
+def importaciones_proyecto(ruta):
+    """Módulos del proyecto importados en el nivel superior de `ruta` (lo que se carga al importarlo)."""
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            nombres = [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+            nombres = [nodo.module]
+        else:
+            continue
+        for nombre in nombres:
+            raiz = nombre.split('.')[0]
+            if os.path.exists(os.path.join(RAIZ, raiz + '.py')) and raiz not in modulos:
+                modulos.append(raiz)
+    return modulos
+
+
+def modulos_proyecto(ruta_app=os.path.join(RAIZ, 'app.py')):
+    """Módulos del proyecto que carga app.py al arrancar, directos o a través de otros módulos.
+
+    Se leen del código para que la medición siga a la app cuando se agregan módulos.
+    """
+    modulos, pendientes = [], importaciones_proyecto(ruta_app)
+    while pendientes:
+        modulo = pendientes.pop(0)
+        if modulo not in modulos:
+            modulos.append(modulo)
+            pendientes.extend(importaciones_proyecto(os.path.join(RAIZ, modulo + '.py')))
+    return modulos
+
+
+MODULOS_PROYECTO = modulos_proyecto()
+
+CODIGO_IMPORTACION = """
+import json, sys, time
+inicio = time.perf_counter()
+try:
+    __import__({modulo!r})
+    segundos = time.perf_counter() - inicio
+except ImportError:
+    segundos = None
+pesadas = [m for m in {pesadas!r} if m in sys.modules]
+print(json.dumps({{'segundos': segundos, 'pesadas': pesadas}}))
+"""
+
+CODIGO_PRIMER_RENDER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+at = AppTest.from_file('app.py', default_timeout=60).run()
+primera = time.perf_counter() - inicio
+inicio = time.perf_counter()
+at.run()
+segunda = time.perf_counter() - inicio
+pesadas = [m for m in {pesadas!r} if m in sys.modules]
+print(json.dumps({{'primera': primera, 'segunda': segunda, 'pesadas': pesadas,
+                  'excepciones': [str(e.value) for e in at.exception]}}))
+"""
+
+
+def ejecutar(codigo):
+    """Corre `codigo` en un intérprete nuevo y devuelve el JSON que imprime (o None si falla)."""
+    proceso = subprocess.run(
+        [sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, timeout=300
+    )
+    if proceso.returncode != 0:
+        return None
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def medir_importacion(modulo, repeticiones):
+    """Mejor tiempo de importación en frío de `modulo` y dependencias pesadas que arrastra."""
+    mediciones = [ejecutar(CODIGO_IMPORTACION.format(modulo=modulo, pesadas=DEPENDENCIAS_PESADAS))
+                  for _ in range(repeticiones)]
+    mediciones = [m for m in mediciones if m and m['segundos'] is not None]
+    if not mediciones:
+        return None, []
+    return min(m['segundos'] for m in mediciones), mediciones[0]['pesadas']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print("Importación en frío (mejor de %d):" % args.repeticiones)
+    for modulo in DEPENDENCIAS_PESADAS + MODULOS_PROYECTO:
+        segundos, pesadas = medir_importacion(modulo, args.repeticiones)
+        if segundos is None:
+            print(f"  {modulo:<32} no instalado")
+            continue
+        arrastra = [m for m in pesadas if m != modulo]
+        nota = f"  ⚠️ arrastra {', '.join(arrastra)}" if modulo in MODULOS_PROYECTO and arrastra else ""
+        print(f"  {modulo:<32} {segundos * 1000:>8.1f} ms{nota}")
+
+    print("\nPrimer render de app.py (AppTest):")
+    resultado = ejecutar(CODIGO_PRIMER_RENDER.format(pesadas=DEPENDENCIAS_PESADAS))
+    if resultado is None:
+        print("  No se pudo ejecutar (¿streamlit instalado?).")
+        return
+    print(f"  primera ejecución  {resultado['primera'] * 1000:>8.1f} ms")
+    print(f"  rerun en caliente  {resultado['segunda'] * 1000:>8.1f} ms")
+    print(f"  dependencias pesadas cargadas: {', '.join(resultado['pesadas']) or 'ninguna'}")
+    for error in resultado['excepciones']:
+        print(f"  ❌ {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Payload y latencia de las lecturas del ranking: hoja completa vs. A:J vs. A:D sin formato.
+
+Variantes (lo que pide cada una a la API de valores de Sheets):
+- get_all_records: todas las columnas formateadas y un dict por fila (vista original).
+- A:J formateado: la lectura incremental anterior del ranking (incluye 'Texto Escrito').
+- A:D sin formato: la lectura actual (leer_ranking), con WPM y precisión numéricos.
+
+Sin --secrets, simula una hoja de --filas filas (50.000 por defecto) con el mismo
+contenido que genera la app (texto escrito, telemetría comprimida, números con
+coma decimal) y mide el tamaño del JSON de respuesta (crudo y con gzip, como lo
+transfiere la API) y el tiempo de decodificarlo y aplicarlo al IndiceRanking.
+
+Con --secrets mide contra una hoja real: latencia de cada lectura y tamaño de los
+valores recibidos. --poblar N agrega antes N filas sintéticas a la pestaña
+(usa una hoja de pruebas, no la de producción).
+
+Uso:
+    python benchmarks/bench_lecturas_sheets.py [--filas 50000] [--repeticiones 5]
+    python benchmarks/bench_lecturas_sheets.py --secrets .streamlit/secrets.toml \\
+        [--pestana "Resultados Bench"] [--poblar 50000]
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_puntuacion import con_errores  # noqa: E402
+from cola_resultados import COLUMNAS_RESULTADOS  # noqa: E402
+from indice_ranking import IndiceRanking  # noqa: E402
+from progresion import Progresion  # noqa: E402
+from telemetria import Telemetria, _escribir_varints  # noqa: E402
+from textos import PASAJES  # noqa: E402
+
+FILAS = 50_000
+LOTE_POBLAR = 5_000
+
+
+def filas_sinteticas(cantidad, semilla=13):
+    """Filas de 'Resultados Brutos' con valores crudos (números como números)."""
+    azar = random.Random(semilla)
+    agentes = [f"AG{i:05d}" for i in range(max(1, cantidad // 20))]
+    filas = []
+    for i in range(cantidad):
+        pasaje = PASAJES[i % len(PASAJES)]
+        escrito = con_errores(pasaje["texto"][:azar.randint(150, len(pasaje["texto"]))], 0.05, semilla=i)
+        telemetria = Telemetria()
+        eventos = [valor for caracter in escrito for valor in (azar.randint(60, 400), ord(caracter))]
+        telemetria.agregar_lote('bench', 0, base64.b64encode(_escribir_varints(eventos)).decode('ascii'))
+        progresion = Progresion()
+        for segundo in range(61):
+            progresion.registrar(segundo * 1000, escrito[:len(escrito) * segundo // 60])
+        filas.append([
+            f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00",
+            azar.choice(agentes),
+            round(azar.uniform(10, 120), 2),
+            round(azar.uniform(70, 100), 2),
+            azar.randint(0, 40),
+            60,
+            round(azar.uniform(10, 60), 2),
+            round(azar.uniform(80, 300), 2),
+            azar.randint(0, 3),
+            escrito,
+            azar.randint(0, 30),
+            telemetria.codificar(),
+            "",
+            pasaje["id"],
+            progresion.codificar(),
+        ])
+    return filas
+
+
+def formateada(valor):
+    """Cómo devuelve Sheets un valor con FORMATTED_VALUE en una hoja con configuración regional es."""
+    if isinstance(valor, float):
+        return f"{valor:g}".replace('.', ',')
+    return str(valor)
+
+
+def respuesta(valores, rango):
+    """Cuerpo JSON de values.get, como lo envía la API."""
+    return json.dumps({"range": rango, "majorDimension": "ROWS", "values": valores}, ensure_ascii=False).encode()
+
+
+def variantes(filas):
+    cabecera = COLUMNAS_RESULTADOS
+    return {
+        'get_all_records': (
+            respuesta([cabecera] + [[formateada(v) for v in fila] for fila in filas], "'Resultados Brutos'"),
+            lambda valores: [dict(zip(valores[0], fila)) for fila in valores[1:]],
+            lambda registros: [[r['Fecha/Hora'], r['ID Agente'], r['WPM'], r['Precisión (%)']] for r in registros],
+        ),
+        'A:J formateado': (
+            respuesta([[formateada(v) for v in fila[:10]] for fila in filas], f"A2:J{len(filas) + 1}"),
+            lambda valores: valores,
+            lambda valores: valores,
+        ),
+        'A:D sin formato': (
+            respuesta([fila[:4] for fila in filas], f"A2:D{len(filas) + 1}"),
+            lambda valores: valores,
+            lambda valores: valores,
+        ),
+    }
+
+
+def medir_simulado(cantidad, repeticiones):
+    print(f"Generando {cantidad} filas sintéticas...")
+    filas = filas_sinteticas(cantidad)
+    resultados = []
+    for nombre, (cuerpo, decodificar, a_filas) in variantes(filas).items():
+        comprimido = len(gzip.compress(cuerpo, 6))
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            valores = decodificar(json.loads(cuerpo)["values"])
+            indice = IndiceRanking()
+            indice.registrar_filas(a_filas(valores))
+            tiempos.append(time.perf_counter() - inicio)
+        resultados.append((nombre, len(cuerpo), comprimido, min(tiempos)))
+    return resultados
+
+
+def medir_real(config, pestana, poblar, repeticiones):
+    from gspread.utils import ValueRenderOption, DateTimeOption
+    from recalcular_resultados import cliente_desde_config
+
+    cliente = cliente_desde_config(config)
+    hoja = cliente.abrir_por_clave(config["gsheet_id"])
+    ws = cliente.pestana(hoja, pestana)
+    if poblar:
+        filas = filas_sinteticas(poblar)
+        for i in range(0, len(filas), LOTE_POBLAR):
+            lote = filas[i:i + LOTE_POBLAR]
+            cliente.planificador.escribir(lambda: ws.append_rows(lote, value_input_option="RAW"))
+        print(f"{poblar} filas agregadas a '{pestana}'.")
+
+    lecturas = {
+        'get_all_records': lambda: ws.get_all_records(),
+        'A:J formateado': lambda: ws.get("A2:J"),
+        'A:D sin formato': lambda: ws.get(
+            "A2:D",
+            value_render_option=ValueRenderOption.unformatted,
+            date_time_render_option=DateTimeOption.formatted_string,
+        ),
+    }
+    resultados = []
+    for nombre, leer in lecturas.items():
+        tiempos, valores = [], None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            valores = cliente.planificador.leer(None, leer, operacion=nombre)
+            tiempos.append(time.perf_counter() - inicio)
+        cuerpo = json.dumps(valores, ensure_ascii=False, default=str).encode()
+        resultados.append((nombre, len(cuerpo), len(gzip.compress(cuerpo, 6)), min(tiempos)))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=FILAS)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--secrets', help="Mide contra la hoja real de estos Secrets")
+    parser.add_argument('--pestana', default="Resultados Bench")
+    parser.add_argument('--poblar', type=int, default=0, help="Filas sintéticas a agregar antes de medir")
+    args = parser.parse_args()
+
+    if args.secrets:
+        from recalcular_resultados import cargar_config
+        resultados = medir_real(cargar_config(args.secrets), args.pestana, args.poblar, args.repeticiones)
+        columna_tiempo = "lectura"
+    else:
+        resultados = medir_simulado(args.filas, args.repeticiones)
+        columna_tiempo = "decodificar+índice"
+
+    base = resultados[0]
+    print(f"\n{'variante':<18} {'JSON':>10} {'gzip':>10} {columna_tiempo:>19} {'vs hoja completa':>18}")
+    for nombre, crudo, comprimido, segundos in resultados:
+        print(f"{nombre:<18} {crudo / 1e6:>8.2f}MB {comprimido / 1e6:>8.2f}MB {segundos * 1000:>16.0f}ms "
+              f"{comprimido / base[2]:>9.1%} / {segundos / base[3]:>5.1%}")
+
+
+if __name__ == '__main__':
+    main()
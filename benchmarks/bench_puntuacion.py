@@ -0,0 +1,45 @@
+"""Benchmark de calcular_metrics: tiempo por llamada con textos de ~500 caracteres.
+
+Uso: python benchmarks/bench_puntuacion.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from puntuacion import calcular_metrics  # noqa: E402
+from textos import TEXTO_PRUEBA_GINCANA  # noqa: E402
+
+
+def con_errores(texto, tasa, semilla=7):
+    """Copia del texto con sustituciones, omisiones e inserciones al azar."""
+    azar = random.Random(semilla)
+    salida = []
+    for caracter in texto:
+        r = azar.random()
+        if r < tasa / 3:
+            salida.append(azar.choice('abcdefghijklmnopqrstuvwxyz'))
+        elif r < 2 * tasa / 3:
+            continue
+        elif r < tasa:
+            salida.append(caracter + azar.choice('abcdefghijklmnopqrstuvwxyz'))
+        else:
+            salida.append(caracter)
+    return ''.join(salida)
+
+
+def medir(nombre, escrito, repeticiones=200):
+    segundos = min(timeit.repeat(
+        lambda: calcular_metrics(TEXTO_PRUEBA_GINCANA, escrito, 60, 30), number=repeticiones, repeat=5
+    )) / repeticiones
+    print(f"{nombre:<38} {len(escrito):>4} car. {segundos * 1e6:>9.1f} µs/llamada")
+
+
+if __name__ == "__main__":
+    medir("perfecto (texto completo)", TEXTO_PRUEBA_GINCANA)
+    medir("perfecto (mitad del texto)", TEXTO_PRUEBA_GINCANA[:len(TEXTO_PRUEBA_GINCANA) // 2])
+    medir("5% de errores", con_errores(TEXTO_PRUEBA_GINCANA, 0.05))
+    medir("20% de errores", con_errores(TEXTO_PRUEBA_GINCANA, 0.20))
+    medir("carácter saltado al inicio", TEXTO_PRUEBA_GINCANA[1:])
@@ -0,0 +1,303 @@
+"""Suite de micro-benchmarks de los caminos calientes, con umbrales de regresión.
+
+Casos:
+- puntuacion/*: calcular_metrics con textos de 100, 500 y 2000 caracteres y
+  distintos patrones de error; puntuacion/pasaje/* puntúa el mismo texto ya
+  preparado por el banco de pasajes (sin normalizar ni partir el original) y
+  puntuacion/tick_en_vivo/* un tick del marcador incremental de la fase de tecleo.
+- fcr/*: tipado de '% +' (normalizar_fcr) y consolidación del TOP global
+  (consolidar_fcr) sobre cuatro turnos.
+- ranking/*: mejor WPM por agente con 1k, 100k y 1M filas, con el groupby de
+  pandas que usaba la vista original y con IndiceRanking.
+
+Los resultados se guardan en benchmarks/resultados/<etiqueta>.json (por defecto,
+el commit actual) y se comparan con benchmarks/resultados/referencia.json: un
+caso que tarda más que la referencia por encima de la tolerancia es una
+regresión y el comando termina con código 1. Los casos cuyas dependencias no
+están instaladas se omiten.
+
+Uso:
+    python benchmarks/ejecutar.py [--filtro ranking] [--rapido] [--tolerancia 0.25]
+                                  [--etiqueta v2] [--guardar-referencia]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_puntuacion import con_errores  # noqa: E402
+from textos import TEXTO_PRUEBA_GINCANA  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+REFERENCIA = os.path.join(DIRECTORIO_RESULTADOS, "referencia.json")
+TOLERANCIA = 0.25  # 25% más lento que la referencia es regresión
+MINIMO_SEGUNDOS_REGRESION = 20e-6  # Diferencias menores son ruido de medición
+TIEMPO_OBJETIVO_SEG = 0.2  # Tiempo mínimo de cada repetición (como timeit.autorange)
+
+CASOS = []  # (nombre, preparar, lento); preparar() devuelve la función a medir
+
+
+def caso(nombre, lento=False):
+    def registrar(preparar):
+        CASOS.append((nombre, preparar, lento))
+        return preparar
+    return registrar
+
+
+# --- Puntuación ---
+
+def texto_de_largo(largo):
+    repeticiones = largo // len(TEXTO_PRUEBA_GINCANA) + 1
+    return ' '.join([TEXTO_PRUEBA_GINCANA] * repeticiones)[:largo]
+
+
+def _caso_puntuacion(largo, patron, escribir):
+    @caso(f"puntuacion/{largo}/{patron}")
+    def preparar():
+        from puntuacion import calcular_metrics
+
+        original = texto_de_largo(largo)
+        escrito = escribir(original)
+        return lambda: calcular_metrics(original, escrito, 60, 30)
+
+
+PATRONES = {
+    'perfecto': lambda texto: texto,
+    'errores_5': lambda texto: con_errores(texto, 0.05),
+    'errores_20': lambda texto: con_errores(texto, 0.20),
+    'salto_inicio': lambda texto: texto[1:],
+}
+for _largo in (100, 500, 2000):
+    for _patron, _escribir in PATRONES.items():
+        _caso_puntuacion(_largo, _patron, _escribir)
+
+
+def _caso_pasaje(largo):
+    @caso(f"puntuacion/pasaje/{largo}/errores_5")
+    def preparar():
+        from banco_pasajes import preparar_pasaje
+        from puntuacion import puntuar_pasaje
+
+        pasaje = preparar_pasaje("bench", texto_de_largo(largo), [])
+        escrito = con_errores(pasaje.texto, 0.05)
+        return lambda: puntuar_pasaje(pasaje, escrito, 60, 30)
+
+
+for _largo in (100, 500, 2000):
+    _caso_pasaje(_largo)
+
+
+@caso("puntuacion/tick_en_vivo/2000")
+def preparar_tick_en_vivo():
+    from puntuacion import MarcadorIncremental, normalizar_texto
+
+    original = texto_de_largo(2000)
+    escrito = con_errores(original, 0.05)
+    marcador = MarcadorIncremental(normalizar_texto(original))
+    mitad = len(escrito) // 2
+    marcador.actualizar(escrito[:mitad])
+    avances = itertools.cycle([escrito[:mitad + 4], escrito[:mitad]])
+
+    # Un tick del fragmento de tecleo a mitad del texto: 4 caracteres nuevos (o borrados)
+    return lambda: marcador.actualizar(next(avances))
+
+
+# --- Tablas FCR ---
+
+def valores_fcr(filas, semilla):
+    """Tabla FCR sintética como la devuelve Sheets (todo texto, '% +' con coma y '%')."""
+    azar = random.Random(semilla)
+    valores = [['Ranking', 'Empleado', 'Chats', 'Cantidad +', 'Total P+N', '% +']]
+    for i in range(filas):
+        chats = azar.randint(20, 400)
+        positivos = azar.randint(0, chats)
+        valores.append([
+            str(i + 1), f"Empleado {azar.randint(1, filas * 2)}", str(chats), str(positivos),
+            str(azar.randint(0, chats)), f"{100 * positivos / chats:.1f}%".replace('.', ','),
+        ])
+    return valores
+
+
+@caso("fcr/normalizar")
+def preparar_fcr_normalizar():
+    from cache_fcr import valores_a_dataframe, normalizar_fcr
+
+    tablas = [valores_a_dataframe(valores_fcr(300, semilla)) for semilla in range(4)]
+    return lambda: [normalizar_fcr(tabla) for tabla in tablas]
+
+
+@caso("fcr/consolidar")
+def preparar_fcr_consolidar():
+    from cache_fcr import valores_a_dataframe, normalizar_fcr, consolidar_fcr
+
+    tablas = {
+        turno: normalizar_fcr(valores_a_dataframe(valores_fcr(300, semilla)))
+        for semilla, turno in enumerate(['PM', 'AM', 'NT1', 'NT2'])
+    }
+    return lambda: consolidar_fcr(tablas).head(10)
+
+
+# --- Ranking de velocidad ---
+
+def filas_resultados(cantidad, semilla=3):
+    """Filas (Fecha/Hora, ID Agente, WPM, Precisión) con ~20 intentos por agente."""
+    azar = random.Random(semilla)
+    agentes = [f"AG{i:06d}" for i in range(max(1, cantidad // 20))]
+    fechas = [f"2025-01-{1 + i % 28:02d} {i % 24:02d}:00:00" for i in range(1000)]
+    return [
+        (fechas[i % 1000], azar.choice(agentes), round(azar.uniform(10, 120), 2), round(azar.uniform(70, 100), 2))
+        for i in range(cantidad)
+    ]
+
+
+def _caso_ranking(cantidad, etiqueta):
+    lento = cantidad >= 1_000_000
+
+    @caso(f"ranking/pandas/{etiqueta}", lento=lento)
+    def preparar_pandas():
+        import pandas as pd
+
+        registros = [
+            {'Fecha/Hora': f, 'ID Agente': a, 'WPM': w, 'Precisión (%)': p}
+            for f, a, w, p in filas_resultados(cantidad)
+        ]
+
+        def ranking_original():
+            # Lo que hacía show_typing_ranking con get_all_records en cada vista
+            df = pd.DataFrame(registros)
+            df['WPM'] = pd.to_numeric(df['WPM'], errors='coerce')
+            idx = df.groupby(['ID Agente'])['WPM'].transform('max') == df['WPM']
+            return df[idx].sort_values(by='WPM', ascending=False).head(100)
+        return ranking_original
+
+    @caso(f"ranking/indice/{etiqueta}", lento=lento)
+    def preparar_indice():
+        from indice_ranking import IndiceRanking
+
+        filas = filas_resultados(cantidad)
+
+        def construir_y_consultar():
+            indice = IndiceRanking()
+            indice.registrar_filas(filas)
+            return indice.top(100)
+        return construir_y_consultar
+
+    @caso(f"ranking/indice_consulta/{etiqueta}", lento=lento)
+    def preparar_consulta():
+        from indice_ranking import IndiceRanking
+
+        indice = IndiceRanking()
+        indice.registrar_filas(filas_resultados(cantidad))
+        nuevas = itertools.cycle(filas_resultados(100_000, semilla=11))
+
+        def registrar_y_consultar():
+            # Lo que cuesta cada vista una vez construido el índice: una fila nueva y el TOP 100
+            indice.registrar_filas([next(nuevas)])
+            return indice.top(100)
+        return registrar_y_consultar
+
+
+for _cantidad, _etiqueta in ((1_000, '1k'), (100_000, '100k'), (1_000_000, '1M')):
+    _caso_ranking(_cantidad, _etiqueta)
+
+
+# --- Ejecución ---
+
+def medir(funcion):
+    """Mejor tiempo por llamada: repeticiones de al menos TIEMPO_OBJETIVO_SEG (menos repeticiones si es lenta)."""
+    inicio = time.perf_counter()
+    funcion()
+    una = time.perf_counter() - inicio
+    numero = max(1, int(TIEMPO_OBJETIVO_SEG / una)) if una > 0 else 1000
+    repeticiones = 5 if una < 0.5 else 2
+    return min(timeit.repeat(funcion, number=numero, repeat=repeticiones)) / numero
+
+
+def etiqueta_por_defecto():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+
+def formatear(segundos):
+    if segundos >= 1:
+        return f"{segundos:.2f} s"
+    if segundos >= 1e-3:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos * 1e6:.1f} µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filtro', default='', help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument('--rapido', action='store_true', help="Omite los casos de 1M de filas")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    parser.add_argument('--etiqueta', default=None, help="Nombre del archivo de resultados (por defecto, el commit)")
+    parser.add_argument('--referencia', default=REFERENCIA)
+    parser.add_argument('--guardar-referencia', action='store_true', help="Usa esta corrida como nueva referencia")
+    args = parser.parse_args()
+
+    referencia = {}
+    if os.path.exists(args.referencia):
+        with open(args.referencia, encoding='utf-8') as f:
+            referencia = json.load(f)['casos']
+
+    resultados, omitidos, regresiones = {}, [], []
+    for nombre, preparar, lento in CASOS:
+        if args.filtro not in nombre or (lento and args.rapido):
+            continue
+        try:
+            funcion = preparar()
+        except ImportError as e:
+            omitidos.append(nombre)
+            print(f"{nombre:<40} omitido ({e.name} no instalado)")
+            continue
+        segundos = resultados[nombre] = medir(funcion)
+
+        anterior = referencia.get(nombre)
+        comparacion = ""
+        if anterior:
+            cambio = segundos / anterior - 1
+            comparacion = f"{cambio:+7.1%} vs referencia"
+            if cambio > args.tolerancia and segundos - anterior > MINIMO_SEGUNDOS_REGRESION:
+                regresiones.append(nombre)
+                comparacion += "  ❌ REGRESIÓN"
+        print(f"{nombre:<40} {formatear(segundos):>11}  {comparacion}")
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    corrida = {
+        'etiqueta': args.etiqueta or etiqueta_por_defecto(),
+        'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'casos': resultados,
+        'omitidos': omitidos,
+    }
+    ruta = os.path.join(DIRECTORIO_RESULTADOS, f"{corrida['etiqueta']}.json")
+    destinos = [ruta] + ([args.referencia] if args.guardar_referencia else [])
+    for destino in destinos:
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(corrida, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {', '.join(os.path.relpath(d, RAIZ) for d in destinos)}")
+
+    if regresiones:
+        print(f"{len(regresiones)} regresiones (tolerancia {args.tolerancia:.0%}): {', '.join(regresiones)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
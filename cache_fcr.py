@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+
+# --- CACHÉ COLUMNAR LOCAL DE LAS PESTAÑAS FCR (Parquet, se refresca solo si cambia la hoja) ---
+# pandas se importa dentro de las funciones: este módulo se carga al arrancar la
+# app y el test de mecanografía no necesita pandas hasta los resultados.
+
+COLUMNAS_NUMERICAS_FCR = ['Ranking', 'Chats', 'Cantidad +', 'Total P+N']
+
+
+def valores_a_dataframe(valores):
+    """Convierte una tabla de valores (cabecera + filas) en DataFrame, como get_all_records."""
+    import pandas as pd
+
+    if not valores:
+        return pd.DataFrame()
+    cabecera, filas = valores[0], valores[1:]
+    filas = [fila + [''] * (len(cabecera) - len(fila)) for fila in filas]
+    return pd.DataFrame([fila[:len(cabecera)] for fila in filas], columns=cabecera)
+
+
+def normalizar_fcr(df):
+    """Tipa la tabla FCR: '% +' ('85,5%') y las columnas de conteo a números, el resto a texto."""
+    import pandas as pd
+
+    df = df.copy()
+    for columna in COLUMNAS_NUMERICAS_FCR:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce')
+    if 'Total P+N' in df.columns:
+        df['Total P+N'] = df['Total P+N'].fillna(0)
+    if '% +' in df.columns:
+        df['% +'] = pd.to_numeric(df['% +'].astype(str).str.replace('%', '').str.replace(',', '.'), errors='coerce')
+    # Parquet necesita un tipo por columna: lo que no es numérico se guarda como texto
+    for columna in df.columns:
+        if df[columna].dtype == object:
+            df[columna] = df[columna].astype(str)
+    return df
+
+
+def consolidar_fcr(tablas_por_turno):
+    """Une las tablas de los turnos (con columna 'Turno') y deja la mejor fila de cada empleado.
+
+    La mejor fila es la de mayor 'Total P+N'; el resultado se ordena por 'Total P+N'
+    y, para desempatar, por '% +'.
+    """
+    import pandas as pd
+
+    df = pd.concat(
+        [tabla.assign(Turno=turno) for turno, tabla in tablas_por_turno.items()], ignore_index=True
+    )
+    df = df.dropna(subset=['Empleado', 'Total P+N', '% +'])
+    df = df.loc[df.groupby('Empleado')['Total P+N'].idxmax()]
+    return df.sort_values(by=['Total P+N', '% +'], ascending=[False, False]).reset_index(drop=True)
+
+
+def nombre_archivo(nombre_hoja):
+    """'Ranking FCR Semanal - PM' -> 'ranking_fcr_semanal_pm.parquet'."""
+    limpio = ''.join(c.lower() if c.isalnum() else '_' for c in nombre_hoja)
+    return '_'.join(parte for parte in limpio.split('_') if parte) + '.parquet'
+
+
+class CacheFCR:
+    """Copia local tipada (Parquet) de las pestañas FCR.
+
+    - `leer_tablas(nombres)` descarga pestañas y devuelve {nombre: DataFrame o excepción}.
+    - `leer_modificacion()` devuelve la fecha de modificación de la hoja (metadatos de Drive).
+
+    La fecha de modificación se consulta como mucho cada `intervalo_chequeo_seg`;
+    si cambió, las pestañas se vuelven a descargar. Si no se puede consultar (o
+    Drive no la informa), se conserva la última conocida y la copia local se
+    considera válida hasta `max_edad_seg`.
+    """
+
+    def __init__(self, directorio, leer_tablas, leer_modificacion,
+                 intervalo_chequeo_seg=60.0, max_edad_seg=3600.0):
+        self.directorio = directorio
+        self._leer_tablas = leer_tablas
+        self._leer_modificacion = leer_modificacion
+        self.intervalo_chequeo_seg = intervalo_chequeo_seg
+        self.max_edad_seg = max_edad_seg
+
+        self._lock = threading.Lock()
+        self._memoria = {}  # nombre -> DataFrame ya leído del Parquet
+        self._ultimo_chequeo = 0.0
+        self._chequeo_fallido = False
+        self.descargas = 0
+        self.lecturas_locales = 0
+
+        os.makedirs(directorio, exist_ok=True)
+        self._ruta_meta = os.path.join(directorio, 'meta.json')
+        self._meta = self._cargar_meta()
+
+    # --- Metadatos ---
+
+    def _cargar_meta(self):
+        try:
+            with open(self._ruta_meta, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'modificacion': None, 'hojas': {}}
+
+    def _guardar_meta(self):
+        temporal = self._ruta_meta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self._meta, f, ensure_ascii=False)
+        os.replace(temporal, self._ruta_meta)
+
+    def _vigente(self, nombre):
+        info = self._meta['hojas'].get(nombre)
+        if info is None or not os.path.exists(os.path.join(self.directorio, info['archivo'])):
+            return False
+        if info.get('modificacion') != self._meta['modificacion']:
+            return False
+        if self._meta['modificacion'] is not None and not self._chequeo_fallido:
+            return True
+        # Sin metadatos de Drive no hay cómo detectar cambios: se caduca por edad
+        return time.time() - info['descargado'] < self.max_edad_seg
+
+    def _chequear_modificacion(self):
+        if time.monotonic() - self._ultimo_chequeo < self.intervalo_chequeo_seg:
+            return
+        self._ultimo_chequeo = time.monotonic()
+        try:
+            modificacion = self._leer_modificacion()
+        except Exception:
+            # Un error pasajero de Drive no invalida la copia local: se conserva la última fecha conocida
+            self._chequeo_fallido = True
+            return
+        self._chequeo_fallido = False
+        if modificacion != self._meta['modificacion']:
+            self._meta['modificacion'] = modificacion
+            self._memoria.clear()
+
+    # --- API pública ---
+
+    def obtener(self, nombres_hojas):
+        """Devuelve {nombre: DataFrame tipado o excepción}, descargando solo lo que cambió."""
+        with self._lock:
+            self._chequear_modificacion()
+            faltantes = [nombre for nombre in nombres_hojas if not self._vigente(nombre)]
+
+            resultado = {}
+            if faltantes:
+                self.descargas += 1
+                for nombre, tabla in self._leer_tablas(faltantes).items():
+                    if isinstance(tabla, Exception):
+                        resultado[nombre] = tabla
+                        continue
+                    tabla = normalizar_fcr(tabla)
+                    archivo = nombre_archivo(nombre)
+                    tabla.to_parquet(os.path.join(self.directorio, archivo), index=False)
+                    self._meta['hojas'][nombre] = {
+                        'archivo': archivo,
+                        'modificacion': self._meta['modificacion'],
+                        'descargado': time.time(),
+                    }
+                    self._memoria[nombre] = tabla
+                    resultado[nombre] = tabla
+                self._guardar_meta()
+
+            for nombre in nombres_hojas:
+                if nombre in resultado:
+                    continue
+                if nombre not in self._memoria:
+                    ruta = os.path.join(self.directorio, self._meta['hojas'][nombre]['archivo'])
+                    import pandas as pd
+                    self._memoria[nombre] = pd.read_parquet(ruta, memory_map=True)
+                self.lecturas_locales += 1
+                resultado[nombre] = self._memoria[nombre]
+            return {nombre: resultado[nombre] for nombre in nombres_hojas}
@@ -0,0 +1,42 @@
+import threading
+import time
+
+# --- INSTANTÁNEA COMPARTIDA DEL RANKING (Una descarga por TTL para todas las sesiones) ---
+
+
+class CacheInstantanea:
+    """Guarda el último valor de `cargar()` durante `ttl_seg` segundos para todo el proceso.
+
+    Si varias sesiones piden la instantánea vencida a la vez, solo una la recarga
+    y las demás esperan ese mismo resultado. Los resultados guardados desde este
+    proceso no necesitan recarga: la cola los aplica directamente al índice.
+    """
+
+    def __init__(self, cargar, ttl_seg=30.0):
+        self._cargar = cargar
+        self.ttl_seg = ttl_seg
+        self._lock = threading.Lock()
+        self._valor = None
+        self._cargado_en = None  # time.monotonic() de la última carga
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self):
+        with self._lock:
+            if self._cargado_en is not None and time.monotonic() - self._cargado_en < self.ttl_seg:
+                self.aciertos += 1
+                return self._valor
+            self.fallos += 1
+            self._valor = self._cargar()
+            self._cargado_en = time.monotonic()
+            return self._valor
+
+    def estadisticas(self):
+        """Edad de la instantánea y tasa de aciertos, para el panel de administración."""
+        total = self.aciertos + self.fallos
+        return {
+            "edad_seg": None if self._cargado_en is None else time.monotonic() - self._cargado_en,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": (self.aciertos / total) if total else 0.0,
+        }
@@ -0,0 +1,244 @@
+"""Prueba de carga: N agentes simultáneos recorren el test completo contra el backend local.
+
+Cada sesión es un AppTest de Streamlit que pasa por ID_INPUT → COUNTDOWN →
+READING_ACTIVE → TYPING → COMPREHENSION → RESULTS y guarda su resultado. El
+backend es el local (SQLite en una carpeta temporal), así que no se usa la red
+ni la cuota de Google Sheets.
+
+Cada nivel de concurrencia corre en un proceso nuevo para medir CPU y memoria
+sin arrastre entre niveles. Se reportan los percentiles p50/p95/p99 de la
+latencia de cada rerun, la CPU y la memoria por sesión y la mayor concurrencia
+que cumple el objetivo de latencia p95 sin errores.
+
+Notas sobre la simulación:
+- AppTest modifica estado global de Streamlit (Runtime, st.secrets), así que los
+  reruns de las sesiones se serializan con un candado. El servidor real también
+  ejecuta los scripts de todas las sesiones bajo un mismo GIL, y la latencia
+  medida incluye la espera en esa cola.
+- AppTest no ejecuta los fragmentos con run_every por su cuenta: los ticks del
+  fragmento de tecleo se simulan con un rerun completo por segundo, lo que
+  sobreestima el costo real (cota conservadora).
+
+Uso:
+    python carga/prueba_carga.py [--niveles 1,5,10,20] [--objetivo-p95-ms 1000]
+                                 [--duracion-tecleo 5] [--salida reporte.json]
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from banco_pasajes import cargar_banco  # noqa: E402
+
+APP = os.path.join(RAIZ, "app.py")
+WPM_SIMULADO = 40
+BANCO = cargar_banco()
+LECTURA_SEG = 2.0
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores sin ordenar)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def memoria_mb():
+    """Memoria residente máxima del proceso (ru_maxrss está en KB en Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def boton(at, prefijo):
+    for b in at.button:
+        if b.label.startswith(prefijo):
+            return b
+    raise LookupError(f"No hay un botón que empiece con '{prefijo}'.")
+
+
+class Sesion:
+    """Un agente simulado que recorre el test y registra la latencia de cada rerun."""
+
+    def __init__(self, numero, secrets, candado, duracion_tecleo, cuenta_regresiva):
+        self.agente = f"CARGA-{numero:04d}"
+        self.secrets = secrets
+        self.candado = candado
+        self.duracion_tecleo = duracion_tecleo
+        self.cuenta_regresiva = cuenta_regresiva
+        self.latencias = []  # (fase, segundos)
+        self.error = None
+        self.at = None
+
+    def _paso(self, fase, accion):
+        inicio = time.perf_counter()
+        with self.candado:
+            accion()
+        self.latencias.append((fase, time.perf_counter() - inicio))
+        if self.at.exception:
+            raise RuntimeError(f"{fase}: {self.at.exception[0].value}")
+
+    def _fase(self):
+        return self.at.session_state["current_phase"]
+
+    def _esperar_fase(self, esperada):
+        if self._fase() != esperada:
+            raise RuntimeError(f"Se esperaba la fase {esperada} y la app está en {self._fase()}.")
+
+    def recorrer(self):
+        from streamlit.testing.v1 import AppTest
+
+        at = self.at = AppTest.from_file(APP, default_timeout=60)
+        at.secrets.update(self.secrets)
+
+        self._paso("ID_INPUT", at.run)
+        self._esperar_fase("ID_INPUT")
+        at.text_input(key="agente_id_input").input(self.agente)
+        self._paso("ID_INPUT", lambda: boton(at, "▶️").click().run())
+        self._esperar_fase("COUNTDOWN")
+
+        time.sleep(self.cuenta_regresiva)
+        self._paso("COUNTDOWN", at.run)
+        self._esperar_fase("READING_ACTIVE")
+        pasaje = BANCO.obtener(at.session_state["pasaje_id"])  # El que la app sorteó para este intento
+
+        time.sleep(LECTURA_SEG)
+        self._paso("READING_ACTIVE", lambda: boton(at, "Terminé de leer").click().run())
+        self._esperar_fase("TYPING")
+
+        # Un tick por segundo, como el fragmento de tecleo, con el texto creciendo a WPM_SIMULADO
+        inicio = time.monotonic()
+        caracteres_por_seg = WPM_SIMULADO * 5 / 60
+        while self._fase() == "TYPING":
+            time.sleep(1.0)
+            transcurrido = time.monotonic() - inicio
+            if transcurrido < self.duracion_tecleo:
+                texto = pasaje.texto[:int(transcurrido * caracteres_por_seg)]
+                at.text_area(key="typing_area").input(texto)
+            self._paso("TYPING", at.run)
+            if transcurrido > self.duracion_tecleo + 10:
+                raise RuntimeError("La fase de tecleo no terminó a tiempo.")
+        self._esperar_fase("COMPREHENSION")
+
+        for i, item in enumerate(pasaje.preguntas):
+            at.radio(key=f"q_{i}").set_value(item["respuesta_correcta"])
+        self._paso("COMPREHENSION", lambda: boton(at, "Finalizar Test").click().run())
+        self._esperar_fase("RESULTS")
+
+        self._paso("RESULTS", lambda: boton(at, "💾 Guardar Resultados").click().run())
+
+    def ejecutar(self):
+        try:
+            self.recorrer()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+
+def correr_nivel(concurrencia, duracion_tecleo, cuenta_regresiva):
+    """Corre `concurrencia` sesiones en este proceso y devuelve las métricas del nivel."""
+    directorio = tempfile.mkdtemp(prefix="gincana_carga_")
+    secrets = {
+        "backend": "local",
+        "backend_local_ruta": os.path.join(directorio, "resultados.db"),
+        "backend_local_fcr_dir": os.path.join(directorio, "fcr"),
+        "bandeja_ruta": os.path.join(directorio, "bandeja.db"),
+        "cola_intervalo_seg": 1,
+        "duracion_tecleo_segundos": duracion_tecleo,
+        "cuenta_regresiva_segundos": cuenta_regresiva,
+    }
+    candado = threading.Lock()
+    sesiones = [Sesion(i, secrets, candado, duracion_tecleo, cuenta_regresiva) for i in range(concurrencia)]
+
+    # Una sesión de calentamiento: importaciones y recursos compartidos no cuentan por sesión
+    Sesion(-1, secrets, candado, duracion_tecleo, cuenta_regresiva).ejecutar()
+    memoria_inicial = memoria_mb()
+    cpu_inicial = time.process_time()
+    inicio = time.perf_counter()
+
+    hilos = [threading.Thread(target=sesion.ejecutar) for sesion in sesiones]
+    for hilo in hilos:
+        hilo.start()
+        time.sleep(0.05)  # Llegadas escalonadas, como agentes reales
+    for hilo in hilos:
+        hilo.join()
+
+    duracion = time.perf_counter() - inicio
+    latencias = [segundos for sesion in sesiones for _, segundos in sesion.latencias]
+    por_fase = {}
+    for sesion in sesiones:
+        for fase, segundos in sesion.latencias:
+            por_fase.setdefault(fase, []).append(segundos)
+
+    def resumen(valores):
+        return {f"p{p}_ms": round(percentil(valores, p) * 1000, 1) for p in (50, 95, 99)}
+
+    return {
+        "concurrencia": concurrencia,
+        "reruns": len(latencias),
+        "duracion_seg": round(duracion, 1),
+        **resumen(latencias),
+        "por_fase": {fase: resumen(valores) for fase, valores in por_fase.items()},
+        "cpu_por_sesion_seg": round((time.process_time() - cpu_inicial) / concurrencia, 3),
+        "memoria_por_sesion_mb": round(max(0.0, memoria_mb() - memoria_inicial) / concurrencia, 2),
+        "errores": [sesion.error for sesion in sesiones if sesion.error],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--niveles", default="1,5,10,20", help="Concurrencias a probar, separadas por coma")
+    parser.add_argument("--objetivo-p95-ms", type=float, default=1000.0)
+    parser.add_argument("--duracion-tecleo", type=int, default=5, help="Segundos de la fase de tecleo")
+    parser.add_argument("--cuenta-regresiva", type=int, default=1)
+    parser.add_argument("--salida", help="Guarda el reporte completo en este archivo JSON")
+    parser.add_argument("--nivel", type=int, help=argparse.SUPPRESS)  # Uso interno: corre un solo nivel
+    args = parser.parse_args()
+
+    if args.nivel is not None:
+        print(json.dumps(correr_nivel(args.nivel, args.duracion_tecleo, args.cuenta_regresiva)))
+        return
+
+    reporte = []
+    print(f"{'sesiones':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'CPU/ses s':>10} {'MB/ses':>8} {'errores':>8}")
+    for nivel in [int(n) for n in args.niveles.split(",")]:
+        proceso = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--nivel", str(nivel),
+             "--duracion-tecleo", str(args.duracion_tecleo), "--cuenta-regresiva", str(args.cuenta_regresiva)],
+            cwd=RAIZ, capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            print(f"{nivel:>8} falló: {proceso.stderr.strip().splitlines()[-1:]}")
+            break
+        resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+        reporte.append(resultado)
+        print(f"{nivel:>8} {resultado['p50_ms']:>8.0f} {resultado['p95_ms']:>8.0f} {resultado['p99_ms']:>8.0f} "
+              f"{resultado['cpu_por_sesion_seg']:>10.3f} {resultado['memoria_por_sesion_mb']:>8.2f} "
+              f"{len(resultado['errores']):>8}")
+        if resultado["p95_ms"] > args.objetivo_p95_ms or resultado["errores"]:
+            break  # Niveles mayores solo pueden ir peor
+
+    sostenibles = [r["concurrencia"] for r in reporte
+                   if r["p95_ms"] <= args.objetivo_p95_ms and not r["errores"]]
+    maximo = max(sostenibles, default=0)
+    print(f"\nConcurrencia máxima sostenible (p95 ≤ {args.objetivo_p95_ms:.0f} ms, sin errores): {maximo}")
+    for r in reporte:
+        for error in r["errores"][:3]:
+            print(f"  [{r['concurrencia']}] {error}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"niveles": reporte, "concurrencia_maxima": maximo,
+                       "objetivo_p95_ms": args.objetivo_p95_ms}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
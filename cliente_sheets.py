@@ -0,0 +1,129 @@
+import json
+import threading
+
+from metricas import REGISTRO
+from planificador_sheets import PlanificadorSheets, LECTURAS_POR_MINUTO, ESCRITURAS_POR_MINUTO
+
+# --- CLIENTE DE GOOGLE SHEETS COMPARTIDO (uno por proceso y cuenta de servicio) ---
+# Las credenciales de google-auth guardan el token y lo renuevan solas al vencer;
+# la sesión HTTP reutiliza conexiones (keep-alive) con un pool de tamaño fijo, y
+# las hojas y pestañas ya abiertas se recuerdan para no repetir búsquedas.
+# Lo usan app.py, sheets_service.py y los scripts de línea de comandos. Cada
+# cliente tiene su planificador de cuotas (la API las cuenta por cuenta de servicio).
+
+ALCANCES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive.metadata.readonly',  # Abrir por nombre y fecha de modificación
+]
+TAMANO_POOL_HTTP = 10
+
+
+def info_cuenta_desde_config(config):
+    """Cuenta de servicio de los Secrets: 'gcp_service_account' o, si no está, 'credentials' (dict o JSON)."""
+    info = config.get("gcp_service_account") or config.get("credentials")
+    if info is None:
+        raise RuntimeError("No se encontró 'gcp_service_account' ni 'credentials' en los Secrets.")
+    if isinstance(info, str):
+        return json.loads(info)
+    return dict(info)
+
+
+class ClienteSheets:
+    """Cliente autenticado con caché de hojas (por clave o nombre) y de pestañas."""
+
+    def __init__(self, info_cuenta, tamano_pool=TAMANO_POOL_HTTP,
+                 lecturas_por_minuto=LECTURAS_POR_MINUTO, escrituras_por_minuto=ESCRITURAS_POR_MINUTO):
+        import gspread
+        from google.oauth2 import service_account
+        from requests.adapters import HTTPAdapter
+
+        credenciales = service_account.Credentials.from_service_account_info(info_cuenta, scopes=ALCANCES)
+        self.gspread = gspread.authorize(credenciales)
+        adaptador = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool)
+        self.gspread.http_client.session.mount('https://', adaptador)
+
+        self.planificador = PlanificadorSheets(lecturas_por_minuto, escrituras_por_minuto)
+        self._lock = threading.Lock()
+        self._hojas = {}  # ('clave' | 'nombre', valor) -> Spreadsheet
+        self._pestanas = {}  # (id de la hoja, nombre de la pestaña o None = primera) -> Worksheet
+        self.llamadas = 0  # Aperturas de hojas y pestañas que sí fueron a la API
+        self.aperturas_ahorradas = 0
+        self.pestanas_ahorradas = 0
+        REGISTRO.registrar_medidor(
+            'gincana_sheets_llamadas_ahorradas', lambda: self.estadisticas()['llamadas_ahorradas']
+        )
+
+    def _abrir(self, clave_cache, abrir, operacion):
+        with self._lock:
+            hoja = self._hojas.get(clave_cache)
+            if hoja is not None:
+                self.aperturas_ahorradas += 1
+                return hoja
+        # Abrir hojas y pestañas es prioritario: lo necesita el guardado de resultados
+        hoja = self.planificador.leer(clave_cache, abrir, prioritaria=True, operacion=operacion)
+        with self._lock:
+            self.llamadas += 1
+            return self._hojas.setdefault(clave_cache, hoja)
+
+    def abrir_por_clave(self, clave):
+        return self._abrir(('clave', clave), lambda: self.gspread.open_by_key(clave), 'open_by_key')
+
+    def abrir_por_nombre(self, nombre):
+        """Abre por nombre (una búsqueda en Drive la primera vez, luego desde la caché)."""
+        return self._abrir(('nombre', nombre), lambda: self.gspread.open(nombre), 'open')
+
+    def pestana(self, hoja, nombre=None):
+        """Pestaña `nombre` de `hoja` (la primera si `nombre` es None). Lanza WorksheetNotFound si no existe."""
+        clave_cache = (hoja.id, nombre)
+        with self._lock:
+            ws = self._pestanas.get(clave_cache)
+            if ws is not None:
+                self.pestanas_ahorradas += 1
+                return ws
+        ws = self.planificador.leer(
+            ('pestana',) + clave_cache,
+            lambda: hoja.sheet1 if nombre is None else hoja.worksheet(nombre),
+            prioritaria=True,
+            operacion='worksheet',
+        )
+        with self._lock:
+            self.llamadas += 1
+            return self._pestanas.setdefault(clave_cache, ws)
+
+    def olvidar_pestana(self, hoja, nombre=None):
+        """Descarta una pestaña de la caché (se borró o se volvió a crear: su objeto ya no sirve)."""
+        with self._lock:
+            self._pestanas.pop((hoja.id, nombre), None)
+
+    def estadisticas(self):
+        with self._lock:
+            ahorradas = self.aperturas_ahorradas + self.pestanas_ahorradas
+            return {
+                'llamadas': self.llamadas,
+                'llamadas_ahorradas': ahorradas,
+                'aperturas_ahorradas': self.aperturas_ahorradas,
+                'pestanas_ahorradas': self.pestanas_ahorradas,
+            }
+
+
+_lock_clientes = threading.Lock()
+_clientes = {}  # client_email -> ClienteSheets
+
+
+def obtener_cliente(info_cuenta, **opciones):
+    """Cliente compartido del proceso para esta cuenta de servicio (se crea la primera vez).
+
+    `opciones` (tamaño del pool y cuotas por minuto) solo se usan al crearlo.
+    """
+    clave = info_cuenta.get('client_email')
+    with _lock_clientes:
+        cliente = _clientes.get(clave)
+        if cliente is None:
+            cliente = _clientes[clave] = ClienteSheets(info_cuenta, **opciones)
+        return cliente
+
+
+def clientes_activos():
+    """Clientes ya creados en este proceso (sin crear ninguno)."""
+    with _lock_clientes:
+        return list(_clientes.values())
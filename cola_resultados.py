@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+import random
+
+# --- COLA WRITE-BEHIND DE RESULTADOS (Para no bloquear la UI ni agotar la cuota de escritura) ---
+
+# Orden de las columnas de la hoja 'Resultados Brutos'
+COLUMNAS_RESULTADOS = [
+    'Fecha/Hora',
+    'ID Agente',
+    'WPM',
+    'Precisión (%)',
+    'Errores',
+    'Duracion Tecleo (s)',
+    'Duracion Lectura (s)',
+    'RPM',
+    'Respuestas Correctas',
+    'Texto Escrito',
+    'Borrados',
+    'Telemetria',  # Eventos de teclado comprimidos (telemetria.Telemetria.codificar)
+    'Alertas',  # Alertas de antitrampa.DetectorAutomatizacion, separadas por coma
+    'ID Texto',  # Pasaje del banco (textos.PASAJES); vacío en resultados anteriores al banco
+    'Progresion',  # Texto escrito segundo a segundo, como cambios comprimidos (progresion.Progresion.codificar)
+]
+
+registro = logging.getLogger(__name__)
+
+EN_COLA = "en_cola"
+GUARDADO = "guardado"
+ERROR = "error"
+
+
+def fila_resultado(results_dict):
+    """Convierte el diccionario de resultados en la fila de 'Resultados Brutos'."""
+    return [results_dict[columna] for columna in COLUMNAS_RESULTADOS]
+
+
+def clave_idempotencia(results_dict):
+    """Clave única del intento: ID de agente + fecha/hora del resultado + ID del intento.
+
+    'ID Intento' (el uuid que se genera al empezar el test) no es una columna de
+    la hoja: distingue dos intentos del mismo agente guardados en el mismo segundo.
+    """
+    return f"{results_dict['ID Agente']}|{results_dict['Fecha/Hora']}|{results_dict.get('ID Intento', '')}"
+
+
+def es_reintentable(error):
+    """True si el error es de cuota (429), del servidor (5xx) o de red."""
+    respuesta = getattr(error, "response", None)
+    status = getattr(respuesta, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, OSError)
+
+
+class ColaResultados:
+    """Reconciliador write-behind: drena la bandeja local hacia Sheets por lotes.
+
+    Los resultados se guardan primero en la `BandejaSalida` (un commit local) y un
+    hilo en segundo plano los envía con `escribir_lote(filas)`, que debe escribir
+    todas las filas en una sola llamada (p. ej. `worksheet.append_rows`). Un lote
+    se envía cuando hay `tamano_lote` pendientes o cuando el más antiguo lleva
+    `intervalo_seg` esperando. Al arrancar se drena lo que quedó pendiente.
+    `al_sincronizar(filas)`, si se indica, se llama tras cada lote guardado.
+    """
+
+    def __init__(self, bandeja, escribir_lote, tamano_lote=20, intervalo_seg=5.0,
+                 max_reintentos=6, espera_base_seg=1.0, espera_max_seg=60.0,
+                 al_sincronizar=None):
+        self._bandeja = bandeja
+        self._escribir_lote = escribir_lote
+        self._al_sincronizar = al_sincronizar
+        self.tamano_lote = tamano_lote
+        self.intervalo_seg = intervalo_seg
+        self.max_reintentos = max_reintentos
+        self.espera_base_seg = espera_base_seg
+        self.espera_max_seg = espera_max_seg
+
+        self._racha_fallos = 0  # Esperas seguidas sin un lote guardado: el backoff sigue creciendo entre lotes
+        self._cond = threading.Condition()
+        self._bandeja.reabrir_errores()
+        self._hilo = threading.Thread(target=self._trabajar, name="cola-resultados", daemon=True)
+        self._hilo.start()
+
+    # --- API pública ---
+
+    def encolar(self, results_dict):
+        """Guarda el resultado en la bandeja local y devuelve su clave (ticket)."""
+        clave = clave_idempotencia(results_dict)
+        self._bandeja.agregar(clave, fila_resultado(results_dict))
+        with self._cond:
+            self._cond.notify()
+        return clave
+
+    def estado(self, ticket):
+        """Devuelve (estado, detalle) del ticket: en_cola, guardado o error."""
+        registro = self._bandeja.estado(ticket)
+        if registro is None:
+            return ERROR, "Ticket desconocido."
+        sincronizado, error = registro
+        if sincronizado is not None:
+            return GUARDADO, ""
+        if error is not None:
+            return ERROR, error
+        return EN_COLA, ""
+
+    def pendientes(self):
+        return self._bandeja.resumen_pendientes()[0]
+
+    # --- Hilo de sincronización ---
+
+    def _tomar_lote(self):
+        """Espera hasta que haya un lote completo o venza el intervalo del más antiguo."""
+        with self._cond:
+            while True:
+                cantidad, mas_antiguo = self._bandeja.resumen_pendientes()
+                if cantidad >= self.tamano_lote:
+                    break
+                if cantidad:
+                    espera = self.intervalo_seg - (time.time() - mas_antiguo)
+                    if espera <= 0:
+                        break
+                    self._cond.wait(espera)
+                else:
+                    self._cond.wait()
+        return self._bandeja.pendientes(self.tamano_lote)
+
+    def _trabajar(self):
+        # El hilo no debe morir: si algo falla fuera de la escritura (SQLite, al_sincronizar),
+        # se registra y se vuelve a intentar después de esperar
+        while True:
+            try:
+                lote = self._tomar_lote()
+                self._escribir_con_reintentos(lote)
+            except Exception:
+                registro.exception("Error en el hilo de la cola de resultados")
+                self._esperar_backoff()
+
+    def _esperar_backoff(self):
+        """Backoff exponencial con jitter; crece mientras no se guarde ningún lote."""
+        espera = min(self.espera_max_seg, self.espera_base_seg * (2 ** min(self._racha_fallos, 30)))
+        self._racha_fallos += 1
+        time.sleep(espera * random.uniform(0.5, 1.0))
+
+    def _confirmar(self, claves, filas):
+        self._racha_fallos = 0
+        self._bandeja.marcar_sincronizados(claves)
+        if self._al_sincronizar:
+            try:
+                self._al_sincronizar(filas)
+            except Exception:
+                # Las filas ya están guardadas: un fallo del aviso no debe reenviarlas
+                registro.exception("Error en al_sincronizar tras guardar %d filas", len(filas))
+
+    def _escribir_con_reintentos(self, lote):
+        claves = [clave for clave, _ in lote]
+        filas = [fila for _, fila in lote]
+        for _ in range(self.max_reintentos):
+            try:
+                self._escribir_lote(filas)
+            except Exception as e:
+                if not es_reintentable(e):
+                    self._escribir_de_a_una(lote, e)
+                    return
+                # Ante 429/5xx o fallos de red
+                self._esperar_backoff()
+            else:
+                self._confirmar(claves, filas)
+                return
+        # Se agotaron los reintentos: las filas siguen pendientes en la bandeja y la
+        # racha de fallos hace que el próximo intento espere el máximo antes de retomarlas
+        registro.warning("No se pudo guardar un lote de %d filas; se reintentará", len(lote))
+        self._esperar_backoff()
+
+    def _escribir_de_a_una(self, lote, error):
+        """Tras un error no recuperable, aísla la fila culpable: solo se apartan las que fallan solas."""
+        if len(lote) == 1:
+            registro.error("Resultado %s apartado por un error no recuperable: %s", lote[0][0], error)
+            self._bandeja.marcar_error([lote[0][0]], str(error))
+            return
+        for clave, fila in lote:
+            try:
+                self._escribir_lote([fila])
+            except Exception as e:
+                if es_reintentable(e):
+                    self._esperar_backoff()
+                    return  # El resto sigue pendiente y se retoma con el próximo lote
+                registro.error("Resultado %s apartado por un error no recuperable: %s", clave, e)
+                self._bandeja.marcar_error([clave], str(e))
+            else:
+                self._confirmar([clave], [fila])
@@ -0,0 +1,2 @@
+# test_connection.py es una página de Streamlit para probar la conexión, no un test de pytest
+collect_ignore = ["test_connection.py"]
@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import threading
+import time
+
+from telemetria import Telemetria
+from antitrampa import DetectorAutomatizacion
+from progresion import Progresion
+
+# --- ESTADO DEL TEST FUERA DEL PROCESO (checkpoints por intento) ---
+# El avance del test vive en st.session_state, que muere con el proceso. Con un
+# almacén configurado, cada cambio de fase guarda una instantánea del intento
+# (SQLite local o un servidor compatible con Redis compartido entre réplicas) y
+# una sesión nueva con ?intento=<id> en la URL retoma el test donde quedó.
+
+CLAVES_ESTADO = (
+    'agente_id', 'current_phase', 'intento_id', 'pasaje_id', 'countdown_start', 'countdown_target',
+    'start_time', 'reading_time', 'typing_time', 'finished', 'texto_escrito',
+    'comprehension_answers', 'saving', 'ticket_guardado', 'guardado_exitoso',
+)
+TTL_SEGUNDOS = 6 * 3600  # Un intento abandonado se descarta a las 6 horas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS intentos (
+    intento TEXT PRIMARY KEY,
+    estado TEXT NOT NULL,
+    actualizado REAL NOT NULL
+);
+"""
+
+
+def instantanea(estado):
+    """Estado del test (un mapeo como st.session_state) -> dict serializable en JSON."""
+    datos = {clave: estado.get(clave) for clave in CLAVES_ESTADO}
+    telemetria = estado.get('telemetria')
+    if telemetria is not None:
+        datos['telemetria'] = telemetria.codificar()
+    progresion = estado.get('progresion')
+    if progresion is not None:
+        datos['progresion'] = progresion.codificar()
+    detector = estado.get('detector')
+    if detector is not None:
+        datos['detector'] = vars(detector)
+    return datos
+
+
+def restaurar(estado, datos):
+    """Aplica una instantánea sobre `estado` (st.session_state)."""
+    for clave in CLAVES_ESTADO:
+        if clave in datos:
+            estado[clave] = datos[clave]
+    # La captura de teclas del navegador renace con la página: su nueva instancia numera sus eventos desde 0
+    estado['telemetria'] = Telemetria.decodificar(datos.get('telemetria'))
+    estado['progresion'] = Progresion.decodificar(datos.get('progresion'))
+    detector = DetectorAutomatizacion()
+    detector.__dict__.update(datos.get('detector') or {})
+    estado['detector'] = detector
+
+
+class AlmacenEstadoSQLite:
+    """Checkpoints en un archivo SQLite (WAL): sirve para reinicios de un proceso o réplicas con disco compartido."""
+
+    def __init__(self, ruta, ttl_seg=TTL_SEGUNDOS):
+        self.ttl_seg = ttl_seg
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(ESQUEMA)
+
+    def guardar(self, intento, datos):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO intentos (intento, estado, actualizado) VALUES (?, ?, ?)",
+                (intento, json.dumps(datos, ensure_ascii=False), time.time()),
+            )
+
+    def cargar(self, intento):
+        """Instantánea del intento, o None si no existe o expiró."""
+        with self._lock:
+            self._conn.execute("DELETE FROM intentos WHERE actualizado < ?", (time.time() - self.ttl_seg,))
+            registro = self._conn.execute(
+                "SELECT estado FROM intentos WHERE intento = ?", (intento,)
+            ).fetchone()
+        return json.loads(registro[0]) if registro else None
+
+    def borrar(self, intento):
+        with self._lock:
+            self._conn.execute("DELETE FROM intentos WHERE intento = ?", (intento,))
+
+
+class AlmacenEstadoRedis:
+    """Checkpoints en un servidor compatible con Redis, compartido por todas las réplicas (expiran solos)."""
+
+    def __init__(self, url, ttl_seg=TTL_SEGUNDOS, prefijo="gincana:intento:"):
+        import redis
+
+        self.ttl_seg = ttl_seg
+        self.prefijo = prefijo
+        self._redis = redis.Redis.from_url(url)
+
+    def guardar(self, intento, datos):
+        self._redis.set(self.prefijo + intento, json.dumps(datos, ensure_ascii=False), ex=int(self.ttl_seg))
+
+    def cargar(self, intento):
+        valor = self._redis.get(self.prefijo + intento)
+        return json.loads(valor) if valor else None
+
+    def borrar(self, intento):
+        self._redis.delete(self.prefijo + intento)
+
+
+def crear_almacen_estado(config):
+    """Almacén según `estado_sesion_backend` ('sqlite' o 'redis'); None si no se configuró."""
+    tipo = config.get("estado_sesion_backend")
+    ttl_seg = float(config.get("estado_sesion_ttl_seg", TTL_SEGUNDOS))
+    if tipo == "sqlite":
+        return AlmacenEstadoSQLite(config.get("estado_sesion_ruta", "estado_sesiones.db"), ttl_seg=ttl_seg)
+    if tipo == "redis":
+        return AlmacenEstadoRedis(config["estado_sesion_redis_url"], ttl_seg=ttl_seg)
+    return None
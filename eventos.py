@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from collections import deque
+
+# --- HUB DE EVENTOS DEL MODO CONCURSO (pub/sub) ---
+# Cada resultado guardado se publica aquí y los tableros en vivo leen solo los
+# eventos nuevos desde su última versión. Con un solo proceso basta el hub en
+# memoria; con varios procesos (o réplicas) se usa un servidor compatible con
+# Redis y cada proceso recibe los eventos de todos en un hilo de escucha.
+
+CANAL_RESULTADOS = "gincana:resultados"
+CAPACIDAD_EVENTOS = 1000
+ESPERAS_RECONEXION_SEG = (1, 2, 5, 10, 30)  # Espera antes de cada reintento de suscripción (la última se repite)
+
+
+class HubEventos:
+    """Pub/sub en memoria: eventos numerados en una lista circular y suscriptores por callback."""
+
+    def __init__(self, capacidad=CAPACIDAD_EVENTOS):
+        self._lock = threading.Lock()
+        self._eventos = deque(maxlen=capacidad)  # (versión, evento)
+        self._version = 0
+        self._suscriptores = []
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def suscribir(self, funcion):
+        """`funcion(evento)` se llama con cada evento publicado (en el hilo que lo entrega)."""
+        with self._lock:
+            self._suscriptores.append(funcion)
+
+    def publicar(self, evento):
+        return self._entregar(evento)
+
+    def _entregar(self, evento):
+        with self._lock:
+            self._version += 1
+            self._eventos.append((self._version, evento))
+            suscriptores = list(self._suscriptores)
+            version = self._version
+        for funcion in suscriptores:
+            try:
+                funcion(evento)
+            except Exception:
+                pass  # Un suscriptor con error no corta la entrega a los demás
+        return version
+
+    def eventos_desde(self, version):
+        """(eventos posteriores a `version`, versión actual). Si ya salieron de la lista circular, (None, versión)."""
+        with self._lock:
+            if version >= self._version:
+                return [], self._version
+            if not self._eventos or self._eventos[0][0] > version + 1:
+                return None, self._version
+            return [evento for v, evento in self._eventos if v > version], self._version
+
+
+class HubRedis(HubEventos):
+    """Hub compartido entre procesos sobre un servidor compatible con Redis (PUBLISH/SUBSCRIBE).
+
+    Los eventos se publican en el servidor y un hilo de escucha los entrega al hub
+    local, también los de este mismo proceso. Si se corta la conexión, el hilo se
+    vuelve a suscribir con esperas crecientes; mientras no escucha (o si el servidor
+    no acepta la publicación) los eventos de este proceso se entregan localmente.
+    """
+
+    def __init__(self, url, canal=CANAL_RESULTADOS, capacidad=CAPACIDAD_EVENTOS,
+                 esperas_reconexion=ESPERAS_RECONEXION_SEG):
+        import redis
+
+        super().__init__(capacidad)
+        self.canal = canal
+        self.esperas_reconexion = esperas_reconexion
+        self._errores_conexion = (redis.ConnectionError, redis.TimeoutError, OSError)
+        self._redis = redis.Redis.from_url(url)
+        self._escuchando = threading.Event()
+        threading.Thread(target=self._escuchar, daemon=True, name="hub-redis").start()
+
+    @property
+    def escuchando(self):
+        return self._escuchando.is_set()
+
+    def publicar(self, evento):
+        escuchando = self.escuchando
+        try:
+            self._redis.publish(self.canal, json.dumps(evento, ensure_ascii=False))
+        except Exception:
+            return self._entregar(evento)
+        # Sin el hilo de escucha el evento no vuelve por el canal: los demás procesos lo reciben, este no
+        return self.version if escuchando else self._entregar(evento)
+
+    def _escuchar(self):
+        fallos = 0
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.canal)
+                self._escuchando.set()
+                fallos = 0
+                for mensaje in pubsub.listen():
+                    try:
+                        self._entregar(json.loads(mensaje['data']))
+                    except (TypeError, ValueError):
+                        continue
+            except self._errores_conexion:
+                pass
+            self._escuchando.clear()
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(self.esperas_reconexion[min(fallos, len(self.esperas_reconexion) - 1)])
+            fallos += 1
+
+
+def crear_hub(config):
+    """Hub de Redis si hay `concurso_redis_url`; si no, el hub en memoria del proceso."""
+    url = config.get("concurso_redis_url")
+    if url:
+        return HubRedis(url, canal=config.get("concurso_canal", CANAL_RESULTADOS))
+    return HubEventos()
@@ -0,0 +1,119 @@
+import threading
+
+from sortedcontainers import SortedList
+
+# --- ÍNDICE INCREMENTAL DEL RANKING DE VELOCIDAD ---
+# Mejor resultado por agente + lista ordenada por WPM. Cada resultado nuevo se
+# aplica en O(log n) y las consultas (TOP K, posición, percentil) no recorren
+# el historial completo de 'Resultados Brutos'.
+
+
+def _ancla(fila):
+    """Identidad de una fila de 'Resultados Brutos' (Fecha/Hora, ID Agente)."""
+    return (str(fila[0]), str(fila[1])) if len(fila) > 1 else None
+
+
+def a_numero(valor):
+    """Convierte un valor de la hoja ('45,3', '45.3', 45.3) a float; None si no es numérico."""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(str(valor).strip().replace('%', '').replace(',', '.'))
+    except ValueError:
+        return None
+
+
+class IndiceRanking:
+    """Índice del mejor WPM por agente, actualizable en O(log n)."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._mejores = {}  # ID Agente -> (wpm, precision, fecha)
+        self._orden = SortedList()  # (-wpm, fecha, ID Agente)
+        self.filas_leidas = 0  # Filas de datos de 'Resultados Brutos' ya procesadas
+        self.relecturas = 0  # Veces que la hoja se acortó por arriba (archivado) y se releyó
+        self._ultima = None  # Identidad de la última fila procesada
+        self._con_base = False  # Si ya se aplicaron las filas base (resumen del archivo)
+
+    def __len__(self):
+        return len(self._mejores)
+
+    def registrar(self, agente, wpm, precision, fecha):
+        """Aplica un resultado. Devuelve True si mejora la marca del agente."""
+        if not agente or wpm is None:
+            return False
+        agente = str(agente)
+        with self._lock:
+            actual = self._mejores.get(agente)
+            if actual is not None:
+                if wpm <= actual[0]:
+                    return False
+                self._orden.remove((-actual[0], actual[2], agente))
+            self._mejores[agente] = (wpm, precision, fecha)
+            self._orden.add((-wpm, fecha, agente))
+            return True
+
+    def registrar_filas(self, filas):
+        """Aplica filas con el orden de 'Resultados Brutos' (Fecha/Hora, ID Agente, WPM, Precisión, ...)."""
+        for fila in filas:
+            if len(fila) < 3:
+                continue
+            precision = a_numero(fila[3]) if len(fila) > 3 else None
+            self.registrar(fila[1], a_numero(fila[2]), precision, str(fila[0]))
+
+    def sincronizar(self, leer_filas_desde, leer_base=None):
+        """Lee solo las filas nuevas desde `filas_leidas` y las aplica.
+
+        `leer_filas_desde(desde)` recibe el número de filas de datos ya leídas y
+        devuelve las filas siguientes (sin la cabecera). La lectura empieza una
+        fila antes para comprobar que la última procesada sigue en su lugar: si no
+        (el archivado borró filas del principio), se relee desde la primera.
+        `leer_base()` devuelve filas con el mismo formato que resumen lo que ya no
+        está en la hoja (el resumen por agente del archivo); se aplica al empezar
+        y tras cada relectura. Aplicar una fila dos veces no cambia el índice.
+        """
+        with self._lock:
+            if self.filas_leidas and self._ultima is not None:
+                nuevas = leer_filas_desde(self.filas_leidas - 1)
+                if nuevas and _ancla(nuevas[0]) == self._ultima:
+                    nuevas = nuevas[1:]
+                else:
+                    self.relecturas += 1
+                    self.filas_leidas = 0
+                    self._con_base = False
+                    nuevas = leer_filas_desde(0)
+            else:
+                nuevas = leer_filas_desde(self.filas_leidas)
+            if leer_base is not None and not self._con_base:
+                self.registrar_filas(leer_base())
+                self._con_base = True
+            self.registrar_filas(nuevas)
+            self.filas_leidas += len(nuevas)
+            if nuevas:
+                self._ultima = _ancla(nuevas[-1])
+            return len(nuevas)
+
+    def top(self, k):
+        """Los K mejores como lista de dicts con las columnas del ranking."""
+        with self._lock:
+            return [self._fila(agente) for _, _, agente in self._orden.islice(0, k)]
+
+    def posicion(self, agente):
+        """Posición (1 = primero) del agente; los empates comparten posición. None si no existe."""
+        with self._lock:
+            actual = self._mejores.get(str(agente))
+            if actual is None:
+                return None
+            return self._orden.bisect_left((-actual[0],)) + 1
+
+    def percentil(self, agente):
+        """Porcentaje de agentes con un mejor WPM menor o igual al del agente."""
+        with self._lock:
+            posicion = self.posicion(agente)
+            if posicion is None:
+                return None
+            return 100.0 * (len(self._orden) - posicion + 1) / len(self._orden)
+
+    def _fila(self, agente):
+        wpm, precision, fecha = self._mejores[agente]
+        return {'ID Agente': agente, 'WPM': wpm, 'Precisión (%)': precision, 'Fecha/Hora': fecha}
@@ -0,0 +1,251 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# --- MÉTRICAS INTERNAS (formato de texto de Prometheus) ---
+# Un registro por proceso con contadores, histogramas y medidores calculados al
+# exportar. Se exporta por HTTP (/metrics) o a un archivo que lee el colector
+# (p. ej. el textfile collector de node_exporter), y el panel de administración
+# muestra los mismos números en vivo.
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+VENTANA_SESION_SEG = 300  # Una sesión sin reruns en este lapso deja de contar como activa
+
+
+def _clave(etiquetas):
+    return tuple(sorted(etiquetas.items()))
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+class Histograma:
+    """Cubetas fijas (acumuladas al exportar), suma y cuenta."""
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)  # La última es +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+    def cuantil(self, q):
+        """Estimación del cuantil q interpolando dentro de la cubeta (como histogram_quantile)."""
+        if not self.cuenta:
+            return None
+        objetivo = q * self.cuenta
+        acumulado = 0
+        for i, cantidad in enumerate(self.cubetas):
+            if acumulado + cantidad >= objetivo and cantidad:
+                if i == len(self.limites):
+                    return self.limites[-1]
+                inferior = self.limites[i - 1] if i else 0.0
+                return inferior + (self.limites[i] - inferior) * (objetivo - acumulado) / cantidad
+            acumulado += cantidad
+        return self.limites[-1]
+
+
+class RegistroMetricas:
+    """Registro de métricas del proceso, seguro entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ayuda = {}  # nombre -> (tipo, texto)
+        self._contadores = {}  # nombre -> {etiquetas: valor}
+        self._histogramas = {}  # nombre -> {etiquetas: Histograma}
+        self._medidores = {}  # nombre -> {etiquetas: función sin argumentos}
+        self._sesiones = {}  # id de sesión -> time.monotonic() del último rerun
+        self.describir('gincana_sesiones_activas', 'gauge', 'Sesiones con un rerun en los últimos 5 minutos')
+        self.registrar_medidor('gincana_sesiones_activas', self.sesiones_activas)
+
+    def describir(self, nombre, tipo, ayuda):
+        with self._lock:
+            self._ayuda[nombre] = (tipo, ayuda)
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        with self._lock:
+            serie = self._contadores.setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            serie = self._histogramas.setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            if clave not in serie:
+                serie[clave] = Histograma()
+            serie[clave].observar(valor)
+
+    @contextmanager
+    def cronometrar(self, nombre, **etiquetas):
+        """Observa en el histograma `nombre` la duración del bloque (también si lanza una excepción)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def registrar_medidor(self, nombre, funcion, **etiquetas):
+        """Medidor calculado al exportar con `funcion()` (None = sin dato)."""
+        with self._lock:
+            self._medidores.setdefault(nombre, {})[_clave(etiquetas)] = funcion
+
+    def latido_sesion(self, id_sesion):
+        with self._lock:
+            self._sesiones[id_sesion] = time.monotonic()
+
+    def sesiones_activas(self):
+        limite = time.monotonic() - VENTANA_SESION_SEG
+        with self._lock:
+            for id_sesion in [s for s, visto in self._sesiones.items() if visto < limite]:
+                del self._sesiones[id_sesion]
+            return len(self._sesiones)
+
+    # --- Lectura ---
+
+    def contadores(self, nombre):
+        """{etiquetas (tupla de pares): valor} del contador `nombre`."""
+        with self._lock:
+            return dict(self._contadores.get(nombre, {}))
+
+    def histogramas(self, nombre):
+        """{etiquetas (tupla de pares): (cuenta, media, p50, p95)} del histograma `nombre`."""
+        with self._lock:
+            return {
+                clave: (h.cuenta, h.suma / h.cuenta if h.cuenta else 0.0, h.cuantil(0.5), h.cuantil(0.95))
+                for clave, h in self._histogramas.get(nombre, {}).items()
+            }
+
+    def medidores(self, nombre):
+        with self._lock:
+            funciones = dict(self._medidores.get(nombre, {}))
+        return {clave: self._evaluar(funcion) for clave, funcion in funciones.items()}
+
+    @staticmethod
+    def _evaluar(funcion):
+        try:
+            return funcion()
+        except Exception:
+            return None
+
+    # --- Exportación ---
+
+    def exportar_prometheus(self):
+        """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            ayuda = dict(self._ayuda)
+            contadores = {n: dict(s) for n, s in self._contadores.items()}
+            histogramas = {
+                n: {c: (list(h.cubetas), h.suma, h.cuenta, h.limites) for c, h in s.items()}
+                for n, s in self._histogramas.items()
+            }
+            medidores = {n: dict(s) for n, s in self._medidores.items()}
+
+        lineas = []
+
+        def cabecera(nombre, tipo):
+            tipo_declarado, texto = ayuda.get(nombre, (tipo, ''))
+            if texto:
+                lineas.append(f"# HELP {nombre} {texto}")
+            lineas.append(f"# TYPE {nombre} {tipo_declarado}")
+
+        for nombre in sorted(contadores):
+            cabecera(nombre, 'counter')
+            for etiquetas, valor in sorted(contadores[nombre].items()):
+                lineas.append(f"{nombre}{_formatear_etiquetas(etiquetas)} {valor}")
+
+        for nombre in sorted(histogramas):
+            cabecera(nombre, 'histogram')
+            for etiquetas, (cubetas, suma, cuenta, limites) in sorted(histogramas[nombre].items()):
+                acumulado = 0
+                for limite, cantidad in zip(list(limites) + ['+Inf'], cubetas):
+                    acumulado += cantidad
+                    lineas.append(f"{nombre}_bucket{_formatear_etiquetas(etiquetas, [('le', limite)])} {acumulado}")
+                lineas.append(f"{nombre}_sum{_formatear_etiquetas(etiquetas)} {suma}")
+                lineas.append(f"{nombre}_count{_formatear_etiquetas(etiquetas)} {cuenta}")
+
+        for nombre in sorted(medidores):
+            valores = [(e, self._evaluar(f)) for e, f in sorted(medidores[nombre].items())]
+            valores = [(e, v) for e, v in valores if v is not None]
+            if not valores:
+                continue
+            cabecera(nombre, 'gauge')
+            for etiquetas, valor in valores:
+                lineas.append(f"{nombre}{_formatear_etiquetas(etiquetas)} {float(valor)}")
+
+        return '\n'.join(lineas) + '\n'
+
+    def escribir_archivo(self, ruta):
+        """Escribe la exportación de forma atómica (el colector nunca lee un archivo a medias)."""
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(self.exportar_prometheus())
+        os.replace(temporal, ruta)
+
+
+REGISTRO = RegistroMetricas()
+
+
+def cronometrado(nombre, registro=REGISTRO, **etiquetas):
+    """Decorador: observa en el histograma `nombre` la duración de cada llamada."""
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with registro.cronometrar(nombre, **etiquetas):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorar
+
+
+def iniciar_servidor(puerto, host='127.0.0.1', registro=REGISTRO):
+    """Sirve /metrics en un hilo daemon. Devuelve el servidor."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            cuerpo = registro.exportar_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass  # Sin una línea de log por cada scrape
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name='metricas-http').start()
+    return servidor
+
+
+def iniciar_archivo(ruta, intervalo_seg=15.0, registro=REGISTRO):
+    """Reescribe `ruta` cada `intervalo_seg` en un hilo daemon."""
+    def escribir_periodicamente():
+        while True:
+            try:
+                registro.escribir_archivo(ruta)
+            except OSError:
+                pass
+            time.sleep(intervalo_seg)
+
+    hilo = threading.Thread(target=escribir_periodicamente, daemon=True, name='metricas-archivo')
+    hilo.start()
+    return hilo
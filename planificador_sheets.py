@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from metricas import REGISTRO
+
+# --- PLANIFICADOR DE LLAMADAS A GOOGLE SHEETS (cuotas por minuto) ---
+# Toda llamada a la API pasa por aquí. Lecturas y escrituras tienen cada una su
+# cubo de tokens (la API las cuenta por separado, por minuto y por cuenta de
+# servicio). La prioridad se implementa con una reserva: las llamadas normales
+# (rankings, tablas de administración) no pueden gastar los últimos tokens de
+# cada cubo, que quedan para las prioritarias (guardar resultados y abrir las
+# hojas que ese guardado necesita). Las lecturas idénticas simultáneas se
+# agrupan en una sola llamada.
+
+LECTURAS_POR_MINUTO = 60
+ESCRITURAS_POR_MINUTO = 60
+FRACCION_RESERVA = 0.2
+MAX_ESPERA_LECTURA_SEG = 15.0
+MAX_ESPERA_ESCRITURA_SEG = 60.0
+
+REGISTRO.describir('gincana_sheets_segundos', 'histogram', 'Latencia de cada llamada a la API de Sheets por operación')
+REGISTRO.describir('gincana_sheets_errores_total', 'counter', 'Llamadas a la API de Sheets que fallaron, por operación')
+REGISTRO.describir('gincana_sheets_espera_cuota_segundos', 'histogram', 'Espera por cuota antes de cada llamada')
+REGISTRO.describir('gincana_sheets_holgura', 'gauge', 'Fracción libre de cada cuota por minuto')
+
+
+class CuotaAgotada(ConnectionError):
+    """No hubo cuota disponible dentro del tiempo de espera (reintentable, como un error de red)."""
+
+
+class CuboTokens:
+    """Cubo de tokens que se recarga de forma continua hasta `capacidad`."""
+
+    def __init__(self, por_minuto, fraccion_reserva=FRACCION_RESERVA):
+        self.capacidad = float(por_minuto)
+        self.recarga_seg = por_minuto / 60.0
+        self.reserva = self.capacidad * fraccion_reserva
+        self.tokens = self.capacidad
+        self._actualizado = time.monotonic()
+
+    def recargar(self, ahora):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._actualizado) * self.recarga_seg)
+        self._actualizado = ahora
+
+    def espera_hasta(self, necesarios):
+        """Segundos hasta tener `necesarios` tokens (0 si ya los hay)."""
+        return max(0.0, (necesarios - self.tokens) / self.recarga_seg)
+
+
+class PlanificadorSheets:
+    """Cubos de lectura y escritura con reserva para llamadas prioritarias y lecturas agrupadas."""
+
+    def __init__(self, lecturas_por_minuto=LECTURAS_POR_MINUTO, escrituras_por_minuto=ESCRITURAS_POR_MINUTO,
+                 fraccion_reserva=FRACCION_RESERVA):
+        self.lecturas = CuboTokens(lecturas_por_minuto, fraccion_reserva)
+        self.escrituras = CuboTokens(escrituras_por_minuto, fraccion_reserva)
+        self._condicion = threading.Condition()
+        self._en_vuelo = {}  # clave de lectura -> Future compartido
+        self.llamadas_lectura = 0
+        self.llamadas_escritura = 0
+        self.lecturas_agrupadas = 0
+        self.esperas = 0
+        self.segundos_esperados = 0.0
+        self.rechazadas = 0
+        REGISTRO.registrar_medidor('gincana_sheets_holgura', lambda: self.holgura()['holgura_lecturas'], cuota='lectura')
+        REGISTRO.registrar_medidor('gincana_sheets_holgura', lambda: self.holgura()['holgura_escrituras'], cuota='escritura')
+
+    def _tomar(self, cubo, prioritaria, max_espera_seg):
+        """Consume un token; las llamadas no prioritarias dejan intacta la reserva."""
+        necesarios = 1.0 if prioritaria else 1.0 + cubo.reserva
+        inicio = time.monotonic()
+        espero = False
+        with self._condicion:
+            while True:
+                ahora = time.monotonic()
+                cubo.recargar(ahora)
+                if cubo.tokens >= necesarios:
+                    cubo.tokens -= 1.0
+                    if espero:
+                        self.esperas += 1
+                        self.segundos_esperados += ahora - inicio
+                    REGISTRO.observar('gincana_sheets_espera_cuota_segundos', ahora - inicio,
+                                      cuota='lectura' if cubo is self.lecturas else 'escritura')
+                    return
+                restante = inicio + max_espera_seg - ahora
+                if restante <= 0:
+                    self.rechazadas += 1
+                    raise CuotaAgotada("Cuota de Google Sheets agotada; se reintentará más tarde.")
+                espero = True
+                self._condicion.wait(min(restante, cubo.espera_hasta(necesarios)))
+
+    @staticmethod
+    def _medir(operacion, funcion):
+        """Ejecuta la llamada registrando su latencia y, si falla, el error por operación."""
+        try:
+            with REGISTRO.cronometrar('gincana_sheets_segundos', operacion=operacion):
+                return funcion()
+        except Exception as e:
+            REGISTRO.incrementar('gincana_sheets_errores_total', operacion=operacion, tipo=type(e).__name__)
+            raise
+
+    def escribir(self, funcion, prioritaria=True, max_espera_seg=MAX_ESPERA_ESCRITURA_SEG, operacion='escritura'):
+        """Ejecuta una escritura cuando hay cuota. Por defecto es prioritaria (guardado de resultados)."""
+        try:
+            self._tomar(self.escrituras, prioritaria, max_espera_seg)
+        except CuotaAgotada:
+            REGISTRO.incrementar('gincana_sheets_errores_total', operacion=operacion, tipo='CuotaAgotada')
+            raise
+        with self._condicion:
+            self.llamadas_escritura += 1
+        return self._medir(operacion, funcion)
+
+    def leer(self, clave, funcion, prioritaria=False, con_cuota=True, max_espera_seg=MAX_ESPERA_LECTURA_SEG,
+             operacion='lectura'):
+        """Ejecuta una lectura cuando hay cuota; si otra idéntica (misma `clave`) está en curso, espera su resultado.
+
+        `con_cuota=False` agrupa sin gastar tokens (p. ej. metadatos de Drive, que tienen otra cuota).
+        """
+        with self._condicion:
+            futuro = self._en_vuelo.get(clave) if clave is not None else None
+            if futuro is not None:
+                self.lecturas_agrupadas += 1
+                propia = False
+            else:
+                futuro = Future()
+                propia = True
+                if clave is not None:
+                    self._en_vuelo[clave] = futuro
+        if not propia:
+            return futuro.result()
+
+        try:
+            if con_cuota:
+                try:
+                    self._tomar(self.lecturas, prioritaria, max_espera_seg)
+                except CuotaAgotada:
+                    REGISTRO.incrementar('gincana_sheets_errores_total', operacion=operacion, tipo='CuotaAgotada')
+                    raise
+            with self._condicion:
+                self.llamadas_lectura += 1
+            resultado = self._medir(operacion, funcion)
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            if clave is not None:
+                with self._condicion:
+                    self._en_vuelo.pop(clave, None)
+
+    def holgura(self):
+        """Tokens disponibles y fracción libre de cada cuota, más los contadores del planificador."""
+        with self._condicion:
+            ahora = time.monotonic()
+            self.lecturas.recargar(ahora)
+            self.escrituras.recargar(ahora)
+            return {
+                'lecturas_disponibles': self.lecturas.tokens,
+                'escrituras_disponibles': self.escrituras.tokens,
+                'holgura_lecturas': self.lecturas.tokens / self.lecturas.capacidad,
+                'holgura_escrituras': self.escrituras.tokens / self.escrituras.capacidad,
+                'llamadas_lectura': self.llamadas_lectura,
+                'llamadas_escritura': self.llamadas_escritura,
+                'lecturas_agrupadas': self.lecturas_agrupadas,
+                'esperas': self.esperas,
+                'segundos_esperados': self.segundos_esperados,
+                'rechazadas': self.rechazadas,
+            }
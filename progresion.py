@@ -0,0 +1,124 @@
+import base64
+import os
+import zlib
+from array import array
+
+from telemetria import _leer_varints, _escribir_varints
+
+# --- PROGRESIÓN DEL TECLEO (Una instantánea del texto por segundo) ---
+# El fragmento de tecleo ve el área de texto una vez por segundo. Cada
+# instantánea se guarda como un cambio respecto de la anterior: cuántos
+# caracteres se recortaron del final y qué se agregó. Con eso se reconstruye
+# el texto en cada segundo y la curva de WPM (arranque rápido, cansancio...).
+
+PREFIJO_VERSION = "v1:"
+VENTANA_WPM_SEG = 5  # Tramo con el que se calcula el WPM del momento
+
+
+class Progresion:
+    """Serie temporal de un intento: (ms desde el inicio, recorte, texto agregado) por instantánea."""
+
+    def __init__(self):
+        self.instantes_ms = array('I')  # Desde el inicio del tecleo
+        self.recortes = array('I')  # Caracteres quitados del final de la instantánea anterior
+        self.largos_agregados = array('I')  # Caracteres agregados después del recorte
+        self.agregados = array('I')  # Puntos de código de todo lo agregado, uno tras otro
+        self._ultimo = ''
+
+    def __len__(self):
+        return len(self.instantes_ms)
+
+    @property
+    def texto(self):
+        """Texto de la última instantánea."""
+        return self._ultimo
+
+    def registrar(self, instante_ms, texto, forzar=False):
+        """Agrega la instantánea si empieza un segundo nuevo (o si `forzar`). Devuelve True si se guardó."""
+        instante_ms = max(0, int(instante_ms))
+        if self.instantes_ms and not forzar:
+            if instante_ms // 1000 <= self.instantes_ms[-1] // 1000:
+                return False
+        if self.instantes_ms and instante_ms < self.instantes_ms[-1]:
+            instante_ms = self.instantes_ms[-1]
+        if texto.startswith(self._ultimo):  # Lo habitual: solo se escribió al final
+            comun = len(self._ultimo)
+        else:
+            comun = len(os.path.commonprefix([self._ultimo, texto]))
+        self.instantes_ms.append(instante_ms)
+        self.recortes.append(len(self._ultimo) - comun)
+        self.largos_agregados.append(len(texto) - comun)
+        self.agregados.extend(ord(caracter) for caracter in texto[comun:])
+        self._ultimo = texto
+        return True
+
+    def instantaneas(self):
+        """Genera (ms, texto) de cada instantánea, reconstruyendo el texto desde los cambios."""
+        texto, posicion = '', 0
+        for instante, recorte, largo in zip(self.instantes_ms, self.recortes, self.largos_agregados):
+            if recorte:
+                texto = texto[:-recorte]
+            texto += ''.join(map(chr, self.agregados[posicion:posicion + largo]))
+            posicion += largo
+            yield instante, texto
+
+    def codificar(self):
+        """Serialización compacta para la hoja: 'v1:' + base64(zlib(varints)).
+
+        Varints: cantidad de instantáneas, luego (delta de ms, recorte, largo
+        agregado) por instantánea y al final los puntos de código agregados.
+        """
+        valores = [len(self.instantes_ms)]
+        anterior = 0
+        for instante, recorte, largo in zip(self.instantes_ms, self.recortes, self.largos_agregados):
+            valores.extend((instante - anterior, recorte, largo))
+            anterior = instante
+        valores.extend(self.agregados)
+        comprimido = zlib.compress(_escribir_varints(valores), 9)
+        return PREFIJO_VERSION + base64.b64encode(comprimido).decode('ascii')
+
+    @classmethod
+    def decodificar(cls, texto):
+        progresion = cls()
+        if not texto or not texto.startswith(PREFIJO_VERSION):
+            return progresion
+        valores = _leer_varints(zlib.decompress(base64.b64decode(texto[len(PREFIJO_VERSION):])))
+        cantidad = valores[0]
+        instante = 0
+        for i in range(cantidad):
+            delta, recorte, largo = valores[1 + 3 * i:4 + 3 * i]
+            instante += delta
+            progresion.instantes_ms.append(instante)
+            progresion.recortes.append(recorte)
+            progresion.largos_agregados.append(largo)
+        progresion.agregados.extend(valores[1 + 3 * cantidad:])
+        for _, ultimo in progresion.instantaneas():
+            progresion._ultimo = ultimo
+        return progresion
+
+
+def curva_wpm(progresion, marcador, ventana_seg=VENTANA_WPM_SEG):
+    """[(segundo, WPM acumulado, WPM del tramo, precisión)] por instantánea.
+
+    `marcador` es un puntuacion.MarcadorIncremental nuevo del pasaje del intento:
+    cada instantánea solo procesa lo que cambió desde la anterior. El WPM del
+    tramo usa las palabras netas de los últimos `ventana_seg` segundos. Las
+    instantáneas del primer segundo no se grafican (el WPM sobre un instante
+    casi nulo se dispara).
+    """
+    curva, netas = [], []  # netas: (segundo, palabras netas) de cada instantánea
+    inicio = 0  # Primera instantánea dentro de la ventana
+    for instante, texto in progresion.instantaneas():
+        segundo = instante / 1000
+        alineacion = marcador.actualizar(texto)
+        wpm, precision, _, _ = marcador.metricas(segundo)
+        netas.append((segundo, max(0, (alineacion.correctos - alineacion.errores) / 5)))
+        if segundo < 1:
+            continue
+        while netas[inicio][0] < segundo - ventana_seg:
+            inicio += 1
+        desde_seg, desde_netas = netas[inicio - 1] if inicio else (0.0, 0.0)
+        tramo = segundo - desde_seg
+        wpm_tramo = max(0.0, (netas[-1][1] - desde_netas) / (tramo / 60)) if tramo > 0 else 0.0
+        curva.append((round(segundo, 1), wpm, round(wpm_tramo, 2), precision))
+    return curva
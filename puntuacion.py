@@ -0,0 +1,283 @@
+import os
+import re
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+# --- MOTOR DE PUNTUACIÓN POR ALINEACIÓN ---
+# El texto escrito se alinea contra un prefijo del original con la distancia de
+# edición de Levenshtein, calculada con el algoritmo bit-paralelo de Myers/Hyyrö
+# (una columna por carácter escrito, todas las filas del original en un entero).
+# Así un carácter saltado o sobrante cuenta como UN error y no desplaza todo lo
+# que viene después.
+
+VERSION_PUNTUACION = 2  # 1 = comparación posición a posición (versión original)
+
+ResultadoAlineacion = namedtuple(
+    'ResultadoAlineacion',
+    ['correctos', 'sustituciones', 'inserciones', 'omisiones', 'largo_original', 'errores_por_palabra'],
+)
+ResultadoAlineacion.errores = property(lambda r: r.sustituciones + r.inserciones + r.omisiones)
+
+
+def normalizar_texto(texto):
+    """Quita espacios extremos y colapsa cualquier secuencia de espacios en uno."""
+    return re.sub(r'\s+', ' ', texto.strip())
+
+
+@lru_cache(maxsize=64)
+def patron_texto(original):
+    """Máscaras de igualdad por carácter (Peq) e índice de palabra de cada posición del original."""
+    peq = {}
+    for i, caracter in enumerate(original):
+        peq[caracter] = peq.get(caracter, 0) | (1 << i)
+
+    palabra_de = []
+    palabra = 0
+    for caracter in original:
+        palabra_de.append(palabra)
+        if caracter == ' ':
+            palabra += 1  # El espacio cuenta para la palabra anterior
+    return peq, tuple(palabra_de), tuple(original.split(' '))
+
+
+def columnas_myers(peq, m, escrito):
+    """Vectores de deltas verticales (Pv, Mv) y horizontales (Hp, Hm) de cada columna.
+
+    Bit i de Pv[j]/Mv[j]: D[i+1][j] - D[i][j] es +1/-1.
+    Bit i de Hp[j]/Hm[j]: D[i][j] - D[i][j-1] es +1/-1 (la fila 0 siempre es +1).
+    """
+    mascara = (1 << m) - 1
+    columnas = ([mascara], [0], [1], [0])
+    extender_columnas(peq, mascara, columnas, escrito)
+    return columnas
+
+
+def extender_columnas(peq, mascara, columnas, escrito):
+    """Agrega a `columnas` (Pv, Mv, Hp, Hm) una columna por carácter de `escrito`, a partir de la última."""
+    columnas_pv, columnas_mv, columnas_hp, columnas_hm = columnas
+    pv, mv = columnas_pv[-1], columnas_mv[-1]
+    agregar_pv, agregar_mv = columnas_pv.append, columnas_mv.append
+    agregar_hp, agregar_hm = columnas_hp.append, columnas_hm.append
+    # Los bits de Peq por encima de m no hace falta enmascararlos: sumas, corrimientos
+    # a la izquierda y operaciones lógicas solo propagan información hacia bits altos
+    igualdad = peq.get
+    for caracter in escrito:
+        eq = igualdad(caracter, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        # Alineación global: D[0][j] = j, así que en la fila 0 el delta horizontal es +1
+        ph = ((mv | (~(xh | pv) & mascara)) << 1) | 1
+        mh = (pv & xh) << 1
+        pv = (mh | ~(xv | ph)) & mascara
+        mv = ph & xv
+        agregar_pv(pv)
+        agregar_mv(mv)
+        agregar_hp(ph)
+        agregar_hm(mh)
+
+
+def mejor_fila_final(pv, mv, m, n):
+    """Fila i con menor D[i][n] (si empatan, la mayor): hasta dónde llegó el agente en el original."""
+    mejor_i, mejor_d = 0, n
+    d = n
+    positivos = bin(pv)[2:].zfill(m)[::-1] if m else ''
+    negativos = bin(mv)[2:].zfill(m)[::-1] if m else ''
+    for i in range(m):
+        d += (positivos[i] == '1') - (negativos[i] == '1')
+        if d <= mejor_d:
+            mejor_i, mejor_d = i + 1, d
+    return mejor_i, mejor_d
+
+
+def alinear(original, escrito, patron=None):
+    """Alinea `escrito` contra el prefijo de `original` que minimiza la distancia de edición.
+
+    Ambos textos deben venir normalizados; `patron` es el de patron_texto(original)
+    si ya está precalculado. Devuelve un ResultadoAlineacion con
+    correctos, sustituciones, inserciones (caracteres de más), omisiones
+    (caracteres saltados) y la lista [(palabra, errores)] de palabras con errores.
+    """
+    n = len(escrito)
+    # Filas más allá de 2n nunca son óptimas (D[i][n] >= i - n > n = D[0][n])
+    m = min(len(original), 2 * n)
+    if n == 0 or m == 0:
+        return ResultadoAlineacion(0, 0, n, 0, 0, [])
+
+    peq, palabra_de, palabras = patron or patron_texto(original)
+    pv, mv, hp, hm = columnas_myers(peq, m, escrito)
+    i, d = mejor_fila_final(pv[n], mv[n], m, n)
+    largo_original = i
+
+    correctos = sustituciones = inserciones = omisiones = 0
+    errores_palabra = Counter()
+    j = n
+    while i > 0 or j > 0:
+        if i > 0 and j > 0:
+            if original[i - 1] == escrito[j - 1]:
+                # Con caracteres iguales la diagonal siempre es óptima: D[i-1][j-1] == D[i][j]
+                correctos += 1
+                i, j = i - 1, j - 1
+                continue
+            # D[i][j-1] y D[i-1][j-1] a partir de los deltas guardados
+            d_izquierda = d - (((hp[j] >> i) & 1) - ((hm[j] >> i) & 1))
+            d_diagonal = d_izquierda - (((pv[j - 1] >> (i - 1)) & 1) - ((mv[j - 1] >> (i - 1)) & 1))
+            if d_diagonal + 1 == d:
+                sustituciones += 1
+                errores_palabra[palabra_de[i - 1]] += 1
+                i, j, d = i - 1, j - 1, d_diagonal
+                continue
+        if i > 0 and ((pv[j] >> (i - 1)) & 1):
+            # D[i-1][j] + 1 == D[i][j]: el agente se saltó original[i-1]
+            omisiones += 1
+            errores_palabra[palabra_de[i - 1]] += 1
+            i, d = i - 1, d - 1
+        else:
+            # D[i][j-1] + 1 == D[i][j]: escrito[j-1] sobra
+            inserciones += 1
+            errores_palabra[palabra_de[max(i - 1, 0)]] += 1
+            j, d = j - 1, d - 1
+
+    errores_por_palabra = [(palabras[k], errores_palabra[k]) for k in sorted(errores_palabra)]
+    return ResultadoAlineacion(correctos, sustituciones, inserciones, omisiones, largo_original, errores_por_palabra)
+
+
+class MarcadorIncremental:
+    """Puntuación en vivo del tecleo: cada actualización procesa solo lo nuevo.
+
+    Guarda las columnas de Myers del texto ya escrito y el camino de la última
+    alineación, con los conteos acumulados desde (0, 0) en cada celda. Al agregar
+    caracteres solo se calculan sus columnas, y el recorrido hacia atrás se
+    detiene al llegar a una celda del camino anterior: desde ahí el recorrido es
+    el mismo, así que se suman los conteos guardados. Un borrado solo descarta
+    las columnas y celdas posteriores. El resultado es el mismo de alinear().
+    """
+
+    def __init__(self, original, patron=None):
+        self.original = original  # Normalizado
+        self.total_palabras = len(original.split())
+        self._peq = (patron or patron_texto(original))[0]
+        self._mascara = (1 << len(original)) - 1  # Todas las filas: no cambian al crecer el texto
+        self._escrito = ''
+        self._columnas = ([self._mascara], [0], [1], [0])
+        self._camino = [(0, 0, (0, 0, 0, 0))]  # (i, j, (correctos, sustituciones, inserciones, omisiones))
+        self._indice_celda = {(0, 0): 0}
+        self.alineacion = ResultadoAlineacion(0, 0, 0, 0, 0, [])
+
+    @classmethod
+    def desde_pasaje(cls, pasaje):
+        return cls(pasaje.normalizado, pasaje.patron)
+
+    def actualizar(self, texto_escrito):
+        """Aplica el texto actual del área de tecleo y devuelve la alineación (sin detalle por palabra)."""
+        escrito = normalizar_texto(texto_escrito)
+        if escrito == self._escrito:
+            return self.alineacion
+        comun = len(os.path.commonprefix([self._escrito, escrito]))
+        for columna in self._columnas:
+            del columna[comun + 1:]
+        while self._camino[-1][1] > comun:  # Celdas que dependen de caracteres que cambiaron
+            i, j, _ = self._camino.pop()
+            del self._indice_celda[(i, j)]
+        extender_columnas(self._peq, self._mascara, self._columnas, escrito[comun:])
+        self._escrito = escrito
+
+        n, m = len(escrito), min(len(self.original), 2 * len(escrito))
+        if n == 0 or m == 0:
+            self.alineacion = ResultadoAlineacion(0, 0, n, 0, 0, [])
+            return self.alineacion
+        pv, mv, hp, hm = self._columnas
+        filas = (1 << m) - 1
+        i, d = mejor_fila_final(pv[n] & filas, mv[n] & filas, m, n)
+        largo_original = i
+
+        # Mismo recorrido que alinear(), hasta juntarse con el camino anterior
+        original = self.original
+        pasos = []  # (i, j, paso) de la celda de llegada hacia atrás; paso: 0 correcto, 1 sust., 2 ins., 3 omisión
+        j = n
+        while (i, j) not in self._indice_celda:
+            if i > 0 and j > 0:
+                if original[i - 1] == escrito[j - 1]:
+                    pasos.append((i, j, 0))
+                    i, j = i - 1, j - 1
+                    continue
+                d_izquierda = d - (((hp[j] >> i) & 1) - ((hm[j] >> i) & 1))
+                d_diagonal = d_izquierda - (((pv[j - 1] >> (i - 1)) & 1) - ((mv[j - 1] >> (i - 1)) & 1))
+                if d_diagonal + 1 == d:
+                    pasos.append((i, j, 1))
+                    i, j, d = i - 1, j - 1, d_diagonal
+                    continue
+            if i > 0 and ((pv[j] >> (i - 1)) & 1):
+                pasos.append((i, j, 3))
+                i, d = i - 1, d - 1
+            else:
+                pasos.append((i, j, 2))
+                j, d = j - 1, d - 1
+
+        # El camino nuevo es el anterior hasta la celda de encuentro más los pasos recorridos
+        for celda_i, celda_j, _ in self._camino[self._indice_celda[(i, j)] + 1:]:
+            del self._indice_celda[(celda_i, celda_j)]
+        del self._camino[self._indice_celda[(i, j)] + 1:]
+        conteos = list(self._camino[-1][2])
+        for celda_i, celda_j, paso in reversed(pasos):
+            conteos[paso] += 1
+            self._indice_celda[(celda_i, celda_j)] = len(self._camino)
+            self._camino.append((celda_i, celda_j, tuple(conteos)))
+
+        self.alineacion = ResultadoAlineacion(*self._camino[-1][2], largo_original, [])
+        return self.alineacion
+
+    def metricas(self, tiempo_tecleo_seg, tiempo_lectura_seg=0):
+        """(wpm, precisión, errores, rpm) del texto aplicado, como calcular_metrics."""
+        return metricas_desde_alineacion(self.alineacion, self.total_palabras, tiempo_tecleo_seg, tiempo_lectura_seg)
+
+
+def metricas_desde_alineacion(alineacion, total_palabras_original, tiempo_tecleo_seg, tiempo_lectura_seg):
+    """WPM neto, precisión, errores y RPM a partir de una alineación."""
+    caracteres_correctos = alineacion.correctos
+    errores_caracter = alineacion.errores
+
+    # WPM (Neto: (Caracteres correctos - errores) / 5)
+    if tiempo_tecleo_seg > 0:
+        palabras_netas_tecleo = max(0, (caracteres_correctos - errores_caracter) / 5)
+        wpm = (palabras_netas_tecleo / (tiempo_tecleo_seg / 60))
+        wpm = max(0, round(wpm, 2))
+    else:
+        wpm = 0.00
+
+    # Precisión: caracteres correctos sobre el largo de la alineación
+    largo_alineacion = caracteres_correctos + errores_caracter
+    if largo_alineacion > 0:
+        precision_porcentaje = (caracteres_correctos / largo_alineacion) * 100
+    else:
+        precision_porcentaje = 0.00
+
+    # RPM (Lectura por Minuto)
+    if tiempo_lectura_seg > 0:
+        rpm = (total_palabras_original / (tiempo_lectura_seg / 60))
+        rpm = round(rpm, 2)
+    else:
+        rpm = 0.00
+
+    return wpm, round(precision_porcentaje, 2), errores_caracter, rpm
+
+
+def puntuar(texto_original, texto_escrito, tiempo_tecleo_seg, tiempo_lectura_seg):
+    """Devuelve ((wpm, precisión, errores, rpm), alineación) para mostrar el detalle por palabra."""
+    original_limpio = normalizar_texto(texto_original)
+    alineacion = alinear(original_limpio, normalizar_texto(texto_escrito))
+    metricas = metricas_desde_alineacion(
+        alineacion, len(original_limpio.split()), tiempo_tecleo_seg, tiempo_lectura_seg
+    )
+    return metricas, alineacion
+
+
+def puntuar_pasaje(pasaje, texto_escrito, tiempo_tecleo_seg, tiempo_lectura_seg):
+    """Como puntuar(), con el texto normalizado, las palabras y el patrón ya preparados (banco_pasajes.Pasaje)."""
+    alineacion = alinear(pasaje.normalizado, normalizar_texto(texto_escrito), pasaje.patron)
+    metricas = metricas_desde_alineacion(alineacion, pasaje.total_palabras, tiempo_tecleo_seg, tiempo_lectura_seg)
+    return metricas, alineacion
+
+
+def calcular_metrics(texto_original, texto_escrito, tiempo_tecleo_seg, tiempo_lectura_seg):
+    """Calcula WPM, precisión, RPM y errores (alineación por distancia de edición)."""
+    return puntuar(texto_original, texto_escrito, tiempo_tecleo_seg, tiempo_lectura_seg)[0]
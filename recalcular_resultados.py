@@ -0,0 +1,133 @@
+"""Re-puntúa todos los resultados históricos con la versión actual de la puntuación.
+
+Lee 'Resultados Brutos' (o el backend local), recalcula WPM, precisión, errores
+y RPM a partir de 'Texto Escrito', del pasaje de 'ID Texto' (el original si la
+fila es anterior al banco de pasajes) y de las duraciones guardadas, y escribe la
+tabla 'Resultados Recalculados v<VERSION_PUNTUACION>' por bloques. La tabla solo
+lleva la clave de cada fila (fecha/hora y agente) y las columnas re-puntuadas: el
+texto escrito y la telemetría ya están en la hoja original, que no se modifica.
+
+Uso:
+    python recalcular_resultados.py [--secrets .streamlit/secrets.toml] [--procesos N] [--solo-medir]
+"""
+import argparse
+import os
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+
+from cola_resultados import COLUMNAS_RESULTADOS
+from indice_ranking import a_numero
+from puntuacion import puntuar_pasaje, VERSION_PUNTUACION
+from banco_pasajes import cargar_banco
+
+COL_WPM = COLUMNAS_RESULTADOS.index('WPM')
+COL_PRECISION = COLUMNAS_RESULTADOS.index('Precisión (%)')
+COL_ERRORES = COLUMNAS_RESULTADOS.index('Errores')
+COL_TECLEO = COLUMNAS_RESULTADOS.index('Duracion Tecleo (s)')
+COL_LECTURA = COLUMNAS_RESULTADOS.index('Duracion Lectura (s)')
+COL_RPM = COLUMNAS_RESULTADOS.index('RPM')
+COL_TEXTO = COLUMNAS_RESULTADOS.index('Texto Escrito')
+COL_ID_TEXTO = COLUMNAS_RESULTADOS.index('ID Texto')
+# Columnas de la tabla recalculada: clave de la fila original + métricas re-puntuadas
+COLUMNAS_RECALCULADAS = ['Fecha/Hora', 'ID Agente', 'ID Texto', 'WPM', 'Precisión (%)', 'Errores', 'RPM']
+
+FILAS_POR_BLOQUE = 2000
+
+
+def nombre_tabla_recalculada(version=VERSION_PUNTUACION):
+    return f"Resultados Recalculados v{version}"
+
+
+_banco = None  # Banco de pasajes del proceso (también en cada proceso del pool)
+
+
+def usar_banco(ruta=None):
+    global _banco
+    _banco = cargar_banco(ruta)
+
+
+def recalcular_fila(fila):
+    """Devuelve la fila con las métricas recalculadas y la versión de puntuación al final."""
+    if _banco is None:
+        usar_banco()
+    fila = list(fila) + [''] * (len(COLUMNAS_RESULTADOS) - len(fila))
+    fila = fila[:len(COLUMNAS_RESULTADOS)]
+    tiempo_tecleo = a_numero(fila[COL_TECLEO]) or 0.0
+    tiempo_lectura = a_numero(fila[COL_LECTURA]) or 0.0
+    (wpm, precision, errores, rpm), _ = puntuar_pasaje(
+        _banco.obtener(str(fila[COL_ID_TEXTO])), str(fila[COL_TEXTO]), tiempo_tecleo, tiempo_lectura
+    )
+    fila[COL_WPM], fila[COL_PRECISION], fila[COL_ERRORES], fila[COL_RPM] = wpm, precision, errores, rpm
+    return fila + [VERSION_PUNTUACION]
+
+
+def fila_recalculada(fila):
+    """Recorta una fila de recalcular_fila a COLUMNAS_RECALCULADAS + 'Version Puntuacion'."""
+    return [fila[COLUMNAS_RESULTADOS.index(columna)] for columna in COLUMNAS_RECALCULADAS] + [fila[-1]]
+
+
+def _recalcular_bloque(filas):
+    return [recalcular_fila(fila) for fila in filas]
+
+
+def recalcular_filas(filas, procesos=None, ruta_banco=None):
+    """Re-puntúa las filas repartiéndolas en bloques entre un pool de procesos."""
+    usar_banco(ruta_banco)
+    if procesos == 1 or len(filas) <= FILAS_POR_BLOQUE:
+        return _recalcular_bloque(filas)
+    bloques = [filas[i:i + FILAS_POR_BLOQUE] for i in range(0, len(filas), FILAS_POR_BLOQUE)]
+    with ProcessPoolExecutor(max_workers=procesos, initializer=usar_banco, initargs=(ruta_banco,)) as pool:
+        return [fila for bloque in pool.map(_recalcular_bloque, bloques) for fila in bloque]
+
+
+def cargar_config(ruta):
+    with open(ruta, 'rb') as f:
+        return tomllib.load(f)
+
+
+def cliente_desde_config(config):
+    """Cliente de Sheets compartido con la cuenta de servicio de los Secrets (fuera de Streamlit)."""
+    from cliente_sheets import obtener_cliente, info_cuenta_desde_config
+
+    return obtener_cliente(info_cuenta_desde_config(config))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--secrets", default=os.path.join(".streamlit", "secrets.toml"))
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument("--solo-medir", action="store_true", help="Recalcula y reporta sin escribir la tabla")
+    args = parser.parse_args()
+
+    from almacenamiento import crear_backend
+
+    config = cargar_config(args.secrets)
+    backend = crear_backend(config, lambda: cliente_desde_config(config))
+
+    inicio = time.perf_counter()
+    filas = [
+        fila for fila in backend.leer_resultados(0, columnas=len(COLUMNAS_RESULTADOS)) if len(fila) > COL_TEXTO
+    ]
+    leido = time.perf_counter()
+    recalculadas = recalcular_filas(filas, args.procesos, config.get("banco_pasajes_ruta"))
+    puntuado = time.perf_counter()
+
+    cambios = sum(
+        1 for original, nueva in zip(filas, recalculadas)
+        if a_numero(original[COL_WPM]) != nueva[COL_WPM]
+    )
+    print(f"Filas: {len(filas)} · lectura {leido - inicio:.1f}s · puntuación {puntuado - leido:.1f}s "
+          f"· WPM distinto en {cambios} filas")
+
+    if args.solo_medir:
+        return
+    tabla = nombre_tabla_recalculada()
+    backend.escribir_tabla(
+        tabla, [COLUMNAS_RECALCULADAS + ['Version Puntuacion']] + [fila_recalculada(fila) for fila in recalculadas]
+    )
+    print(f"Tabla '{tabla}' escrita en {time.perf_counter() - puntuado:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,38 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
 import json
 
+from cliente_sheets import obtener_cliente
+
 def _load_creds_dict_from_secrets():
-    creds_secret = st.secrets.get("credentials")
+    creds_secret = st.secrets.get("credentials") or st.secrets.get("gcp_service_account")
     if creds_secret is None:
         raise RuntimeError("No se encontró 'credentials' en st.secrets. Revisa los Secrets.")
 
-    if isinstance(creds_secret, dict):
-        return creds_secret
     if isinstance(creds_secret, str):
         return json.loads(creds_secret)
+    try:
+        return dict(creds_secret)
+    except (TypeError, ValueError):
+        raise RuntimeError("El formato de st.secrets['credentials'] no es válido.")
 
-    raise RuntimeError("El formato de st.secrets['credentials'] no es válido.")
+def conectar_hoja(sheet_name):
+    """(ClienteSheets compartido, primera pestaña de `sheet_name`)."""
+    # Cliente compartido del proceso: se autentica una vez y recuerda la hoja y la pestaña
+    cliente = obtener_cliente(_load_creds_dict_from_secrets())
+    return cliente, cliente.pestana(cliente.abrir_por_nombre(sheet_name))
 
 def conectar_sheets(sheet_name):
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds_dict = _load_creds_dict_from_secrets()
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
-    sheet = client.open(sheet_name).sheet1
-    return sheet
+    return conectar_hoja(sheet_name)[1]
 
 def guardar_resultado(usuario, palabras_min, precision, tiempo):
-    sheet = conectar_sheets("Gincana_Mecanografia")
-    sheet.append_row([
+    cliente, sheet = conectar_hoja("Gincana_Mecanografia")
+    fila = [
         pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
         usuario,
         palabras_min,
         precision,
         tiempo
-    ])
-
+    ]
+    # La escritura pasa por el planificador de cuotas del cliente compartido
+    cliente.planificador.escribir(lambda: sheet.append_row(fila), operacion='append_row')
@@ -0,0 +1,144 @@
+import base64
+import zlib
+from array import array
+
+# --- TELEMETRÍA DE TECLEO ---
+# El navegador envía lotes de eventos (delta de tiempo en ms, código de tecla)
+# codificados como varints (LEB128) en base64. Aquí se acumulan en arreglos
+# compactos y se calculan borrados, ráfaga máxima e histograma de latencias.
+# Cada envío repite todo lo que el servidor todavía no confirmó (ver acuse), así
+# que un envío que pisa a otro antes del rerun no pierde eventos.
+
+TECLA_BORRAR = 8  # Backspace
+TECLA_SUPRIMIR = 127  # Delete
+TECLA_PEGAR = 0  # Evento de pegado (no es una tecla)
+
+VENTANA_RAFAGA_MS = 5000
+LIMITES_HISTOGRAMA_MS = [50, 100, 150, 200, 300, 500, 1000]
+PREFIJO_VERSION = "v1:"
+
+
+def _leer_varints(datos):
+    valores, actual, corrimiento = [], 0, 0
+    for byte in datos:
+        actual |= (byte & 0x7F) << corrimiento
+        if byte & 0x80:
+            corrimiento += 7
+        else:
+            valores.append(actual)
+            actual, corrimiento = 0, 0
+    return valores
+
+
+def _escribir_varints(valores):
+    salida = bytearray()
+    for valor in valores:
+        while valor >= 0x80:
+            salida.append((valor & 0x7F) | 0x80)
+            valor >>= 7
+        salida.append(valor)
+    return bytes(salida)
+
+
+def decodificar_lote(lote_b64):
+    """Lote del navegador (base64 de varints delta, código, delta, código...) -> [(delta_ms, código)]."""
+    valores = _leer_varints(base64.b64decode(lote_b64))
+    return list(zip(valores[0::2], valores[1::2]))
+
+
+def etiqueta_rango(i):
+    if i == 0:
+        return f"<{LIMITES_HISTOGRAMA_MS[0]} ms"
+    if i == len(LIMITES_HISTOGRAMA_MS):
+        return f"≥{LIMITES_HISTOGRAMA_MS[-1]} ms"
+    return f"{LIMITES_HISTOGRAMA_MS[i - 1]}-{LIMITES_HISTOGRAMA_MS[i]} ms"
+
+
+class Telemetria:
+    """Eventos de teclado de un intento, guardados en arreglos compactos."""
+
+    def __init__(self):
+        self.deltas = array('I')  # ms desde el evento anterior
+        self.codigos = array('I')  # Punto de código Unicode, 8 = borrar, 127 = suprimir, 0 = pegar
+        self.origen = None  # Instancia del componente que envía (cambia si se recarga la página)
+        self.base = 0  # Eventos que ya había cuando empezó a enviar esa instancia
+        self.incompleta = False  # Se perdieron eventos entre dos envíos
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def acuse(self):
+        """Lo confirmado al navegador: cuántos eventos de su instancia ya se aplicaron."""
+        return {'origen': self.origen, 'ack': len(self) - self.base}
+
+    def agregar_lote(self, origen, desde, lote_b64):
+        """Aplica un envío del navegador: los eventos de `origen` a partir del número `desde`.
+
+        El envío repite lo no confirmado y los reruns lo vuelven a entregar, así que
+        se solapa con lo ya aplicado: solo se agregan los eventos nuevos. Si empieza
+        después de lo aplicado, faltan eventos y la telemetría queda incompleta.
+        Devuelve los eventos nuevos.
+        """
+        if origen != self.origen:  # Página nueva: su numeración empieza de cero
+            self.origen, self.base = origen, len(self)
+        aplicados = len(self) - self.base
+        eventos = decodificar_lote(lote_b64)
+        if desde > aplicados:
+            self.incompleta = True
+            self.base -= desde - aplicados  # Los números siguientes siguen los del navegador
+        else:
+            eventos = eventos[aplicados - desde:]
+        for delta, codigo in eventos:
+            self.deltas.append(delta)
+            self.codigos.append(codigo)
+        return eventos
+
+    def metricas(self):
+        """Borrados, teclas, ráfaga máxima (WPM en 5 s), latencia media e histograma de latencias."""
+        borrados = sum(1 for codigo in self.codigos if codigo in (TECLA_BORRAR, TECLA_SUPRIMIR))
+        histograma = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+        # La primera latencia es el tiempo hasta la primera tecla: no cuenta en el histograma
+        latencias = self.deltas[1:]
+        for latencia in latencias:
+            rango = 0
+            while rango < len(LIMITES_HISTOGRAMA_MS) and latencia >= LIMITES_HISTOGRAMA_MS[rango]:
+                rango += 1
+            histograma[rango] += 1
+
+        # Ráfaga: máximo de caracteres escritos en una ventana deslizante de 5 s
+        instantes = []
+        t = 0
+        for delta, codigo in zip(self.deltas, self.codigos):
+            t += delta
+            if codigo not in (TECLA_BORRAR, TECLA_SUPRIMIR, TECLA_PEGAR):
+                instantes.append(t)
+        rafaga, inicio = 0, 0
+        for fin in range(len(instantes)):
+            while instantes[fin] - instantes[inicio] > VENTANA_RAFAGA_MS:
+                inicio += 1
+            rafaga = max(rafaga, fin - inicio + 1)
+
+        return {
+            'teclas': len(self.codigos),
+            'borrados': borrados,
+            'rafaga_wpm': round(rafaga / 5 * (60000 / VENTANA_RAFAGA_MS), 2),
+            'latencia_media_ms': round(sum(latencias) / len(latencias), 1) if latencias else 0.0,
+            'histograma': {etiqueta_rango(i): cantidad for i, cantidad in enumerate(histograma)},
+        }
+
+    def codificar(self):
+        """Serialización compacta para guardar en la hoja: 'v1:' + base64(zlib(varints))."""
+        intercalados = [valor for par in zip(self.deltas, self.codigos) for valor in par]
+        comprimido = zlib.compress(_escribir_varints(intercalados), 9)
+        return PREFIJO_VERSION + base64.b64encode(comprimido).decode('ascii')
+
+    @classmethod
+    def decodificar(cls, texto):
+        telemetria = cls()
+        if not texto or not texto.startswith(PREFIJO_VERSION):
+            return telemetria
+        datos = zlib.decompress(base64.b64decode(texto[len(PREFIJO_VERSION):]))
+        valores = _leer_varints(datos)
+        telemetria.deltas.extend(valores[0::2])
+        telemetria.codigos.extend(valores[1::2])
+        return telemetria
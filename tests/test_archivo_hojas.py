@@ -0,0 +1,46 @@
+from almacenamiento import BackendLocal
+from archivado import ArchivoHojas, PREFIJO_HOJA_ARCHIVO
+from cola_resultados import COLUMNAS_RESULTADOS
+
+
+def fila(fecha, agente, wpm):
+    return [fecha, agente, 'Nombre', 'PM', wpm, 95.0, 1]
+
+
+class BackendQueRegistra(BackendLocal):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.agregadas = []
+
+    def escribir_tabla(self, nombre, valores):
+        raise AssertionError("La pestaña del mes no debe reescribirse")
+
+    def agregar_a_tabla(self, nombre, filas, cabecera):
+        self.agregadas.append(list(filas))
+        super().agregar_a_tabla(nombre, filas, cabecera)
+
+
+def test_agregar_solo_suma_filas_nuevas(tmp_path):
+    backend = BackendQueRegistra(str(tmp_path / "r.db"), str(tmp_path))
+    archivo = ArchivoHojas(backend)
+
+    archivo.agregar('2024-05', [fila('2024-05-01 10:00:00', '007', 40), fila('2024-05-02 10:00:00', '008', 50)])
+    # Una corrida cortada a mitad de camino vuelve a archivar filas ya guardadas
+    archivo.agregar('2024-05', [fila('2024-05-02 10:00:00', '008', 50), fila('2024-05-03 10:00:00', '007', 60)])
+
+    assert [len(filas) for filas in backend.agregadas] == [2, 1]
+    assert backend.agregadas[1][0][0] == '2024-05-03 10:00:00'
+    tabla = backend.leer_tabla(PREFIJO_HOJA_ARCHIVO + '2024-05')
+    assert tabla[0] == COLUMNAS_RESULTADOS
+    assert [(f[0], f[1]) for f in tabla[1:]] == [
+        ('2024-05-01 10:00:00', '007'), ('2024-05-02 10:00:00', '008'), ('2024-05-03 10:00:00', '007'),
+    ]
+    assert archivo.meses() == ['2024-05']
+
+
+def test_sin_filas_nuevas_no_escribe(tmp_path):
+    backend = BackendQueRegistra(str(tmp_path / "r.db"), str(tmp_path))
+    archivo = ArchivoHojas(backend)
+    archivo.agregar('2024-05', [fila('2024-05-01 10:00:00', '007', 40)])
+    archivo.agregar('2024-05', [fila('2024-05-01 10:00:00', '007', 40)])
+    assert len(backend.agregadas) == 1
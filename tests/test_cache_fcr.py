@@ -0,0 +1,46 @@
+import pandas as pd
+
+from cache_fcr import CacheFCR
+
+HOJA = 'Ranking FCR Semanal - PM'
+
+
+def tabla():
+    return pd.DataFrame({'Empleado': ['Ana'], 'Total P+N': ['10'], '% +': ['85,5%']})
+
+
+def test_error_al_leer_modificacion_conserva_la_copia_local(tmp_path):
+    modificaciones = ['2024-05-01T10:00:00Z']
+
+    def leer_modificacion():
+        valor = modificaciones.pop(0)
+        if isinstance(valor, Exception):
+            raise valor
+        return valor
+
+    cache = CacheFCR(str(tmp_path), lambda nombres: {n: tabla() for n in nombres}, leer_modificacion,
+                     intervalo_chequeo_seg=0)
+    cache.obtener([HOJA])
+    assert cache.descargas == 1
+
+    modificaciones.append(ConnectionError("Drive no responde"))
+    cache.obtener([HOJA])
+    assert cache.descargas == 1
+    assert cache._meta['modificacion'] == '2024-05-01T10:00:00Z'
+
+    # Con la misma fecha de antes, sigue sin descargar
+    modificaciones.append('2024-05-01T10:00:00Z')
+    cache.obtener([HOJA])
+    assert cache.descargas == 1
+
+
+def test_error_persistente_caduca_por_edad(tmp_path):
+    def falla():
+        raise ConnectionError("Drive no responde")
+
+    modificaciones = iter(['2024-05-01T10:00:00Z'])
+    cache = CacheFCR(str(tmp_path), lambda nombres: {n: tabla() for n in nombres},
+                     lambda: next(modificaciones, None) or falla(), intervalo_chequeo_seg=0, max_edad_seg=0)
+    cache.obtener([HOJA])
+    cache.obtener([HOJA])
+    assert cache.descargas == 2
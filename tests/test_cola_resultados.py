@@ -0,0 +1,16 @@
+from cola_resultados import clave_idempotencia, fila_resultado, COLUMNAS_RESULTADOS
+
+
+def resultado(intento):
+    datos = {columna: '' for columna in COLUMNAS_RESULTADOS}
+    datos.update({'ID Agente': '007', 'Fecha/Hora': '2024-05-06 10:00:00', 'ID Intento': intento})
+    return datos
+
+
+def test_intentos_en_el_mismo_segundo_tienen_claves_distintas():
+    assert clave_idempotencia(resultado('a1')) != clave_idempotencia(resultado('b2'))
+    assert clave_idempotencia(resultado('a1')) == clave_idempotencia(resultado('a1'))
+
+
+def test_id_intento_no_va_a_la_hoja():
+    assert len(fila_resultado(resultado('a1'))) == len(COLUMNAS_RESULTADOS)
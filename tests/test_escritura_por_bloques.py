@@ -0,0 +1,94 @@
+import json
+
+from almacenamiento import BackendSheets, en_bloques
+from recalcular_resultados import COLUMNAS_RECALCULADAS, fila_recalculada, recalcular_fila
+
+
+class PlanificadorDirecto:
+    def escribir(self, funcion, prioritaria=True, operacion=None):
+        return funcion()
+
+
+class PestanaFalsa:
+    def __init__(self):
+        self.updates = []
+
+    def clear(self):
+        self.updates.clear()
+
+    def resize(self, rows, cols):
+        self.tamano = (rows, cols)
+
+    def update(self, valores, rango, value_input_option=None):
+        # Mismo límite que la API: ningún pedido puede pasar de 10 MB
+        assert len(json.dumps(valores).encode('utf-8')) < 10_000_000
+        self.updates.append((rango, valores))
+
+    def append_rows(self, valores, value_input_option=None):
+        assert len(json.dumps(valores).encode('utf-8')) < 10_000_000
+        self.updates.append(('append', valores))
+
+
+class ClienteFalso:
+    def __init__(self, pestana):
+        self.planificador = PlanificadorDirecto()
+        self._pestana = pestana
+
+    def abrir_por_clave(self, clave):
+        return object()
+
+    def pestana(self, hoja, nombre):
+        return self._pestana
+
+
+def test_en_bloques_respeta_filas_y_bytes():
+    filas = [[i, 'x' * 100] for i in range(1000)]
+    bloques = list(en_bloques(filas, max_bytes=5_000, max_filas=30))
+    assert [fila for bloque in bloques for fila in bloque] == filas
+    for bloque in bloques:
+        assert len(bloque) <= 30
+        assert len(json.dumps(bloque).encode('utf-8')) <= 5_000 + len(bloque) * 2
+
+
+def test_fila_mas_grande_que_el_limite_va_sola():
+    filas = [['a'], ['x' * 50], ['b']]
+    assert list(en_bloques(filas, max_bytes=20)) == [[['a']], [['x' * 50]], [['b']]]
+
+
+def test_escribir_tabla_grande_por_rangos_consecutivos():
+    pestana = PestanaFalsa()
+    backend = BackendSheets(lambda: ClienteFalso(pestana), 'id')
+    valores = [['Cabecera', 'Texto']] + [[i, 'x' * 2_000] for i in range(12_000)]  # ~24 MB en total
+
+    backend.escribir_tabla('Tabla', valores)
+
+    assert len(pestana.updates) > 1
+    assert pestana.tamano == (len(valores), 2)
+    fila_esperada = 1
+    escritas = []
+    for rango, bloque in pestana.updates:
+        assert rango == f"A{fila_esperada}"
+        fila_esperada += len(bloque)
+        escritas.extend(bloque)
+    assert escritas == valores
+
+
+def test_agregar_a_tabla_por_bloques_sin_reescribir():
+    pestana = PestanaFalsa()
+    pestana.clear = None  # Agregar nunca borra la pestaña
+    backend = BackendSheets(lambda: ClienteFalso(pestana), 'id')
+    filas = [[i, 'x' * 2_000] for i in range(12_000)]
+
+    backend.agregar_a_tabla('Archivo 2024-05', filas, ['Cabecera', 'Texto'])
+
+    assert len(pestana.updates) > 1
+    assert all(rango == 'append' for rango, _ in pestana.updates)
+    assert [fila for _, bloque in pestana.updates for fila in bloque] == filas
+
+
+def test_tabla_recalculada_solo_lleva_clave_y_metricas():
+    fila = recalcular_fila(['2024-05-06 10:00:00', '007', 'Ana', 'PM', 0, 0, 0, 1.0, 2.0, 'hola', 0, 0, '', '', ''])
+    recortada = fila_recalculada(fila)
+    assert len(recortada) == len(COLUMNAS_RECALCULADAS) + 1
+    assert recortada[:2] == ['2024-05-06 10:00:00', '007']
+    assert 'hola' not in recortada
@@ -0,0 +1,106 @@
+import queue
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from eventos import HubEventos, HubRedis
+
+
+class ErrorConexion(Exception):
+    pass
+
+
+class PubSubFalso:
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.mensajes = queue.Queue()
+
+    def subscribe(self, canal):
+        if self.servidor.caido.is_set():
+            raise ErrorConexion("sin servidor")
+        self.servidor.suscriptos.append(self)
+
+    def listen(self):
+        while True:
+            mensaje = self.mensajes.get()
+            if mensaje is None:
+                raise ErrorConexion("conexión cortada")
+            yield {'data': mensaje}
+
+    def close(self):
+        if self in self.servidor.suscriptos:
+            self.servidor.suscriptos.remove(self)
+
+
+class RedisFalso:
+    def __init__(self):
+        self.suscriptos = []
+        self.publicados = []
+        self.caido = threading.Event()
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return PubSubFalso(self)
+
+    def publish(self, canal, mensaje):
+        self.publicados.append(mensaje)
+        for pubsub in list(self.suscriptos):
+            pubsub.mensajes.put(mensaje)
+
+    def cortar(self):
+        self.caido.set()
+        for pubsub in list(self.suscriptos):
+            pubsub.mensajes.put(None)
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    servidor = RedisFalso()
+    modulo = types.SimpleNamespace(
+        Redis=types.SimpleNamespace(from_url=lambda url: servidor),
+        ConnectionError=ErrorConexion,
+        TimeoutError=TimeoutError,
+    )
+    monkeypatch.setitem(sys.modules, 'redis', modulo)
+    return servidor
+
+
+def esperar_hasta(condicion, limite_seg=2):
+    fin = time.monotonic() + limite_seg
+    while not condicion():
+        assert time.monotonic() < fin
+        time.sleep(0.005)
+
+
+def test_hub_en_memoria_entrega_desde_version():
+    hub = HubEventos(capacidad=2)
+    recibidos = []
+    hub.suscribir(recibidos.append)
+    for i in range(3):
+        hub.publicar({'i': i})
+    assert recibidos == [{'i': 0}, {'i': 1}, {'i': 2}]
+    assert hub.eventos_desde(1) == ([{'i': 1}, {'i': 2}], 3)
+    assert hub.eventos_desde(0) == (None, 3)
+
+
+def test_hub_redis_se_reconecta_y_no_pierde_eventos_propios(servidor):
+    hub = HubRedis("redis://falso", esperas_reconexion=(0.05,))
+    esperar_hasta(lambda: hub.escuchando)
+
+    hub.publicar({'n': 1})
+    esperar_hasta(lambda: hub.version == 1)
+
+    servidor.cortar()
+    esperar_hasta(lambda: not hub.escuchando)
+    # Con el hilo caído el evento se publica para los demás y se entrega localmente
+    hub.publicar({'n': 2})
+    assert hub.version == 2
+    assert len(servidor.publicados) == 2
+
+    servidor.caido.clear()
+    esperar_hasta(lambda: hub.escuchando)
+    hub.publicar({'n': 3})
+    esperar_hasta(lambda: hub.version == 3)
+    assert hub.eventos_desde(0) == ([{'n': 1}, {'n': 2}, {'n': 3}], 3)
@@ -0,0 +1,49 @@
+import base64
+
+from antitrampa import ALERTA_SALTO_DE_TEXTO, ALERTA_TELEMETRIA_INCOMPLETA, DetectorAutomatizacion
+from telemetria import Telemetria, _escribir_varints
+
+
+def lote(*eventos):
+    return base64.b64encode(_escribir_varints([v for evento in eventos for v in evento])).decode('ascii')
+
+
+def test_envios_acumulados_no_duplican_eventos():
+    telemetria = Telemetria()
+    assert telemetria.agregar_lote('a', 0, lote((0, 104), (120, 111))) == [(0, 104), (120, 111)]
+    # Sin acuse todavía: el navegador reenvía desde 0 con un evento más
+    assert telemetria.agregar_lote('a', 0, lote((0, 104), (120, 111), (90, 108))) == [(90, 108)]
+    # El rerun vuelve a entregar el mismo valor
+    assert telemetria.agregar_lote('a', 0, lote((0, 104), (120, 111), (90, 108))) == []
+    assert telemetria.acuse() == {'origen': 'a', 'ack': 3}
+    assert telemetria.agregar_lote('a', 3, lote((80, 97))) == [(80, 97)]
+    assert list(telemetria.codigos) == [104, 111, 108, 97]
+    assert not telemetria.incompleta
+
+
+def test_hueco_marca_telemetria_incompleta():
+    telemetria = Telemetria()
+    telemetria.agregar_lote('a', 0, lote((0, 104)))
+    assert telemetria.agregar_lote('a', 3, lote((50, 97), (60, 98))) == [(50, 97), (60, 98)]
+    assert telemetria.incompleta
+    assert telemetria.acuse()['ack'] == 5
+    assert telemetria.agregar_lote('a', 4, lote((60, 98), (70, 99))) == [(70, 99)]
+
+
+def test_pagina_nueva_numera_desde_cero():
+    telemetria = Telemetria.decodificar(Telemetria().codificar())
+    telemetria.agregar_lote('a', 0, lote((0, 104), (120, 111)))
+    assert telemetria.agregar_lote('b', 0, lote((0, 108))) == [(0, 108)]
+    assert len(telemetria) == 3
+    assert telemetria.acuse() == {'origen': 'b', 'ack': 1}
+
+
+def test_detector_con_telemetria_incompleta_no_acusa_salto():
+    detector = DetectorAutomatizacion()
+    detector.procesar(0, 104)
+    detector.observar_texto(20)
+    detector.observar_texto(45)
+    detector.observar_texto(70)
+    assert ALERTA_SALTO_DE_TEXTO in detector.alertas()
+    detector.telemetria_incompleta = True
+    assert detector.alertas() == [ALERTA_TELEMETRIA_INCOMPLETA]
@@ -0,0 +1,125 @@
+# --- CONTENIDO DE LA PRUEBA (Textos de tecleo y preguntas de comprensión) ---
+# Cada pasaje tiene un ID estable (se guarda con el resultado en 'ID Texto'), el
+# texto y sus preguntas. Los IDs no se reutilizan: si un texto cambia, lleva un
+# ID nuevo, para que los resultados históricos se puedan volver a puntuar.
+
+ID_PASAJE_ORIGINAL = "T01"  # Texto de los resultados guardados antes de existir 'ID Texto'
+
+PASAJES = [
+    {
+        "id": ID_PASAJE_ORIGINAL,
+        "texto": (
+            "La atención al cliente en un Contact Center requiere precisión y velocidad. "
+            "La métrica clave es el FCR, First Contact Resolution, que mide la capacidad "
+            "de resolver el problema del cliente en la primera interacción. Un alto FCR "
+            "está directamente relacionado con la satisfacción del cliente (CSAT) y la "
+            "eficiencia operativa. El manejo adecuado de la información y la capacidad "
+            "de teclear con fluidez son habilidades fundamentales para el éxito."
+        ),
+        "preguntas": [
+            {
+                "pregunta": "¿Cuál es la métrica clave mencionada en el texto?",
+                "opciones": ["A. CSAT", "B. FCR", "C. WPM"],
+                "respuesta_correcta": "B. FCR"
+            },
+            {
+                "pregunta": "¿Con qué está directamente relacionado un alto FCR?",
+                "opciones": ["A. Ahorro de tiempo", "B. Satisfacción del Cliente (CSAT)", "C. Cantidad de llamadas"],
+                "respuesta_correcta": "B. Satisfacción del Cliente (CSAT)"
+            },
+            {
+                "pregunta": "¿Qué habilidades se mencionan como fundamentales?",
+                "opciones": ["A. Hablar inglés", "B. Vender productos", "C. Manejo de información y fluidez al teclear"],
+                "respuesta_correcta": "C. Manejo de información y fluidez al teclear"
+            }
+        ],
+    },
+    {
+        "id": "T02",
+        "texto": (
+            "El tiempo medio de atención, conocido como AHT, suma la conversación, las "
+            "esperas y el trabajo posterior a la llamada. Reducirlo no significa apurar "
+            "al cliente: significa tener a mano la información correcta y registrar el "
+            "caso mientras se conversa. Un agente que documenta con claridad evita que "
+            "el cliente tenga que repetir su problema en un segundo contacto, y eso "
+            "mejora a la vez el AHT y el FCR."
+        ),
+        "preguntas": [
+            {
+                "pregunta": "¿Qué suma el tiempo medio de atención (AHT)?",
+                "opciones": ["A. Solo la conversación", "B. Conversación, esperas y trabajo posterior", "C. Las llamadas perdidas"],
+                "respuesta_correcta": "B. Conversación, esperas y trabajo posterior"
+            },
+            {
+                "pregunta": "Según el texto, ¿qué significa reducir el AHT?",
+                "opciones": ["A. Apurar al cliente", "B. Cortar las llamadas largas", "C. Tener la información a mano y registrar mientras se conversa"],
+                "respuesta_correcta": "C. Tener la información a mano y registrar mientras se conversa"
+            },
+            {
+                "pregunta": "¿Qué evita una buena documentación del caso?",
+                "opciones": ["A. Que el cliente repita su problema en otro contacto", "B. Las encuestas de satisfacción", "C. Las esperas en la fila"],
+                "respuesta_correcta": "A. Que el cliente repita su problema en otro contacto"
+            }
+        ],
+    },
+    {
+        "id": "T03",
+        "texto": (
+            "Cuando un cliente llega molesto, la primera tarea es escuchar sin "
+            "interrumpir. Repetir con nuestras palabras lo que entendimos demuestra "
+            "atención y evita malentendidos. Después conviene explicar qué podemos hacer "
+            "y en qué plazo, sin prometer lo que no depende de nosotros. Cerrar la "
+            "conversación confirmando los próximos pasos deja al cliente con una "
+            "expectativa clara y reduce los reclamos posteriores."
+        ),
+        "preguntas": [
+            {
+                "pregunta": "¿Cuál es la primera tarea ante un cliente molesto?",
+                "opciones": ["A. Ofrecer un descuento", "B. Escuchar sin interrumpir", "C. Transferir la llamada"],
+                "respuesta_correcta": "B. Escuchar sin interrumpir"
+            },
+            {
+                "pregunta": "¿Para qué sirve repetir con nuestras palabras lo que entendimos?",
+                "opciones": ["A. Para demostrar atención y evitar malentendidos", "B. Para ganar tiempo", "C. Para alargar la llamada"],
+                "respuesta_correcta": "A. Para demostrar atención y evitar malentendidos"
+            },
+            {
+                "pregunta": "¿Qué reduce cerrar la conversación confirmando los próximos pasos?",
+                "opciones": ["A. El tiempo de espera", "B. La cantidad de agentes", "C. Los reclamos posteriores"],
+                "respuesta_correcta": "C. Los reclamos posteriores"
+            }
+        ],
+    },
+    {
+        "id": "T04",
+        "texto": (
+            "La protección de los datos personales es parte del servicio. Antes de "
+            "entregar información de una cuenta hay que validar la identidad del "
+            "titular con las preguntas de seguridad definidas. Nunca se deben pedir "
+            "contraseñas completas ni anotar datos de tarjetas fuera del sistema. Si "
+            "algo parece sospechoso, el agente debe escalar el caso al equipo de "
+            "prevención de fraude en lugar de resolverlo por su cuenta."
+        ),
+        "preguntas": [
+            {
+                "pregunta": "¿Qué hay que hacer antes de entregar información de una cuenta?",
+                "opciones": ["A. Validar la identidad del titular", "B. Pedir la contraseña completa", "C. Enviar un correo"],
+                "respuesta_correcta": "A. Validar la identidad del titular"
+            },
+            {
+                "pregunta": "¿Qué no se debe hacer nunca según el texto?",
+                "opciones": ["A. Usar el sistema", "B. Anotar datos de tarjetas fuera del sistema", "C. Hacer preguntas de seguridad"],
+                "respuesta_correcta": "B. Anotar datos de tarjetas fuera del sistema"
+            },
+            {
+                "pregunta": "¿Qué debe hacer el agente si algo parece sospechoso?",
+                "opciones": ["A. Resolverlo por su cuenta", "B. Cortar la llamada", "C. Escalar el caso a prevención de fraude"],
+                "respuesta_correcta": "C. Escalar el caso a prevención de fraude"
+            }
+        ],
+    },
+]
+
+# Compatibilidad: el texto y las preguntas originales (benchmarks y scripts)
+TEXTO_PRUEBA_GINCANA = PASAJES[0]["texto"]
+PREGUNTAS_COMPRENSION = PASAJES[0]["preguntas"]